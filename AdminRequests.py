@@ -1,185 +1,385 @@
 import streamlit as st
-import mysql.connector
 from mysql.connector import Error
+from Database import get_db_connection
+from Search import show_search
+from Sessions import get_current_user
 import pandas as pd
 
 
-def get_db_connection():
-    try:
-        return mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="root",
-            database="Corporate IT Solutions"
-        )
-    except Error as e:
-        st.error(f"Database error: {e}")
-        return None
 
+PAGE_SIZE = 25
+
+# List projection for both queues: everything but the description, which is
+# only read for the request an admin opens (get_request)
+REQUEST_LIST_SELECT = """
+                      SELECT request_id,
+                             name,
+                             date,
+                             topic,
+                             currency,
+                             amount,
+                             status,
+                             processed_by,
+                             created_at,
+                             processed_at
+                      FROM requests"""
 
-def get_pending_requests():
+
+def build_pending_query(after=None, page_size=PAGE_SIZE):
+    """One page of pending requests, newest first by (created_at, request_id).
+    after is the (created_at, request_id) of the last row on the previous page."""
+    query = REQUEST_LIST_SELECT + " WHERE status = 'Pending'"
+    params = []
+    if after is not None:
+        last_created, last_id = after
+        query += " AND (created_at < %s OR (created_at = %s AND request_id < %s))"
+        params.extend([last_created, last_created, last_id])
+    query += " ORDER BY created_at DESC, request_id DESC LIMIT %s"
+    params.append(page_size + 1)  # one extra row tells us whether a next page exists
+    return query, tuple(params)
+
+
+def build_processed_query(after=None, page_size=PAGE_SIZE):
+    """One page of processed requests, latest decision first by (processed_at, request_id).
+    after is the (processed_at, request_id) of the last row on the previous page."""
+    query = REQUEST_LIST_SELECT + " WHERE status != 'Pending'"
+    params = []
+    # MySQL sorts NULL processed_at last when descending, so a NULL cursor
+    # means "remaining NULL rows by id"
+    if after is not None:
+        last_processed, last_id = after
+        if last_processed is None:
+            query += " AND processed_at IS NULL AND request_id < %s"
+            params.append(last_id)
+        else:
+            query += (" AND (processed_at < %s OR processed_at IS NULL"
+                      " OR (processed_at = %s AND request_id < %s))")
+            params.extend([last_processed, last_processed, last_id])
+    query += " ORDER BY processed_at DESC, request_id DESC LIMIT %s"
+    params.append(page_size + 1)
+    return query, tuple(params)
+
+
+def fetch_request_page(query, params, page_size=PAGE_SIZE):
+    """Run a page query; returns (rows, has_next)"""
     conn = get_db_connection()
     if conn:
         try:
             cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                           SELECT request_id,
-                                  name,
-                                  DATE_FORMAT(date, '%%Y-%%m-%%d') as date,
-                    topic,
-                    description,
-                    currency,
-                    amount,
-                    status,
-                    DATE_FORMAT(created_at, '%%Y-%%m-%%d %%H:%%i') as created_at
-                           FROM requests
-                           WHERE status = 'Pending'
-                           ORDER BY created_at DESC
-                           """)
-            return cursor.fetchall()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            return rows[:page_size], len(rows) > page_size
         except Error as e:
             st.error(f"Database error: {e}")
-            return []
+            return [], False
         finally:
-            if conn.is_connected():
-                conn.close()
-    return []
+            conn.close()
+    return [], False
+
+
+def get_pending_requests(after=None, page_size=PAGE_SIZE):
+    """One page of pending requests without descriptions; returns (rows, has_next)"""
+    query, params = build_pending_query(after, page_size)
+    return fetch_request_page(query, params, page_size)
 
 
+def get_processed_requests(after=None, page_size=PAGE_SIZE):
+    """One page of processed requests without descriptions; returns (rows, has_next)"""
+    query, params = build_processed_query(after, page_size)
+    return fetch_request_page(query, params, page_size)
 
-def get_processed_requests():
+
+def get_pending_count():
     conn = get_db_connection()
     if conn:
         try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT 
-                    name,
-                    date,
-                    topic,
-                    description,
-                    currency,
-                    amount,
-                    status,
-                    processed_by,
-                    DATE_FORMAT(created_at, '%Y-%m-%d %H:%i') as created_at,
-                    DATE_FORMAT(processed_at, '%Y-%m-%d %H:%i') as processed_at
-                FROM requests
-                WHERE status != 'Pending'
-                ORDER BY processed_at DESC
-            """)
-            return cursor.fetchall()
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM requests WHERE status = 'Pending'")
+            return int(cursor.fetchone()[0])
         except Error as e:
             st.error(f"Database error: {e}")
-            return []
+            return 0
         finally:
-            if conn.is_connected():
-                conn.close()
-    return []
-def update_request_status(request_id, status, admin_username):
+            conn.close()
+    return 0
+
+
+def get_request(request_id):
+    """The full record of one request, including its description"""
     conn = get_db_connection()
     if conn:
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("SELECT * FROM requests WHERE request_id = %s", (request_id,))
+            return cursor.fetchone()
+        except Error as e:
+            st.error(f"Database error: {e}")
+            return None
+        finally:
+            conn.close()
+    return None
+
+
+BULK_PAGE_SIZE = 200  # pending requests listed for bulk decisions
+
+
+def decide_requests(request_ids, status, admin_username):
+    """Approve or reject many requests in one transaction.
+    Only requests still Pending are changed, so a request another admin has
+    already decided keeps that decision. Returns {request_id: (success, message)}."""
+    request_ids = list(dict.fromkeys(int(request_id) for request_id in request_ids))
+    if not request_ids:
+        return {}
+    conn = get_db_connection()
+    if not conn:
+        return {request_id: (False, "Could not connect to database") for request_id in request_ids}
+    placeholders = ", ".join(["%s"] * len(request_ids))
+    try:
+        cursor = conn.cursor(dictionary=True)
+        # Lock the rows first: whatever is still Pending now is ours to decide,
+        # and nobody else can decide it before this transaction commits
+        cursor.execute(f"""
+                       SELECT request_id, status, processed_by
+                       FROM requests
+                       WHERE request_id IN ({placeholders})
+                       FOR UPDATE
+                       """, request_ids)
+        current = {row['request_id']: row for row in cursor.fetchall()}
+        pending = [request_id for request_id in request_ids
+                   if request_id in current and current[request_id]['status'] == 'Pending']
+        if pending:
+            cursor.execute(f"""
                            UPDATE requests
                            SET status       = %s,
                                processed_by = %s,
                                processed_at = NOW()
-                           WHERE request_id = %s
-                           """, (status, admin_username, request_id))
-            conn.commit()
-            return cursor.rowcount > 0
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return False
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return False
+                           WHERE request_id IN ({", ".join(["%s"] * len(pending))})
+                           """, (status, admin_username, *pending))
+
+        outcomes = {}
+        for request_id in request_ids:
+            row = current.get(request_id)
+            if row is None:
+                outcomes[request_id] = (False, "Request not found")
+            elif row['status'] == 'Pending':
+                outcomes[request_id] = (True, f"Request {status.lower()}")
+            else:
+                outcomes[request_id] = (False, f"Already {row['status'].lower()} by {row['processed_by']}")
+        conn.commit()
+        return outcomes
+    except Error as e:
+        conn.rollback()
+        return {request_id: (False, f"Database error: {e}") for request_id in request_ids}
+    finally:
+        conn.close()
+
+
+def update_request_status(request_id, status, admin_username):
+    success, _ = decide_requests([request_id], status, admin_username)[int(request_id)]
+    return success
 
 
 def show_admin_requests():
     st.set_page_config(page_title="Admin Requests", layout="wide")
 
-    if 'logged_in' not in st.session_state or not st.session_state.logged_in:
+    current_user = get_current_user()
+    if current_user is None:
         st.warning("Please log in to access this page.")
         return
 
-    if st.session_state.get('role') != 'admin':
+    if current_user['role'] != 'admin':
         st.error("You don't have permission to access this page.")
         return
 
     st.title("Admin Request Management")
 
+    with st.expander("🔍 Search Requests"):
+        show_search('requests', "Words from the topic or description", {
+            "request_id": st.column_config.NumberColumn("Request #", format="%d"),
+            "name": "Requester",
+            "topic": "Topic",
+            "status": "Status",
+            "created_at": st.column_config.DatetimeColumn("Submitted", format="YYYY-MM-DD HH:mm"),
+            "snippet": "Description",
+        }, key="request_search")
+
+    bulk = st.expander("Bulk Decisions", key="bulk_decisions", on_change="rerun")
+    with bulk:
+        if bulk.open:
+            show_bulk_decisions(current_user['username'])
+
     # Pending requests section
     st.subheader("Pending Requests")
-    pending_requests = get_pending_requests()
+    pending_cursors = st.session_state.setdefault('pending_cursors', [])
+    pending_requests, has_next = get_pending_requests(pending_cursors[-1] if pending_cursors else None)
 
     if pending_requests:
         for req in pending_requests:
-            with st.expander(f"Request #{req['request_id']} - {req['topic']}"):
+            # The expander reruns on open/close so the description is only
+            # loaded for the requests an admin actually opens
+            expander = st.expander(f"Request #{req['request_id']} - {req['topic']}",
+                                   key=f"request_{req['request_id']}", on_change="rerun")
+            with expander:
+                if not expander.open:
+                    continue
                 col1, col2 = st.columns(2)
                 with col1:
                     st.write(f"**Requester:** {req['name']}")
                     st.write(f"**Date:** {req['date']}")
-                    st.write(f"**Submitted:** {req['created_at']}")
+                    st.write(f"**Submitted:** {req['created_at']:%Y-%m-%d %H:%M}")
                     st.write(f"**Amount:** {req['currency']} {req['amount']:.2f}")
                 with col2:
                     st.write(f"**Topic:** {req['topic']}")
                     st.write(f"**Status:** {req['status']}")
 
+                details = get_request(req['request_id'])
                 st.write("**Description:**")
-                st.write(req['description'])
+                st.write(details['description'] if details else "")
 
                 col1, col2, col3 = st.columns([1, 1, 3])
                 with col1:
                     if st.button(f"Approve", key=f"approve_{req['request_id']}"):
-                        if update_request_status(req['request_id'], "Approved", st.session_state.username):
+                        if update_request_status(req['request_id'], "Approved", current_user['username']):
                             st.success("Request approved!")
                             st.rerun()
                         else:
                             st.error("Failed to update request")
                 with col2:
                     if st.button(f"Reject", key=f"reject_{req['request_id']}"):
-                        if update_request_status(req['request_id'], "Rejected", st.session_state.username):
+                        if update_request_status(req['request_id'], "Rejected", current_user['username']):
                             st.success("Request rejected!")
                             st.rerun()
                         else:
                             st.error("Failed to update request")
+
+        show_page_controls("pending", pending_cursors, pending_requests, has_next, 'created_at',
+                           f"{get_pending_count()} pending")
+    elif pending_cursors:
+        # The page we were on has been cleared; go back to the first one
+        pending_cursors.clear()
+        st.rerun()
     else:
         st.info("No pending requests found")
 
     # Processed requests section
-    with st.expander("📜 Processed Requests History", expanded=False):
-        st.subheader("Processed Requests")
-        processed_requests = get_processed_requests()
-
-        if processed_requests:
-            df = pd.DataFrame(processed_requests)
-            # Format amount with currency
-            df['amount'] = df.apply(lambda x: f"{x['currency']} {x['amount']:.2f}", axis=1)
-
-            # Format date properly
-            df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
-
-            st.dataframe(
-                df[['name', 'date', 'topic', 'amount', 'status', 'processed_by', 'processed_at']],
-                column_config={
-                    "name": "Requester",
-                    "date": st.column_config.DateColumn("Date", format="YYYY-MM-DD"),
-                    "topic": "Topic",
-                    "amount": "Amount",
-                    "status": "Status",
-                    "processed_by": "Processed By",
-                    "processed_at": st.column_config.DatetimeColumn("Processed On", format="YYYY-MM-DD HH:mm")
-                },
-                use_container_width=True,
-                hide_index=True
-            )
-        else:
-            st.info("No processed requests found")
+    history = st.expander("📜 Processed Requests History", expanded=False, key="processed_history",
+                          on_change="rerun")
+    with history:
+        if history.open:
+            show_processed_requests()
+
+
+@st.fragment
+def show_bulk_decisions(admin_username):
+    """Select pending requests and approve or reject them together. Runs as a
+    fragment, so a decision reruns only this section rather than the page."""
+    outcomes = st.session_state.pop('bulk_outcomes', None)
+    if outcomes:
+        decided = sum(1 for success, _ in outcomes.values() if success)
+        if decided:
+            st.success(f"{decided} of {len(outcomes)} requests updated")
+        if decided < len(outcomes):
+            st.warning(f"{len(outcomes) - decided} requests were not changed")
+        st.dataframe(
+            pd.DataFrame([{'Request': f"#{request_id}", 'Updated': success, 'Outcome': message}
+                          for request_id, (success, message) in outcomes.items()]),
+            hide_index=True,
+            use_container_width=True
+        )
+        if st.button("Refresh pending list", key="bulk_refresh"):
+            st.rerun(scope="app")
 
+    pending_requests, has_more = get_pending_requests(page_size=BULK_PAGE_SIZE)
+    if not pending_requests:
+        st.info("No pending requests found")
+        return
+
+    df = pd.DataFrame(pending_requests)
+    df['amount'] = df.apply(lambda x: f"{x['currency']} {x['amount']:.2f}", axis=1)
+    # A new table key after each decision clears the previous selection
+    table_version = st.session_state.setdefault('bulk_table_version', 0)
+    selection = st.dataframe(
+        df[['request_id', 'name', 'topic', 'amount', 'created_at']],
+        column_config={
+            "request_id": st.column_config.NumberColumn("Request #", format="%d"),
+            "name": "Requester",
+            "topic": "Topic",
+            "amount": "Amount",
+            "created_at": st.column_config.DatetimeColumn("Submitted", format="YYYY-MM-DD HH:mm")
+        },
+        hide_index=True,
+        use_container_width=True,
+        key=f"bulk_table_{table_version}",
+        on_select="rerun",
+        selection_mode="multi-row"
+    )
+    if has_more:
+        st.caption(f"Showing the {BULK_PAGE_SIZE} newest pending requests")
+
+    selected_ids = df['request_id'].iloc[selection.selection.rows].tolist()
+    col1, col2, col3 = st.columns([1, 1, 3])
+    decision = None
+    with col1:
+        if st.button(f"Approve {len(selected_ids)}", disabled=not selected_ids, key="bulk_approve"):
+            decision = "Approved"
+    with col2:
+        if st.button(f"Reject {len(selected_ids)}", disabled=not selected_ids, key="bulk_reject"):
+            decision = "Rejected"
+
+    if decision:
+        st.session_state.bulk_outcomes = decide_requests(selected_ids, decision, admin_username)
+        st.session_state.bulk_table_version = table_version + 1
+        st.rerun(scope="fragment")
+
+
+def show_page_controls(name, cursors, rows, has_next, order_column, caption):
+    """Previous/Next buttons over keyset cursors kept in session state"""
+    first_row = len(cursors) * PAGE_SIZE + 1
+    col1, col2, col3 = st.columns([1, 4, 1])
+    with col1:
+        if st.button("⬅ Previous", disabled=not cursors, key=f"{name}_prev"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Showing {first_row}-{first_row + len(rows) - 1} · {caption}")
+    with col3:
+        if st.button("Next ➡", disabled=not has_next, key=f"{name}_next"):
+            last = rows[-1]
+            cursors.append((last[order_column], last['request_id']))
+            st.rerun()
+
+
+def show_processed_requests():
+    st.subheader("Processed Requests")
+    processed_cursors = st.session_state.setdefault('processed_cursors', [])
+    processed_requests, has_next = get_processed_requests(processed_cursors[-1] if processed_cursors else None)
+
+    if processed_requests:
+        df = pd.DataFrame(processed_requests)
+        # Format amount with currency
+        df['amount'] = df.apply(lambda x: f"{x['currency']} {x['amount']:.2f}", axis=1)
+
+        # Format date properly
+        df['date'] = pd.to_datetime(df['date'])
+
+        st.dataframe(
+            df[['name', 'date', 'topic', 'amount', 'status', 'processed_by', 'processed_at']],
+            column_config={
+                "name": "Requester",
+                "date": st.column_config.DateColumn("Date", format="YYYY-MM-DD"),
+                "topic": "Topic",
+                "amount": "Amount",
+                "status": "Status",
+                "processed_by": "Processed By",
+                "processed_at": st.column_config.DatetimeColumn("Processed On", format="YYYY-MM-DD HH:mm")
+            },
+            use_container_width=True,
+            hide_index=True
+        )
+        show_page_controls("processed", processed_cursors, processed_requests, has_next, 'processed_at',
+                           "latest first")
+    else:
+        st.info("No processed requests found")
 
 if __name__ == "__main__":
     show_admin_requests()
\ No newline at end of file
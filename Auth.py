@@ -0,0 +1,167 @@
+# Auth.py
+import hashlib
+import hmac
+import multiprocessing
+import secrets
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+import streamlit as st
+
+
+# --- AUTH SETTINGS ---
+# Defaults can be overridden with an [auth] section in .streamlit/secrets.toml
+DEFAULT_AUTH_SETTINGS = {
+    'hash_iterations': 100000,  # PBKDF2 cost for new and re-hashed passwords
+    'hash_workers': 2,          # processes dedicated to password hashing
+    'max_pending_hashes': 16,   # hash jobs allowed to queue before callers are turned away
+    'hash_timeout': 15,         # seconds a caller waits for a queue slot or a result
+    'max_attempts': 5,          # login/verification attempts per username...
+    'attempt_window': 60,       # ...within this many seconds
+}
+
+
+class AuthBusyError(Exception):
+    """Raised when the hashing queue is full or a hash does not finish in time"""
+
+
+def load_auth_settings():
+    """Merge the [auth] secrets section over the defaults"""
+    settings = dict(DEFAULT_AUTH_SETTINGS)
+    try:
+        settings.update(st.secrets["auth"])
+    except Exception:
+        pass
+    return settings
+
+
+AUTH_SETTINGS = load_auth_settings()
+
+
+# --- Password Hashing Functions ---
+def generate_salt():
+    return secrets.token_hex(16)
+
+
+def hash_password(password, salt, iterations=DEFAULT_AUTH_SETTINGS['hash_iterations']):
+    return hashlib.pbkdf2_hmac(
+        'sha256',
+        password.encode('utf-8'),
+        salt.encode('utf-8'),
+        iterations
+    ).hex()
+
+
+# --- Hashing Pool ---
+# PBKDF2 runs in worker processes so a burst of logins cannot monopolise the
+# Streamlit server process; the semaphore bounds how many jobs may queue.
+_executor = None
+_executor_lock = threading.Lock()
+_queue_slots = threading.BoundedSemaphore(int(AUTH_SETTINGS['max_pending_hashes']))
+
+
+def get_hash_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=int(AUTH_SETTINGS['hash_workers']),
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _executor
+
+
+def submit_hash(password, salt, iterations):
+    """Queue a hash job and return its future; raises AuthBusyError when the queue is full"""
+    if not _queue_slots.acquire(timeout=AUTH_SETTINGS['hash_timeout']):
+        raise AuthBusyError("The server is busy, please try again shortly")
+    try:
+        future = get_hash_executor().submit(hash_password, password, salt, iterations)
+    except Exception:
+        _queue_slots.release()
+        raise
+    future.add_done_callback(lambda _: _queue_slots.release())
+    return future
+
+
+def compute_hash(password, salt, iterations):
+    """Hash in the worker pool and wait for the result"""
+    future = submit_hash(password, salt, iterations)
+    try:
+        return future.result(timeout=AUTH_SETTINGS['hash_timeout'])
+    except FutureTimeoutError:
+        raise AuthBusyError("The server is busy, please try again shortly")
+
+
+def create_password_hash(password):
+    """Return (hash, salt, iterations) for a new password at the configured cost"""
+    salt = generate_salt()
+    iterations = int(AUTH_SETTINGS['hash_iterations'])
+    return compute_hash(password, salt, iterations), salt, iterations
+
+
+def verify_password(stored_password, stored_salt, provided_password, iterations=None):
+    iterations = iterations or DEFAULT_AUTH_SETTINGS['hash_iterations']
+    return hmac.compare_digest(stored_password, compute_hash(provided_password, stored_salt, iterations))
+
+
+def needs_rehash(iterations):
+    """True when a stored hash is cheaper than the configured cost"""
+    return (iterations or 0) < int(AUTH_SETTINGS['hash_iterations'])
+
+
+def schedule_rehash(password, on_done):
+    """Re-hash a verified password at the configured cost without waiting for it.
+    on_done(hash, salt, iterations) runs once the worker finishes."""
+    salt = generate_salt()
+    iterations = int(AUTH_SETTINGS['hash_iterations'])
+    try:
+        future = submit_hash(password, salt, iterations)
+    except AuthBusyError:
+        return False  # try again on the next login
+
+    def _finish(done):
+        if done.exception() is None:
+            on_done(done.result(), salt, iterations)
+
+    future.add_done_callback(_finish)
+    return True
+
+
+# --- Rate Limiting ---
+_attempts = defaultdict(deque)
+_attempts_lock = threading.Lock()
+
+
+def _prune_attempts(history, now):
+    while history and history[0] <= now - AUTH_SETTINGS['attempt_window']:
+        history.popleft()
+
+
+def retry_after(username):
+    """Seconds until username may try again, or 0 if it is not rate limited"""
+    now = time.monotonic()
+    with _attempts_lock:
+        history = _attempts.get(username)
+        if not history:
+            return 0
+        _prune_attempts(history, now)
+        if len(history) < AUTH_SETTINGS['max_attempts']:
+            return 0
+        return int(history[0] + AUTH_SETTINGS['attempt_window'] - now) + 1
+
+
+def record_attempt(username):
+    now = time.monotonic()
+    with _attempts_lock:
+        history = _attempts[username]
+        _prune_attempts(history, now)
+        history.append(now)
+
+
+def clear_attempts(username):
+    with _attempts_lock:
+        _attempts.pop(username, None)
@@ -0,0 +1,153 @@
+# CustomerImport.py
+#
+# Bulk customer import from CSV or Excel. Existing customer names are loaded
+# once into a dict keyed on a normalised form of the name, so "ACME Ltd.",
+# "Acme Limited" and "acme" are treated as the same customer. New customers
+# are written with batched multi-row inserts in a single transaction.
+#
+#   python CustomerImport.py customers.csv [--dry-run] [--batch-size N]
+import argparse
+import os
+import re
+import sys
+
+import pandas as pd
+from mysql.connector import Error
+from Database import db_connection, invalidate_tables
+from LicenseImport import read_chunks
+
+
+DEFAULT_BATCH_SIZE = 500
+CUSTOMER_COLUMNS = ['customer_name', 'contact_person', 'email', 'phone', 'location']
+
+# Words dropped when comparing names: legal forms and filler
+NAME_NOISE_WORDS = {"the", "ltd", "limited", "plc", "inc", "incorporated", "llc", "co", "company",
+                    "corp", "corporation", "group", "and"}
+NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+# Report actions
+INSERT = "insert"
+EXISTS = "exists"
+DUPLICATE = "duplicate in file"
+INVALID = "invalid"
+
+
+def customer_key(name):
+    """Normalised customer name for duplicate detection"""
+    words = NON_ALPHANUMERIC.sub(" ", str(name).casefold().replace("&", " and ")).split()
+    significant = [word for word in words if word not in NAME_NOISE_WORDS]
+    return " ".join(significant or words)
+
+
+def load_existing_customers(cursor):
+    """{customer_key: customer_name} for every customer, loaded in one query"""
+    cursor.execute("SELECT customer_name FROM customers")
+    return {customer_key(name): name for (name,) in cursor.fetchall() if name}
+
+
+def plan_import(chunks, existing):
+    """Classify every row against the existing customers and earlier rows.
+    Returns (report rows, customer tuples to insert)."""
+    seen = {}  # customer_key -> name of the first row in the file using it
+    report, to_insert = [], []
+    row_number = 2  # the header is row 1
+    for chunk in chunks:
+        chunk = chunk.rename(columns=lambda column: str(column).strip())
+        if 'customer_name' not in chunk.columns:
+            report.append({'row': 1, 'customer_name': None, 'action': INVALID,
+                           'detail': "Missing column: customer_name"})
+            break
+        for column in CUSTOMER_COLUMNS:
+            if column not in chunk.columns:
+                chunk[column] = None
+
+        for record in chunk[CUSTOMER_COLUMNS].itertuples(index=False):
+            values = tuple(None if pd.isna(value) or str(value).strip() == "" else " ".join(str(value).split())
+                           for value in record)
+            name = values[0]
+            entry = {'row': row_number, 'customer_name': name, 'action': INSERT, 'detail': None}
+            row_number += 1
+
+            if name is None:
+                entry.update(action=INVALID, detail="Customer name is empty")
+            else:
+                key = customer_key(name)
+                if key in existing:
+                    entry.update(action=EXISTS, detail=f"Matches existing customer '{existing[key]}'")
+                elif key in seen:
+                    entry.update(action=DUPLICATE, detail=f"Same customer as '{seen[key]}' earlier in the file")
+                else:
+                    seen[key] = name
+                    to_insert.append(values)
+            report.append(entry)
+    return report, to_insert
+
+
+def insert_customers(cursor, customers, batch_size=DEFAULT_BATCH_SIZE):
+    """Multi-row inserts of batch_size customers each; the caller commits"""
+    for start in range(0, len(customers), batch_size):
+        batch = customers[start:start + batch_size]
+        placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(batch))
+        cursor.execute(
+            f"INSERT INTO customers ({', '.join(CUSTOMER_COLUMNS)}) VALUES {placeholders}",
+            [value for customer in batch for value in customer]
+        )
+
+
+def import_customers(source, filename, dry_run=False, batch_size=DEFAULT_BATCH_SIZE):
+    """Import a customer file. Returns {'report': [...], 'inserted': n, 'error': message or None};
+    with dry_run the report is the diff that an import would apply."""
+    result = {'report': [], 'inserted': 0, 'error': None}
+    with db_connection() as conn:
+        if not conn:
+            result['error'] = "Could not connect to database"
+            return result
+        try:
+            cursor = conn.cursor()
+            existing = load_existing_customers(cursor)
+            result['report'], to_insert = plan_import(read_chunks(source, filename, batch_size), existing)
+            if to_insert and not dry_run:
+                insert_customers(cursor, to_insert, batch_size)
+                conn.commit()
+                result['inserted'] = len(to_insert)
+        except Error as e:
+            conn.rollback()
+            result['error'] = f"Database error: {e}"
+            return result
+
+    if result['inserted']:
+        invalidate_tables('customers')
+    return result
+
+
+def summarise_report(report):
+    """Row counts per action"""
+    counts = {INSERT: 0, EXISTS: 0, DUPLICATE: 0, INVALID: 0}
+    for entry in report:
+        counts[entry['action']] += 1
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import customers from a CSV or XLSX file")
+    parser.add_argument("path")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="show what would change without writing")
+    args = parser.parse_args(argv)
+
+    result = import_customers(args.path, os.path.basename(args.path), args.dry_run, args.batch_size)
+    if result['error']:
+        print(result['error'], file=sys.stderr)
+        return 1
+
+    for entry in result['report']:
+        marker = "+" if entry['action'] == INSERT else "="
+        print(f"{marker} row {entry['row']:<6} {entry['customer_name'] or '':<40} {entry['detail'] or ''}")
+    counts = summarise_report(result['report'])
+    print(f"\n{counts[INSERT]} new, {counts[EXISTS]} already exist, {counts[DUPLICATE]} duplicates in file, "
+          f"{counts[INVALID]} invalid" + ("" if args.dry_run else f"; {result['inserted']} inserted"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,15 @@
 import pandas as pd
 import streamlit as st
-import mysql.connector
 from mysql.connector import Error
+from Database import get_db_connection, invalidate_tables
+from LicenseStats import get_customer_count, get_license_stats
+from QueryCache import cached_query
+from CustomerImport import DUPLICATE, EXISTS, INSERT, INVALID, import_customers, summarise_report
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
 
 
-def get_db_connection():
-    try:
-        return mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="root",
-            database="Corporate IT Solutions"
-        )
-    except Error as e:
-        st.error(f"Database error: {e}")
-        return None
-
 
+@cached_query('customers')
 def get_all_customers():
     conn = get_db_connection()
     if conn:
@@ -32,13 +24,16 @@ def get_all_customers():
         except Error as e:
             st.error(f"Database error: {e}")
         finally:
-            if conn.is_connected():
-                conn.close()
+            conn.close()
     return []
 
 
-def is_customer_exists(customer_name):
-    """Check if a customer with the same name already exists"""
+def is_customer_exists(customer_name, cursor=None):
+    """Check if a customer with the same name already exists; pass a cursor
+    to run the check on a connection the caller already holds"""
+    if cursor is not None:
+        cursor.execute("SELECT COUNT(*) FROM customers WHERE customer_name = %s", (customer_name,))
+        return cursor.fetchone()[0] > 0
     conn = get_db_connection()
     if conn:
         try:
@@ -49,8 +44,7 @@ def is_customer_exists(customer_name):
             st.error(f"Database error: {e}")
             return True  # Assume exists to prevent duplicates on error
         finally:
-            if conn.is_connected():
-                conn.close()
+            conn.close()
     return True  # Assume exists if connection fails
 
 def save_customer(customer_data, customer_id=None):
@@ -70,7 +64,7 @@ def save_customer(customer_data, customer_id=None):
                                """, (*customer_data, customer_id))
             else:  # Insert new
                 # First check if customer with same name exists
-                if is_customer_exists(customer_data[0]):
+                if is_customer_exists(customer_data[0], cursor):
                     st.error("A customer with this name already exists")
                     return False
 
@@ -79,13 +73,13 @@ def save_customer(customer_data, customer_id=None):
                                VALUES (%s, %s, %s, %s, %s)
                                """, customer_data)
             conn.commit()
+            invalidate_tables('customers')
             return True
         except Error as e:
             st.error(f"Database error: {e}")
             return False
         finally:
-            if conn.is_connected():
-                conn.close()
+            conn.close()
     return False
 
 
@@ -97,59 +91,15 @@ def delete_customer(customer_id):
             cursor = conn.cursor()
             cursor.execute("DELETE FROM customers WHERE customer_id = %s", (customer_id,))
             conn.commit()
+            invalidate_tables('customers')
             return cursor.rowcount > 0
         except Error as e:
             st.error(f"Database error: {e}")
             return False
         finally:
-            if conn.is_connected():
-                conn.close()
+            conn.close()
     return False
 
-def get_customer_count():
-    """Get total number of customers"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM customers")
-            return cursor.fetchone()[0]
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return 0
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return 0
-
-
-def get_license_stats():
-    """Get active and expired license counts"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            query = """
-                    SELECT 
-                        COALESCE(SUM(CASE WHEN expiry_date >= CURDATE() THEN 1 ELSE 0 END), 0) as active,
-                        COALESCE(SUM(CASE WHEN expiry_date < CURDATE() THEN 1 ELSE 0 END), 0) as expired
-                    FROM licenses
-                    """
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute(query)
-            result = cursor.fetchone()
-            return {
-                'active': int(result['active']) if result['active'] is not None else 0,
-                'expired': int(result['expired']) if result['expired'] is not None else 0
-            }
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return {'active': 0, 'expired': 0}
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return {'active': 0, 'expired': 0}
-
-
 
 def show_customer_master():
     st.set_page_config(page_title="Customer Master", layout="wide")
@@ -235,6 +185,33 @@ def show_customer_master():
                         else:
                             st.error("Error adding customer - customer name may already exist")
 
+        with st.expander("Bulk Import Customers"):
+            st.caption("CSV or Excel file with a customer_name column and optionally contact_person, "
+                       "email, phone and location. Names that match an existing customer after "
+                       "ignoring case, punctuation and words like Ltd or Inc are skipped.")
+            uploaded_file = st.file_uploader("Customer File", type=["csv", "xlsx"], key="customer_import_file")
+            if uploaded_file is not None:
+                col1, col2 = st.columns(2)
+                preview = col1.button("Preview Changes", key="customer_import_preview")
+                run_import = col2.button("Import Customers", type="primary", key="customer_import_run")
+                if preview or run_import:
+                    result = import_customers(uploaded_file, uploaded_file.name, dry_run=preview)
+                    if result['error']:
+                        st.error(result['error'])
+                    else:
+                        counts = summarise_report(result['report'])
+                        if run_import:
+                            st.success(f"{result['inserted']} customers imported")
+                        st.write(f"{counts[INSERT]} new, {counts[EXISTS]} already exist, "
+                                 f"{counts[DUPLICATE]} duplicates in file, {counts[INVALID]} invalid")
+                        st.dataframe(
+                            pd.DataFrame(result['report']).rename(columns={
+                                'row': "Row", 'customer_name': "Customer", 'action': "Action", 'detail': "Detail"
+                            }),
+                            hide_index=True,
+                            use_container_width=True
+                        )
+
     if edit_mode != st.session_state.edit_mode:
         st.session_state.edit_mode = edit_mode
         if not edit_mode:  # Just turned off - save changes
@@ -1,119 +1,143 @@
 import streamlit as st
-import mysql.connector
 import pandas as pd
+from LicenseStatus import license_status
 from mysql.connector import Error
+from Database import get_db_connection
+from QueryCache import cached_query
+from LicenseStats import get_customer_count, get_license_stats
 from datetime import datetime
 
 
-def get_db_connection():
-    try:
-        return mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="root",
-            database="Corporate IT Solutions"
-        )
-    except Error as e:
-        st.error(f"Database error: {e}")
-        return None
-
 
-def get_customer_products(customer_id=None):
-    """Retrieve products associated with customers"""
+PAGE_SIZE = 50
+
+CUSTOMER_PRODUCTS_SELECT = """
+                           SELECT c.customer_name,
+                                  p.product_name,
+                                  p.product_type,
+                                  l.quantity,
+                                  l.issue_date,
+                                  l.expiry_date,
+                                  l.license_id
+                           FROM licenses l
+                                    JOIN customers c ON l.customer_id = c.customer_id
+                                    JOIN products p ON l.product_id = p.product_id"""
+
+
+def build_filter_clause(filters):
+    """Turn the page filters into a WHERE fragment and its parameters.
+    filters may hold customer_id, product_id, product_type and status ('Active'/'Expired')."""
+    conditions = []
+    params = []
+    if filters.get('customer_id'):
+        conditions.append("l.customer_id = %s")
+        params.append(filters['customer_id'])
+    if filters.get('product_id'):
+        conditions.append("l.product_id = %s")
+        params.append(filters['product_id'])
+    if filters.get('product_type'):
+        conditions.append("p.product_type = %s")
+        params.append(filters['product_type'])
+    if filters.get('status') == "Active":
+        conditions.append("l.expiry_date >= CURDATE()")
+    elif filters.get('status') == "Expired":
+        conditions.append("l.expiry_date < CURDATE()")
+    return conditions, params
+
+
+def build_customer_products_query(filters, after=None, page_size=PAGE_SIZE):
+    """Build the SELECT for one page ordered by (expiry_date, license_id).
+    after is the (expiry_date, license_id) of the last row on the previous page."""
+    conditions, params = build_filter_clause(filters)
+
+    # Keyset pagination: continue strictly after the previous page's last row.
+    # MySQL sorts NULL expiry dates first, so a NULL cursor means "remaining
+    # NULL rows by id, then every dated row".
+    if after is not None:
+        last_expiry, last_id = after
+        if last_expiry is None:
+            conditions.append("(l.expiry_date IS NOT NULL OR l.license_id > %s)")
+            params.append(last_id)
+        else:
+            conditions.append("(l.expiry_date > %s OR (l.expiry_date = %s AND l.license_id > %s))")
+            params.extend([last_expiry, last_expiry, last_id])
+
+    query = CUSTOMER_PRODUCTS_SELECT
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY l.expiry_date ASC, l.license_id ASC LIMIT %s"
+    params.append(page_size + 1)  # one extra row tells us whether a next page exists
+    return query, tuple(params)
+
+
+def build_customer_products_count(filters):
+    conditions, params = build_filter_clause(filters)
+    query = """
+            SELECT COUNT(*)
+            FROM licenses l
+                     JOIN products p ON l.product_id = p.product_id"""
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query, tuple(params)
+
+
+def get_customer_products_page(filters, after=None, page_size=PAGE_SIZE):
+    """Get one page of customer products plus the total matching count.
+    Returns (rows, total, has_next)."""
     conn = get_db_connection()
     if conn:
         try:
-            query = """
-                    SELECT c.customer_name,
-                           p.product_name,
-                           p.product_type,
-                           l.quantity,
-                           l.issue_date,
-                           l.expiry_date,
-                           l.license_id
-                    FROM licenses l
-                             JOIN customers c ON l.customer_id = c.customer_id
-                             JOIN products p ON l.product_id = p.product_id \
-                    """
-            params = ()
-
-            if customer_id:
-                query += " WHERE c.customer_id = %s"
-                params = (customer_id,)
-
-            query += " ORDER BY l.expiry_date ASC"
-
             cursor = conn.cursor(dictionary=True)
+            query, params = build_customer_products_query(filters, after, page_size)
             cursor.execute(query, params)
-            return cursor.fetchall()
+            rows = cursor.fetchall()
+
+            count_query, count_params = build_customer_products_count(filters)
+            cursor = conn.cursor()
+            cursor.execute(count_query, count_params)
+            total = cursor.fetchone()[0]
+
+            return rows[:page_size], int(total), len(rows) > page_size
         except Error as e:
             st.error(f"Database error: {e}")
-            return []
+            return [], 0, False
         finally:
-            if conn.is_connected():
-                conn.close()
-    return []
+            conn.close()
+    return [], 0, False
 
 
-def get_all_customers():
-    """Retrieve all customers for dropdown"""
+@cached_query('products')
+def get_products_for_filter():
+    """Retrieve all products for the product and product type filters"""
     conn = get_db_connection()
     if conn:
         try:
             cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT customer_id, customer_name FROM customers ORDER BY customer_name")
+            cursor.execute("SELECT product_id, product_name, product_type FROM products ORDER BY product_name")
             return cursor.fetchall()
         except Error as e:
             st.error(f"Database error: {e}")
             return []
         finally:
-            if conn.is_connected():
-                conn.close()
+            conn.close()
     return []
 
-def get_customer_count():
-    """Get total number of customers"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM customers")
-            result = cursor.fetchone()
-            return result[0] if result else 0
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return 0
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return 0
-
 
-def get_license_stats():
-    """Get active and expired license counts"""
+@cached_query('customers')
+def get_all_customers():
+    """Retrieve all customers for dropdown"""
     conn = get_db_connection()
     if conn:
         try:
-            query = """
-                    SELECT 
-                        COALESCE(SUM(CASE WHEN expiry_date >= CURDATE() THEN 1 ELSE 0 END), 0) as active, \
-                        COALESCE(SUM(CASE WHEN expiry_date < CURDATE() THEN 1 ELSE 0 END), 0) as expired
-                    FROM licenses \
-                    """
             cursor = conn.cursor(dictionary=True)
-            cursor.execute(query)
-            result = cursor.fetchone()
-            return {
-                'active': result.get('active', 0) if result else 0,
-                'expired': result.get('expired', 0) if result else 0
-            }
+            cursor.execute("SELECT customer_id, customer_name FROM customers ORDER BY customer_name")
+            return cursor.fetchall()
         except Error as e:
             st.error(f"Database error: {e}")
-            return {'active': 0, 'expired': 0}
+            return []
         finally:
-            if conn.is_connected():
-                conn.close()
-    return {'active': 0, 'expired': 0}
+            conn.close()
+    return []
 
 
 def show_customer_product_view():
@@ -169,123 +193,138 @@ def show_customer_product_view():
     # ===== LICENSE STATUS VISUALIZATION =====
 
 
-    # Get all customers for dropdown
+    # Filter options come from the small customer/product tables, not from the licenses
     customers = get_all_customers()
-    customer_options = {f"{c['customer_id']} - {c['customer_name']}": c['customer_id'] for c in customers}
+    products = get_products_for_filter()
 
-    # Get product data
-    products = get_customer_products()
-
-    if not products:
+    if not customers or not products:
         st.info("No data uploaded - no customer products found in the database")
         return
 
-    if products:
-        # Convert to DataFrame
-        df = pd.DataFrame(products)
-
-        # Convert dates to datetime.date objects
-        df['issue_date'] = pd.to_datetime(df['issue_date']).dt.date
-        df['expiry_date'] = pd.to_datetime(df['expiry_date']).dt.date
-
-        # Get current date as date object
-        current_date = datetime.now().date()
+    customer_options = {c['customer_id']: c['customer_name'] for c in customers}
+    product_options = {p['product_id']: p['product_name'] for p in products}
+    type_options = sorted({p['product_type'] for p in products if p['product_type']})
+
+    # Add filtering options
+    st.subheader("Filters")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # Customer filter
+        selected_customer = st.selectbox(
+            "Filter by Customer",
+            options=[None] + list(customer_options.keys()),
+            format_func=lambda x: "All Customers" if x is None else customer_options[x],
+            key="customer_filter"
+        )
 
-        # Add status column
-        df['status'] = df['expiry_date'].apply(
-            lambda x: "Active" if x >= current_date else "Expired"
+        # Product name filter
+        selected_product = st.selectbox(
+            "Filter by Product Name",
+            options=[None] + list(product_options.keys()),
+            format_func=lambda x: "All Products" if x is None else product_options[x],
+            key="product_filter"
         )
 
-        # Add filtering options
-        st.subheader("Filters")
-        col1, col2 = st.columns(2)
+    with col2:
+        # Product type filter
+        selected_type = st.selectbox(
+            "Filter by Product Type",
+            options=["All Types"] + type_options,
+            key="type_filter"
+        )
 
-        with col1:
-            # Customer filter
-            all_customers = ["All Customers"] + sorted(df['customer_name'].unique().tolist())
-            selected_customer = st.selectbox(
-                "Filter by Customer",
-                options=all_customers,
-                key="customer_filter"
-            )
+        # Status filter
+        status_options = ["All Statuses", "Active", "Expired"]
+        selected_status = st.selectbox(
+            "Filter by Status",
+            options=status_options,
+            key="status_filter"
+        )
 
-            # Product name filter
-            all_products = ["All Products"] + sorted(df['product_name'].unique().tolist())
-            selected_product = st.selectbox(
-                "Filter by Product Name",
-                options=all_products,
-                key="product_filter"
-            )
+    filters = {
+        'customer_id': selected_customer,
+        'product_id': selected_product,
+        'product_type': None if selected_type == "All Types" else selected_type,
+        'status': None if selected_status == "All Statuses" else selected_status
+    }
 
-        with col2:
-            # Product type filter
-            all_types = ["All Types"] + sorted(df['product_type'].unique().tolist())
-            selected_type = st.selectbox(
-                "Filter by Product Type",
-                options=all_types,
-                key="type_filter"
-            )
+    # Page cursors: one (expiry_date, license_id) per page already passed.
+    # Changing any filter starts again from the first page.
+    if st.session_state.get('cpv_filters') != filters:
+        st.session_state.cpv_filters = filters
+        st.session_state.cpv_cursors = []
 
-            # Status filter
-            status_options = ["All Statuses", "Active", "Expired"]
-            selected_status = st.selectbox(
-                "Filter by Status",
-                options=status_options,
-                key="status_filter"
-            )
+    cursors = st.session_state.cpv_cursors
+    after = cursors[-1] if cursors else None
+    rows, total, has_next = get_customer_products_page(filters, after)
 
-        # Apply filters
-        filtered_df = df.copy()
-
-        if selected_customer != "All Customers":
-            filtered_df = filtered_df[filtered_df['customer_name'] == selected_customer]
-
-        if selected_product != "All Products":
-            filtered_df = filtered_df[filtered_df['product_name'] == selected_product]
-
-        if selected_type != "All Types":
-            filtered_df = filtered_df[filtered_df['product_type'] == selected_type]
-
-        if selected_status != "All Statuses":
-            filtered_df = filtered_df[filtered_df['status'] == selected_status]
-
-        # Display results
-        st.subheader("Customer Products")
-
-        # Reorder columns for display with new names
-        display_df = filtered_df[[
-            'customer_name',
-            'product_name',
-            'product_type',
-            'quantity',
-            'issue_date',
-            'expiry_date',
-            'status'
-        ]]
-
-        # Rename columns for display
-        display_df = display_df.rename(columns={
-            'customer_name': 'Customer',
-            'product_name': 'Product',
-            'product_type': 'Product Type',
-            'quantity': 'Quantity',
-            'issue_date': 'Issue Date',
-            'expiry_date': 'Expiry Date',
-            'status': 'Status'
-        })
-
-        st.dataframe(
-            display_df,
-            use_container_width=True,
-            hide_index=True,  # This removes the index column
-            column_config={
-                "Quantity": st.column_config.NumberColumn(format="%d"),
-                "Issue Date": st.column_config.DateColumn(),
-                "Expiry Date": st.column_config.DateColumn()
-            }
-        )
+    # Display results
+    st.subheader("Customer Products")
 
+    if not rows:
+        st.info("No customer products match the selected filters")
+        return
 
+    df = pd.DataFrame(rows)
+
+    # Convert dates to datetime.date objects
+    df['issue_date'] = pd.to_datetime(df['issue_date']).dt.date
+    df['expiry_date'] = pd.to_datetime(df['expiry_date']).dt.date
+
+    # Get current date as date object
+    current_date = datetime.now().date()
+
+    # Add status column
+    df['status'] = license_status(df['expiry_date'], current_date)
+
+    # Reorder columns for display with new names
+    display_df = df[[
+        'customer_name',
+        'product_name',
+        'product_type',
+        'quantity',
+        'issue_date',
+        'expiry_date',
+        'status'
+    ]]
+
+    # Rename columns for display
+    display_df = display_df.rename(columns={
+        'customer_name': 'Customer',
+        'product_name': 'Product',
+        'product_type': 'Product Type',
+        'quantity': 'Quantity',
+        'issue_date': 'Issue Date',
+        'expiry_date': 'Expiry Date',
+        'status': 'Status'
+    })
+
+    st.dataframe(
+        display_df,
+        use_container_width=True,
+        hide_index=True,  # This removes the index column
+        column_config={
+            "Quantity": st.column_config.NumberColumn(format="%d"),
+            "Issue Date": st.column_config.DateColumn(),
+            "Expiry Date": st.column_config.DateColumn()
+        }
+    )
+
+    # Pagination controls
+    first_row = len(cursors) * PAGE_SIZE + 1
+    col1, col2, col3 = st.columns([1, 4, 1])
+    with col1:
+        if st.button("⬅ Previous", disabled=not cursors, key="cpv_prev"):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Showing {first_row}-{first_row + len(rows) - 1} of {total} licenses")
+    with col3:
+        if st.button("Next ➡", disabled=not has_next, key="cpv_next"):
+            last = rows[-1]
+            cursors.append((last['expiry_date'], last['license_id']))
+            st.rerun()
 
 
 if __name__ == "__main__":
@@ -1,130 +1,122 @@
 # Dashboard.py
-import mysql
+import time
+from datetime import datetime
+
 import streamlit as st
 import pandas as pd
-from datetime import datetime
 from mysql.connector import Error
-import smtplib
-import plotly.express as px
-import pandas as pd
+from Database import get_db_connection, get_table_versions
+from ExpiryTracker import ensure_current, get_tracked_licenses
+from LicenseStats import get_product_type_counts
+from LicenseStatus import format_days_remaining
 
-def get_db_connection():
-    try:
-        return mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="root",
-            database="Corporate IT Solutions"
-        )
-    except Error as e:
-        st.error(f"Database error: {e}")
-        return None
 
-def get_customer_count():
-    """Get total number of customers"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COALESCE(COUNT(*), 0) FROM customers")
-            count = cursor.fetchone()[0]
-            return int(count) if count is not None else 0
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return 0
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return 0
+def get_expiring_licenses():
+    """Get licenses that are expired or expiring soon"""
+    return get_tracked_licenses(EXPIRING_SOON_DAYS)
 
 
-def get_license_stats():
-    """Get active and expired license counts"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT 
-                    COALESCE(SUM(CASE WHEN expiry_date >= CURDATE() THEN 1 ELSE 0 END), 0) as active,
-                    COALESCE(SUM(CASE WHEN expiry_date < CURDATE() THEN 1 ELSE 0 END), 0) as expired
-                FROM licenses
-            """)
-            result = cursor.fetchone()
-            return {
-                'active': int(result['active']) if result['active'] is not None else 0,
-                'expired': int(result['expired']) if result['expired'] is not None else 0
-            }
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return {'active': 0, 'expired': 0}
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return {'active': 0, 'expired': 0}
+# --- DASHBOARD SUMMARY ---
+EXPIRING_SOON_DAYS = 21
+SUMMARY_CACHE_TTL = 30  # seconds
+SUMMARY_TABLES = ('customers', 'products', 'licenses')
 
+_summary_cache = {'key': None, 'expires_at': 0.0, 'value': None}
 
-# Add this to Dashboard.py after the existing metrics section
 
-def get_expiring_licenses():
-    """Get licenses that are expired or expiring soon"""
+def empty_dashboard_summary():
+    return {
+        'customer_count': 0,
+        'product_count': 0,
+        'active': 0,
+        'expired': 0,
+        'expired_licenses': [],
+        'expiring_soon': []
+    }
+
+
+def fetch_dashboard_summary(days_threshold=EXPIRING_SOON_DAYS):
+    """Get all dashboard figures and renewal lists in a single query"""
+    ensure_current()
     conn = get_db_connection()
     if conn:
         try:
             cursor = conn.cursor(dictionary=True)
-
-            # Get already expired licenses
+            # The one-row totals are joined onto the renewal rows so everything
+            # comes back in one round trip; ON TRUE keeps the totals when no
+            # license is due.
             cursor.execute("""
-                           SELECT l.license_id,
-                                  c.customer_name,
-                                  p.product_name,
-                                  l.quantity,
-                                  l.expiry_date,
-                                  DATEDIFF(l.expiry_date, CURDATE()) as days_remaining
-                           FROM licenses l
-                                    JOIN customers c ON l.customer_id = c.customer_id
-                                    JOIN products p ON l.product_id = p.product_id
-                           WHERE l.expiry_date < CURDATE()
-                           ORDER BY l.expiry_date ASC
-                           """)
-            expired = cursor.fetchall()
-
-            # Get licenses expiring within 21 days (3 weeks)
-            cursor.execute("""
-                           SELECT l.license_id,
-                                  c.customer_name,
-                                  p.product_name,
-                                  l.quantity,
-                                  l.expiry_date,
-                                  DATEDIFF(l.expiry_date, CURDATE()) as days_remaining
-                           FROM licenses l
-                                    JOIN customers c ON l.customer_id = c.customer_id
-                                    JOIN products p ON l.product_id = p.product_id
-                           WHERE l.expiry_date >= CURDATE()
-                             AND l.expiry_date <= DATE_ADD(CURDATE(), INTERVAL 21 DAY)
-                           ORDER BY l.expiry_date ASC
-                           """)
-            expiring_soon = cursor.fetchall()
-
-            return {
-                'expired': expired,
-                'expiring_soon': expiring_soon
-            }
-
+                           SELECT s.customer_count,
+                                  s.product_count,
+                                  s.active,
+                                  s.expired,
+                                  x.license_id,
+                                  x.customer_name,
+                                  x.product_name,
+                                  x.quantity,
+                                  x.expiry_date,
+                                  x.days_remaining
+                           FROM (SELECT (SELECT COUNT(*) FROM customers) as customer_count,
+                                        (SELECT COUNT(*) FROM products) as product_count,
+                                        COALESCE(SUM(CASE WHEN expiry_date >= CURDATE() THEN license_count ELSE 0 END), 0) as active,
+                                        COALESCE(SUM(CASE WHEN expiry_date < CURDATE() THEN license_count ELSE 0 END), 0) as expired
+                                 FROM license_summary) s
+                                    LEFT JOIN (SELECT l.license_id,
+                                                      c.customer_name,
+                                                      p.product_name,
+                                                      l.quantity,
+                                                      l.expiry_date,
+                                                      DATEDIFF(l.expiry_date, CURDATE()) as days_remaining
+                                               FROM license_expiry_status es
+                                                        JOIN licenses l ON es.license_id = l.license_id
+                                                        JOIN customers c ON l.customer_id = c.customer_id
+                                                        JOIN products p ON l.product_id = p.product_id
+                                               WHERE es.expiry_date <= DATE_ADD(CURDATE(), INTERVAL %s DAY)) x ON TRUE
+                           ORDER BY x.expiry_date ASC
+                           """, (days_threshold,))
+            rows = cursor.fetchall()
         except Error as e:
             st.error(f"Database error: {e}")
-            return {'expired': [], 'expiring_soon': []}
+            return empty_dashboard_summary()
         finally:
-            if conn.is_connected():
-                conn.close()
-    return {'expired': [], 'expiring_soon': []}
-
-
-def show_license_renewal_section():
+            conn.close()
+
+        summary = empty_dashboard_summary()
+        if rows:
+            summary['customer_count'] = int(rows[0]['customer_count'] or 0)
+            summary['product_count'] = int(rows[0]['product_count'] or 0)
+            summary['active'] = int(rows[0]['active'] or 0)
+            summary['expired'] = int(rows[0]['expired'] or 0)
+        license_columns = ('license_id', 'customer_name', 'product_name', 'quantity', 'expiry_date', 'days_remaining')
+        for row in rows:
+            if row['license_id'] is None:
+                continue
+            license_row = {column: row[column] for column in license_columns}
+            if row['days_remaining'] < 0:
+                summary['expired_licenses'].append(license_row)
+            else:
+                summary['expiring_soon'].append(license_row)
+        return summary
+    return empty_dashboard_summary()
+
+
+def get_dashboard_summary():
+    """Cached dashboard summary, refreshed after SUMMARY_CACHE_TTL or any customer/product/license write"""
+    key = get_table_versions(*SUMMARY_TABLES)
+    now = time.monotonic()
+    if _summary_cache['key'] == key and now < _summary_cache['expires_at']:
+        return _summary_cache['value']
+
+    summary = fetch_dashboard_summary()
+    _summary_cache.update(key=key, expires_at=now + SUMMARY_CACHE_TTL, value=summary)
+    return summary
+
+
+def show_license_renewal_section(summary):
     """Display tables for expired and soon-to-expire licenses"""
     st.subheader("License Renewal Status")
 
-    licenses = get_expiring_licenses()
+    licenses = {'expired': summary['expired_licenses'], 'expiring_soon': summary['expiring_soon']}
 
     # Add this check:
     if not licenses['expired'] and not licenses['expiring_soon']:
@@ -138,7 +130,7 @@ def show_license_renewal_section():
             expired_df = pd.DataFrame(licenses['expired'])
             # Remove license_id column
             expired_df = expired_df.drop(columns=['license_id'])
-            expired_df['days_remaining'] = expired_df['days_remaining'].apply(lambda x: f"Expired {abs(x)} days ago")
+            expired_df['days_remaining'] = format_days_remaining(expired_df['days_remaining'])
 
             st.dataframe(
                 expired_df,
@@ -161,9 +153,7 @@ def show_license_renewal_section():
             expiring_df = pd.DataFrame(licenses['expiring_soon'])
             # Remove license_id column
             expiring_df = expiring_df.drop(columns=['license_id'])
-            expiring_df['days_remaining'] = expiring_df['days_remaining'].apply(
-                lambda x: f"Expires in {x} days" if x > 0 else "Expires today"
-            )
+            expiring_df['days_remaining'] = format_days_remaining(expiring_df['days_remaining'])
 
             st.dataframe(
                 expiring_df,
@@ -181,17 +171,13 @@ def show_license_renewal_section():
             st.success("No licenses expiring in the next 3 weeks!")
 
 
-def show_pie_charts():
+def show_pie_charts(summary):
     """Display two pie charts showing actual counts"""
-    # Get license stats
-    license_stats = get_license_stats()
-
-    # Get product count
-    products = get_all_products()
-    product_count = len(products) if products else 0
+    import plotly.express as px
 
-    # Get customer count
-    customer_count = get_customer_count()
+    license_stats = {'active': summary['active'], 'expired': summary['expired']}
+    product_count = summary['product_count']
+    customer_count = summary['customer_count']
 
     # Only show the chart if we have some data
     if customer_count > 0 or product_count > 0 or license_stats['active'] > 0 or license_stats['expired'] > 0:
@@ -217,44 +203,30 @@ def show_pie_charts():
         )
         fig1.update_layout(showlegend=False)
         st.plotly_chart(fig1, use_container_width=True)
+
+        # Licenses by Product Type Pie Chart
+        type_counts = get_product_type_counts()
+        if type_counts:
+            fig2 = px.pie(
+                names=list(type_counts.keys()),
+                values=[counts['total'] for counts in type_counts.values()],
+                color_discrete_sequence=px.colors.qualitative.Pastel
+            )
+            fig2.update_traces(
+                texttemplate='%{label}<br>%{value}',
+                textposition='inside',
+                hoverinfo='label+value',
+                hole=0.3,
+                textfont_size=16
+            )
+            fig2.update_layout(showlegend=False)
+            st.plotly_chart(fig2, use_container_width=True)
     else:
         st.info("No data available for visualization")
 
 
 
 
-# Add these helper functions if not already present
-def get_all_products():
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT product_id FROM products")
-            return cursor.fetchall()
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return []
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return []
-
-
-def get_all_licenses():
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT license_id FROM licenses")
-            return cursor.fetchall()
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return []
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return []
-
 def show_dashboard():
     st.set_page_config(page_title="Dashboard", layout="wide")
 
@@ -264,9 +236,10 @@ def show_dashboard():
 
     st.title("Corporate IT Solutions Dashboard")
 
-    # Get data
-    total_customers = get_customer_count()  # This now returns an int
-    license_stats = get_license_stats()  # This now returns dict with int values
+    # Get data - one cached query covers the metrics, renewal tables and chart
+    summary = get_dashboard_summary()
+    total_customers = summary['customer_count']
+    license_stats = {'active': summary['active'], 'expired': summary['expired']}
 
     with st.expander("📊 License Metrics", expanded=True):
         col1, col2, col3 = st.columns(3)
@@ -302,14 +275,13 @@ def show_dashboard():
     col1, col2 = st.columns([6,2])
 
     with col1:
-        licenses = get_expiring_licenses()
-        if not licenses['expired'] and not licenses['expiring_soon']:
+        if not summary['expired_licenses'] and not summary['expiring_soon']:
             st.info("No data uploaded - no license renewal information available")
         else:
-            show_license_renewal_section()
+            show_license_renewal_section(summary)
 
     with col2:
-        show_pie_charts()
+        show_pie_charts(summary)
 
 
 
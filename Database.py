@@ -0,0 +1,286 @@
+# Database.py
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+import mysql.connector
+from mysql.connector import Error
+
+
+# --- DB SETTINGS ---
+# Defaults can be overridden with a [database] section in .streamlit/secrets.toml
+DEFAULT_DB_SETTINGS = {
+    'host': "localhost",
+    'user': "root",
+    'password': "root",
+    'database': "Corporate IT Solutions",
+    'pool_size': 10,
+    'checkout_timeout': 10,        # seconds to wait for a free connection
+    'idle_timeout': 300,           # seconds before an idle connection is closed
+    'health_check_interval': 30,   # ping connections idle for longer than this
+    'debug_leaks': False,          # warn about connections a page run leaves checked out
+}
+
+CONNECT_KEYS = ('host', 'port', 'user', 'password', 'database')
+
+
+class PoolTimeoutError(Error):
+    """Raised when no pooled connection becomes free within the checkout timeout"""
+
+
+def load_db_settings():
+    """Merge the [database] secrets section over the defaults"""
+    settings = dict(DEFAULT_DB_SETTINGS)
+    try:
+        settings.update(st.secrets["database"])
+    except Exception:
+        pass
+    return settings
+
+
+class PooledConnection:
+    """Proxy around a raw connection; close() hands it back to the pool"""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        pool._track_checkout(self)
+
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._untrack_checkout(self)
+            self._pool.release(raw)
+
+    def is_connected(self):
+        return self._raw is not None and self._raw.is_connected()
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise Error("Connection has already been returned to the pool")
+        return getattr(self._raw, name)
+
+    def __del__(self):
+        # Safety net for callers that forget close(): the raw connection is
+        # parked and reclaimed on the next checkout instead of being lost.
+        raw = getattr(self, '_raw', None)
+        if raw is not None:
+            self._pool._untrack_checkout(self, leaked=True)
+            self._pool._orphans.append(raw)
+
+
+class ConnectionPool:
+    """Thread-safe, process-wide pool of MySQL connections"""
+
+    def __init__(self, connect_args, pool_size=10, checkout_timeout=10,
+                 idle_timeout=300, health_check_interval=30, debug_leaks=False):
+        self.connect_args = connect_args
+        self.pool_size = int(pool_size)
+        self.checkout_timeout = float(checkout_timeout)
+        self.idle_timeout = float(idle_timeout)
+        self.health_check_interval = float(health_check_interval)
+        self.debug_leaks = bool(debug_leaks)
+
+        self._idle = deque()  # (raw connection, last used), oldest on the left
+        self._orphans = deque()
+        self._in_use = 0
+        self._checkouts = 0
+        self._leaked = 0
+        self._open_checkouts = {}  # id(proxy) -> (thread id, stack) while debug_leaks is on
+        self._cond = threading.Condition()
+
+    def checkout(self):
+        """Borrow a connection, waiting up to checkout_timeout for a free slot"""
+        self._reclaim_orphans()
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._cond:
+            while True:
+                stale = self._reap_idle_locked()
+                if self._idle:
+                    raw, last_used = self._idle.pop()
+                    break
+                if self._in_use + len(self._idle) < self.pool_size:
+                    raw, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        msg=f"No database connection available after {self.checkout_timeout:.0f}s"
+                    )
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        self._close_quietly(stale)
+        try:
+            if raw is None:
+                raw = mysql.connector.connect(**self.connect_args)
+            elif time.monotonic() - last_used > self.health_check_interval and not raw.is_connected():
+                self._close_quietly([raw])
+                raw = mysql.connector.connect(**self.connect_args)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, raw)
+
+    def release(self, raw):
+        """Return a raw connection, discarding it if it is no longer usable"""
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+            healthy = raw.is_connected()
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append((raw, time.monotonic()))
+            self._cond.notify()
+        if not healthy:
+            self._close_quietly([raw])
+
+    def stats(self):
+        with self._cond:
+            return {
+                'pool_size': self.pool_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'open': self._in_use + len(self._idle),  # live MySQL connections
+                'checkouts': self._checkouts,
+                'leaked': self._leaked,  # garbage-collected without close()
+            }
+
+    def _track_checkout(self, proxy):
+        with self._cond:
+            self._checkouts += 1
+            if self.debug_leaks:
+                stack = "".join(traceback.format_stack(limit=10)[:-3])
+                self._open_checkouts[id(proxy)] = (threading.get_ident(), stack)
+
+    def _untrack_checkout(self, proxy, leaked=False):
+        with self._cond:
+            self._open_checkouts.pop(id(proxy), None)
+            if leaked:
+                self._leaked += 1
+
+    def open_checkouts(self, thread_id=None):
+        """{key: stack} of connections still checked out (debug_leaks only),
+        optionally limited to those taken by one thread"""
+        with self._cond:
+            return {key: stack for key, (owner, stack) in self._open_checkouts.items()
+                    if thread_id is None or owner == thread_id}
+
+    def close_all(self):
+        with self._cond:
+            idle = [raw for raw, _ in self._idle]
+            self._idle.clear()
+        self._close_quietly(idle)
+
+    def _reclaim_orphans(self):
+        while self._orphans:
+            try:
+                raw = self._orphans.popleft()
+            except IndexError:
+                break
+            self.release(raw)
+
+    def _reap_idle_locked(self):
+        stale = []
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._idle and self._idle[0][1] < cutoff:
+            stale.append(self._idle.popleft()[0])
+        return stale
+
+    @staticmethod
+    def _close_quietly(connections):
+        for raw in connections:
+            try:
+                raw.close()
+            except Exception:
+                pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                settings = load_db_settings()
+                _pool = ConnectionPool(
+                    {key: settings[key] for key in CONNECT_KEYS if key in settings},
+                    pool_size=settings['pool_size'],
+                    checkout_timeout=settings['checkout_timeout'],
+                    idle_timeout=settings['idle_timeout'],
+                    health_check_interval=settings['health_check_interval'],
+                    debug_leaks=settings['debug_leaks'],
+                )
+    return _pool
+
+
+# --- DB CONNECTION ---
+def get_db_connection():
+    try:
+        return get_pool().checkout()
+    except Error as e:
+        st.error(f"Database error: {e}")
+        return None
+
+
+@contextmanager
+def db_connection():
+    """Connection scoped to a with block and returned to the pool on exit.
+    Yields None when no connection is available (the error is already shown)."""
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+@contextmanager
+def leak_check():
+    """With debug_leaks on, warn about connections checked out inside the
+    block (e.g. one page run) and not returned by the end of it"""
+    pool = get_pool()
+    if not pool.debug_leaks:
+        yield
+        return
+    thread_id = threading.get_ident()
+    before = set(pool.open_checkouts(thread_id))
+    try:
+        yield
+    finally:
+        for key, stack in pool.open_checkouts(thread_id).items():
+            if key not in before:
+                st.warning(f"Database connection was not returned to the pool. Checked out at:\n\n```\n{stack}```")
+
+
+# --- WRITE TRACKING ---
+# Each table has a version counter that write paths bump after committing,
+# so cached reads can tell when their underlying data has changed.
+_table_versions = {}
+_table_versions_lock = threading.Lock()
+
+
+def invalidate_tables(*tables):
+    """Bump the version of each table after a committed write"""
+    with _table_versions_lock:
+        for table in tables:
+            _table_versions[table] = _table_versions.get(table, 0) + 1
+
+
+def get_table_versions(*tables):
+    """Current version tuple for the given tables"""
+    with _table_versions_lock:
+        return tuple(_table_versions.get(table, 0) for table in tables)
@@ -0,0 +1,358 @@
+# EmailOutbox.py
+#
+# Persistent outgoing-mail queue. Pages enqueue messages into email_outbox and
+# return immediately; a background worker claims queued rows in batches,
+# delivers them over a few reusable SMTP sessions and retries failures with
+# exponential backoff. Point [smtp] at a local stand-in (e.g.
+# `python -m aiosmtpd -n -l localhost:8025` with use_tls = false and an empty
+# username) to exercise it without a real mail server.
+import smtplib
+import sys
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from mysql.connector import Error
+from Database import get_db_connection
+
+
+# --- OUTBOX SETTINGS ---
+# Defaults can be overridden with an [outbox] section in .streamlit/secrets.toml
+DEFAULT_OUTBOX_SETTINGS = {
+    'concurrency': 4,       # parallel SMTP sessions per batch
+    'batch_size': 50,       # messages claimed per batch
+    'max_attempts': 5,      # deliveries tried before a message is marked failed
+    'backoff_seconds': 30,  # first retry delay, doubled on each further attempt
+    'poll_interval': 5,     # seconds between checks for due messages when idle
+    'claim_timeout': 600,   # 'sending' rows older than this are assumed abandoned
+}
+
+
+def load_outbox_settings():
+    """Merge the [outbox] secrets section over the defaults"""
+    settings = dict(DEFAULT_OUTBOX_SETTINGS)
+    try:
+        settings.update(st.secrets["outbox"])
+    except Exception:
+        pass
+    return settings
+
+
+def load_smtp_config():
+    """SMTP configuration from Streamlit secrets"""
+    return {
+        'sender_email': st.secrets.smtp.sender_email,
+        'smtp_server': st.secrets.smtp.server,
+        'smtp_port': st.secrets.smtp.port,
+        'smtp_username': st.secrets.smtp.get('username'),
+        'smtp_password': st.secrets.smtp.get('password'),
+        'use_tls': st.secrets.smtp.get('use_tls', True)
+    }
+
+
+# --- Enqueueing ---
+def insert_messages(cursor, messages, batch_id=None):
+    """Queue messages on the caller's cursor, so they commit (or roll back) with
+    the caller's other writes. Returns the batch id; wake the worker after committing."""
+    batch_id = batch_id or str(uuid.uuid4())
+    insert = """
+             INSERT INTO email_outbox
+                 (batch_id, recipient, subject, body, license_id, notification_type)
+             VALUES (%s, %s, %s, %s, %s, %s)
+             """
+
+    def row(m):
+        return (batch_id, m['recipient'], m['subject'], m['body'], m.get('license_id'), m.get('notification_type'))
+
+    plain = [row(m) for m in messages if not m.get('licenses')]
+    if plain:
+        cursor.executemany(insert, plain)
+
+    links = []
+    for m in messages:
+        if m.get('licenses'):
+            # The links need each message's id, so these rows go one at a time
+            cursor.execute(insert, row(m))
+            links.extend((cursor.lastrowid, license_id, notification_type)
+                         for license_id, notification_type in m['licenses'])
+    if links:
+        cursor.executemany("""
+                           INSERT INTO email_outbox_licenses (outbox_id, license_id, notification_type)
+                           VALUES (%s, %s, %s)
+                           """, links)
+    return batch_id
+
+
+def enqueue_emails(messages, batch_id=None):
+    """Queue messages for delivery and return the batch id.
+    Each message is a dict with recipient, subject and body, and optionally
+    notification_type and licenses, the [(license_id, notification_type)] it announces."""
+    if not messages:
+        return None
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor()
+            batch_id = insert_messages(cursor, messages, batch_id)
+            conn.commit()
+        except Error as e:
+            st.error(f"Error queueing emails: {e}")
+            return None
+        finally:
+            conn.close()
+        ensure_worker().wake()
+        return batch_id
+    return None
+
+
+def get_batch_progress(batch_id):
+    """Message counts for a batch by status, plus the total"""
+    progress = {'queued': 0, 'sending': 0, 'sent': 0, 'failed': 0, 'total': 0}
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                           SELECT status, COUNT(*)
+                           FROM email_outbox
+                           WHERE batch_id = %s
+                           GROUP BY status
+                           """, (batch_id,))
+            for status, count in cursor.fetchall():
+                progress[status] = int(count)
+                progress['total'] += int(count)
+        except Error as e:
+            st.error(f"Database error: {e}")
+        finally:
+            conn.close()
+    return progress
+
+
+# --- Delivery ---
+class SmtpSession:
+    """One SMTP connection reused for many messages, reconnecting if the server drops it"""
+
+    def __init__(self, config):
+        self.config = config
+        self.server = None
+
+    def _connect(self):
+        self.server = smtplib.SMTP(self.config['smtp_server'], self.config['smtp_port'], timeout=30)
+        self.server.ehlo()
+        if self.config['use_tls']:
+            self.server.starttls()
+            self.server.ehlo()
+        if self.config['smtp_username']:
+            self.server.login(self.config['smtp_username'], self.config['smtp_password'])
+
+    def send(self, recipient, subject, body):
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
+        msg = MIMEMultipart()
+        msg['From'] = self.config['sender_email']
+        msg['To'] = recipient
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'html', 'utf-8'))
+
+        if self.server is None:
+            self._connect()
+        try:
+            self.server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self._connect()
+            self.server.send_message(msg)
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
+
+def deliver_messages(messages, config):
+    """Send messages over one SMTP session; returns [(outbox_id, error or None)]"""
+    session = SmtpSession(config)
+    results = []
+    try:
+        for message in messages:
+            try:
+                session.send(message['recipient'], message['subject'], message['body'])
+                results.append((message['outbox_id'], None))
+            except Exception as e:
+                results.append((message['outbox_id'], str(e) or e.__class__.__name__))
+                if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                    session.close()  # start the next message on a fresh connection
+    finally:
+        session.close()
+    return results
+
+
+class OutboxWorker:
+    """Background thread that drains email_outbox"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or load_outbox_settings()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            try:
+                if self.process_batch():
+                    continue  # more may be waiting
+            except Exception:
+                # Database or configuration trouble; try again after the poll interval
+                print("Email outbox batch failed:", file=sys.stderr)
+                traceback.print_exc()
+            self._wake.wait(self.settings['poll_interval'])
+            self._wake.clear()
+
+    def claim_batch(self):
+        """Mark up to batch_size due messages as 'sending' and return them"""
+        conn = get_db_connection()
+        if not conn:
+            return []
+        try:
+            cursor = conn.cursor(dictionary=True)
+            # Requeue rows a crashed or hung worker left half-sent. That counts
+            # as an attempt, so a message that keeps killing the worker ends up
+            # 'failed' instead of being reclaimed forever. MySQL assigns left to
+            # right: status and last_error see the incremented attempts.
+            cursor.execute("""
+                           UPDATE email_outbox
+                           SET attempts   = attempts + 1,
+                               last_error = IF(attempts >= %s, 'Abandoned while sending', last_error),
+                               status     = IF(attempts >= %s, 'failed', 'queued')
+                           WHERE status = 'sending'
+                             AND claimed_at < NOW() - INTERVAL %s SECOND
+                           """, (self.settings['max_attempts'], self.settings['max_attempts'],
+                                 self.settings['claim_timeout']))
+            cursor.execute("""
+                           SELECT outbox_id, recipient, subject, body, notification_type, attempts
+                           FROM email_outbox
+                           WHERE status = 'queued'
+                             AND next_attempt_at <= NOW()
+                           ORDER BY outbox_id
+                           LIMIT %s
+                           FOR UPDATE SKIP LOCKED
+                           """, (self.settings['batch_size'],))
+            messages = cursor.fetchall()
+            if messages:
+                ids = [m['outbox_id'] for m in messages]
+                placeholders = ", ".join(["%s"] * len(ids))
+                cursor.execute(f"""
+                               UPDATE email_outbox
+                               SET status = 'sending', claimed_at = NOW()
+                               WHERE outbox_id IN ({placeholders})
+                               """, ids)
+            conn.commit()
+            return messages
+        finally:
+            conn.close()
+
+    def process_batch(self):
+        """Claim, deliver and record one batch; returns True if anything was claimed"""
+        config = load_smtp_config()
+        messages = self.claim_batch()
+        if not messages:
+            return False
+
+        concurrency = max(1, min(int(self.settings['concurrency']), len(messages)))
+        chunks = [messages[i::concurrency] for i in range(concurrency)]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = [r for chunk_results in pool.map(lambda c: deliver_messages(c, config), chunks)
+                       for r in chunk_results]
+
+        self.record_results(messages, dict(results))
+        return True
+
+    def record_results(self, messages, errors):
+        """Store delivery outcomes; failures are retried with exponential backoff.
+        Messages that reached a final outcome are logged to renewal_notifications,
+        one row per license they announced, in the same transaction."""
+        sent, retry, failed, finished = [], [], [], []
+        for message in messages:
+            error = errors.get(message['outbox_id'])
+            if error is None:
+                sent.append((message['outbox_id'],))
+            elif message['attempts'] + 1 >= self.settings['max_attempts']:
+                failed.append((error, message['outbox_id']))
+            else:
+                delay = self.settings['backoff_seconds'] * (2 ** message['attempts'])
+                retry.append((error, delay, message['outbox_id']))
+                continue
+            finished.append(message['outbox_id'])
+
+        conn = get_db_connection()
+        if not conn:
+            return
+        try:
+            cursor = conn.cursor()
+            if sent:
+                cursor.executemany("""
+                                   UPDATE email_outbox
+                                   SET status = 'sent', sent_at = NOW(), attempts = attempts + 1
+                                   WHERE outbox_id = %s
+                                   """, sent)
+            if retry:
+                cursor.executemany("""
+                                   UPDATE email_outbox
+                                   SET status = 'queued', attempts = attempts + 1, last_error = %s,
+                                       next_attempt_at = NOW() + INTERVAL %s SECOND
+                                   WHERE outbox_id = %s
+                                   """, retry)
+            if failed:
+                cursor.executemany("""
+                                   UPDATE email_outbox
+                                   SET status = 'failed', attempts = attempts + 1, last_error = %s
+                                   WHERE outbox_id = %s
+                                   """, failed)
+            if finished:
+                # One statement logs the whole batch, whatever its size
+                placeholders = ", ".join(["%s"] * len(finished))
+                cursor.execute(f"""
+                               INSERT INTO renewal_notifications
+                               (license_id, customer_id, product_id, notification_date,
+                                notification_type, status, error_message, outbox_id)
+                               SELECT l.license_id,
+                                      l.customer_id,
+                                      l.product_id,
+                                      NOW(),
+                                      ol.notification_type,
+                                      o.status,
+                                      o.last_error,
+                                      o.outbox_id
+                               FROM email_outbox o
+                                        JOIN email_outbox_licenses ol ON ol.outbox_id = o.outbox_id
+                                        JOIN licenses l ON ol.license_id = l.license_id
+                               WHERE o.outbox_id IN ({placeholders})
+                               """, finished)
+            conn.commit()
+        finally:
+            conn.close()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def ensure_worker():
+    """Start the process-wide outbox worker if it is not running yet"""
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = OutboxWorker().start()
+    return _worker
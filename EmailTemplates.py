@@ -0,0 +1,217 @@
+# EmailTemplates.py
+#
+# HTML emails built from string.Template templates compiled once at import.
+# Every substituted value is HTML-escaped unless it is a fragment rendered by
+# another template here. Renewal reminders are grouped per recipient, so a
+# customer with several expiring licenses gets one message listing them all.
+import html
+from string import Template
+
+from LicenseStatus import format_days_remaining
+
+
+CELL_STYLE = 'style="border: 1px solid #ddd; padding: 8px; text-align: left;"'
+HEADER_ROW_STYLE = 'style="background-color: #f2f2f2;"'
+
+
+class SafeHtml(str):
+    """Markup that render() inserts as it is (a fragment from another template)"""
+
+
+def compile_template(text):
+    """Template with the shared table styles filled in"""
+    return Template(Template(text).safe_substitute(cell=CELL_STYLE, header_row=HEADER_ROW_STYLE))
+
+
+def render(template, **values):
+    """Substitute values into a compiled template, escaping everything but SafeHtml"""
+    return SafeHtml(template.substitute({
+        name: value if isinstance(value, SafeHtml) else html.escape("" if value is None else str(value))
+        for name, value in values.items()
+    }))
+
+
+def render_rows(template, rows):
+    return SafeHtml("".join(render(template, **row) for row in rows))
+
+
+# --- Renewal reminders ---
+RENEWAL_TEMPLATE = compile_template("""
+    <html>
+    <body>
+        <p>Dear $customer_name,</p>
+
+        $licenses
+
+        <p>Please $action to avoid any disruption to your service. This requires your $urgency.</p>
+
+        <p>To proceed with the renewal, please contact our support team or reply to this email.</p>
+        $note
+        <p>Best regards,<br>
+        Corporate IT Solutions Team</p>
+    </body>
+    </html>
+""")
+
+SINGLE_LICENSE_TEMPLATE = compile_template("""
+        <p>This is a reminder that your license for <strong>$product_name</strong>
+        (Quantity: $quantity) is $days_text (Expiry Date: $expiry_date).</p>
+""")
+
+LICENSE_TABLE_TEMPLATE = compile_template("""
+        <p>This is a reminder that the following $count licenses need renewal:</p>
+
+        <table style="border-collapse: collapse; width: 100%;">
+            <tr $header_row>
+                <th $cell>Product</th>
+                <th $cell>Quantity</th>
+                <th $cell>Expiry Date</th>
+                <th $cell>Status</th>
+            </tr>
+            $rows
+        </table>
+""")
+
+LICENSE_ROW_TEMPLATE = compile_template("""
+            <tr>
+                <td $cell>$product_name</td>
+                <td $cell>$quantity</td>
+                <td $cell>$expiry_date</td>
+                <td $cell>$status</td>
+            </tr>""")
+
+NOTE_TEMPLATE = compile_template("""
+        <p><strong>Additional Note:</strong> $note</p>
+""")
+
+
+def _days_text(days_remaining):
+    days = int(days_remaining)
+    if days < 0:
+        return f"expired {abs(days)} days ago"
+    return f"expiring in {days} days"
+
+
+def render_renewal_reminder(licenses, custom_message=None):
+    """(subject, HTML body) reminding one customer about one or more licenses.
+    licenses are license records with customer_name, product_name, quantity,
+    expiry_date and days_remaining."""
+    expired = any(int(data['days_remaining']) < 0 for data in licenses)
+    what = licenses[0]['product_name'] if len(licenses) == 1 else f"{len(licenses)} Licenses"
+    if expired:
+        subject = f"URGENT: License Renewal Required for {what}"
+    else:
+        subject = f"Upcoming License Renewal for {what}"
+
+    if len(licenses) == 1:
+        data = licenses[0]
+        license_html = render(
+            SINGLE_LICENSE_TEMPLATE,
+            product_name=data['product_name'],
+            quantity=data['quantity'],
+            days_text=_days_text(data['days_remaining']),
+            expiry_date=data['expiry_date'].strftime('%Y-%m-%d')
+        )
+    else:
+        statuses = format_days_remaining([int(data['days_remaining']) for data in licenses]).astype(str)
+        license_html = render(LICENSE_TABLE_TEMPLATE, count=len(licenses), rows=render_rows(LICENSE_ROW_TEMPLATE, [
+            {
+                'product_name': data['product_name'],
+                'quantity': data['quantity'],
+                'expiry_date': data['expiry_date'].strftime('%Y-%m-%d'),
+                'status': status,
+            }
+            for data, status in zip(licenses, statuses)
+        ]))
+
+    body = render(
+        RENEWAL_TEMPLATE,
+        customer_name=licenses[0]['customer_name'],
+        licenses=license_html,
+        action="renew immediately" if expired else "renew",
+        urgency="immediate attention" if expired else "attention",
+        note=render(NOTE_TEMPLATE, note=custom_message) if custom_message else SafeHtml("")
+    )
+    return subject, body
+
+
+def build_renewal_messages(reminders, custom_message=None):
+    """Outbox messages for [(license record, notification_type)], one per
+    recipient covering all of that recipient's licenses"""
+    by_recipient = {}
+    for data, notification_type in reminders:
+        by_recipient.setdefault((data['email'], data['customer_name']), []).append((data, notification_type))
+
+    messages = []
+    for (email, _), group in by_recipient.items():
+        subject, body = render_renewal_reminder([data for data, _ in group], custom_message)
+        types = [notification_type for _, notification_type in group]
+        messages.append({
+            'recipient': email,
+            'subject': subject,
+            'body': body,
+            # The most urgent stage in the message; each license keeps its own in 'licenses'
+            'notification_type': min(types, key=lambda t: 0 if t == "expired" else 1),
+            'licenses': [(data['license_id'], notification_type) for data, notification_type in group],
+        })
+    return messages
+
+
+# --- Request digests ---
+REQUEST_DIGEST_TEMPLATE = compile_template("""
+    <html>
+    <body>
+        <h3>New Request Notification</h3>
+        <p>$intro</p>
+
+        <table style="border-collapse: collapse; width: 100%;">
+            <tr $header_row>
+                <th $cell>Request</th>
+                <th $cell>Requester</th>
+                <th $cell>Date</th>
+                <th $cell>Topic</th>
+                <th $cell>Description</th>
+                <th $cell>Amount</th>
+            </tr>
+            $rows
+        </table>
+
+        <p style="margin-top: 20px;">Please review these requests in the admin panel.</p>
+
+        <p>Best regards,<br>
+        Corporate IT Solutions System</p>
+    </body>
+    </html>
+""")
+
+REQUEST_ROW_TEMPLATE = compile_template("""
+            <tr>
+                <td $cell>#$request_id</td>
+                <td $cell>$name</td>
+                <td $cell>$date</td>
+                <td $cell>$topic</td>
+                <td $cell>$description</td>
+                <td $cell>$amount</td>
+            </tr>""")
+
+
+def render_request_digest(requests):
+    """(subject, HTML body) announcing one or more new requests"""
+    if len(requests) == 1:
+        subject = f"New Request Submitted: {requests[0]['topic']}"
+        intro = "A new request has been submitted:"
+    else:
+        subject = f"{len(requests)} New Requests Submitted"
+        intro = f"{len(requests)} new requests have been submitted:"
+    rows = render_rows(REQUEST_ROW_TEMPLATE, [
+        {
+            'request_id': r['request_id'],
+            'name': r['name'],
+            'date': r['date'],
+            'topic': r['topic'],
+            'description': r['description'],
+            'amount': f"{r['currency'] or ''} {r['amount'] or 0:.2f}",
+        }
+        for r in requests
+    ])
+    return subject, render(REQUEST_DIGEST_TEMPLATE, intro=intro, rows=rows)
@@ -0,0 +1,104 @@
+# ExpiryBackfill.py
+#
+# Recompute licenses.expiry_date from issue_date + validity_period_months for
+# every license, a chunk at a time. Dates are computed for a whole chunk at
+# once and only rows whose stored value differs are written, with one UPDATE
+# per chunk.
+#
+#   python ExpiryBackfill.py [--chunk-size N] [--dry-run]
+import argparse
+import sys
+
+import pandas as pd
+from mysql.connector import Error
+from Database import get_pool, invalidate_tables
+from ExpiryTracker import advance_watermark
+from LicenseStats import refresh_license_summary
+from LicenseStatus import add_months
+
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def fetch_chunk(cursor, after_id, chunk_size):
+    cursor.execute("""
+                   SELECT license_id, issue_date, validity_period_months, expiry_date
+                   FROM licenses
+                   WHERE license_id > %s
+                   ORDER BY license_id
+                   LIMIT %s
+                   """, (after_id, chunk_size))
+    return pd.DataFrame(cursor.fetchall(),
+                        columns=['license_id', 'issue_date', 'validity_period_months', 'expiry_date'])
+
+
+def changed_expiry_dates(chunk):
+    """[(license_id, new expiry date or None)] for rows whose stored expiry_date is wrong"""
+    computed = add_months(chunk['issue_date'], chunk['validity_period_months'])
+    stored = pd.to_datetime(chunk['expiry_date'], errors='coerce')
+    differs = ~((computed == stored) | (computed.isna() & stored.isna()))
+    return [
+        (int(license_id), None if pd.isna(expiry) else expiry.date())
+        for license_id, expiry in zip(chunk['license_id'][differs], computed[differs])
+    ]
+
+
+def write_expiry_dates(cursor, updates):
+    """Apply [(license_id, expiry_date)] in a single UPDATE"""
+    cases = " ".join(["WHEN %s THEN %s"] * len(updates))
+    placeholders = ", ".join(["%s"] * len(updates))
+    params = [value for update in updates for value in update] + [license_id for license_id, _ in updates]
+    cursor.execute(f"""
+                   UPDATE licenses
+                   SET expiry_date = CASE license_id {cases} END
+                   WHERE license_id IN ({placeholders})
+                   """, params)
+
+
+def backfill_expiry_dates(chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """Returns (licenses scanned, licenses corrected)"""
+    conn = get_pool().checkout()
+    try:
+        cursor = conn.cursor()
+        scanned = corrected = 0
+        after_id = 0
+        while True:
+            chunk = fetch_chunk(cursor, after_id, chunk_size)
+            if chunk.empty:
+                break
+            after_id = int(chunk['license_id'].iloc[-1])
+            scanned += len(chunk)
+
+            updates = changed_expiry_dates(chunk)
+            corrected += len(updates)
+            if updates and not dry_run:
+                write_expiry_dates(cursor, updates)
+                conn.commit()
+        return scanned, corrected
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute license expiry dates")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="count wrong dates without writing")
+    args = parser.parse_args(argv)
+
+    try:
+        scanned, corrected = backfill_expiry_dates(args.chunk_size, args.dry_run)
+    except Error as e:
+        print(f"Database error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"{scanned} licenses scanned, {corrected} expiry dates {'to correct' if args.dry_run else 'corrected'}")
+    if corrected and not args.dry_run:
+        # Derived data keyed on expiry_date has to follow
+        invalidate_tables('licenses')
+        refresh_license_summary()
+        advance_watermark(rebuild=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
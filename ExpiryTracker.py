@@ -0,0 +1,158 @@
+# ExpiryTracker.py
+#
+# license_expiry_status holds every license that has expired or expires within
+# TRACK_WINDOW_DAYS. A watermark in job_state records the last day the table
+# was brought up to date; catching up only touches licenses whose expiry date
+# crossed a boundary since then, and license writes refresh their own row.
+from datetime import date
+
+import streamlit as st
+from mysql.connector import Error
+from Database import get_db_connection
+
+
+JOB_NAME = "expiry_tracker"
+TRACK_WINDOW_DAYS = 90  # widest "expiring within" range any page asks for
+
+_STATUS_SELECT = f"""
+    SELECT license_id,
+           expiry_date,
+           IF(expiry_date < CURDATE(), 'expired', 'expiring')
+    FROM licenses
+    WHERE expiry_date <= DATE_ADD(CURDATE(), INTERVAL {TRACK_WINDOW_DAYS} DAY)
+"""
+
+_current_day = None  # the day this process last confirmed the watermark
+
+
+def advance_watermark(rebuild=False):
+    """Bring license_expiry_status up to today, from scratch when rebuild is set
+    (e.g. after expiry dates were changed in bulk). Returns the number of rows touched."""
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("INSERT IGNORE INTO job_state (job_name) VALUES (%s)", (JOB_NAME,))
+            # The row lock keeps concurrent processes from catching up twice
+            cursor.execute("""
+                           SELECT watermark, watermark >= CURDATE()
+                           FROM job_state
+                           WHERE job_name = %s
+                               FOR UPDATE
+                           """, (JOB_NAME,))
+            watermark, up_to_date = cursor.fetchone()
+            if rebuild:
+                watermark, up_to_date = None, False
+            if up_to_date:
+                conn.commit()
+                return 0
+
+            if watermark is None:
+                cursor.execute("DELETE FROM license_expiry_status")
+                cursor.execute(f"INSERT INTO license_expiry_status (license_id, expiry_date, status) {_STATUS_SELECT}")
+                touched = cursor.rowcount
+            else:
+                # Licenses that expired since the watermark
+                cursor.execute("""
+                               UPDATE license_expiry_status
+                               SET status = 'expired'
+                               WHERE status = 'expiring'
+                                 AND expiry_date < CURDATE()
+                               """)
+                touched = cursor.rowcount
+                # Licenses that entered the window since the watermark
+                cursor.execute(f"""
+                               INSERT INTO license_expiry_status (license_id, expiry_date, status)
+                               {_STATUS_SELECT}
+                                 AND expiry_date > DATE_ADD(%s, INTERVAL {TRACK_WINDOW_DAYS} DAY)
+                               ON DUPLICATE KEY UPDATE expiry_date = VALUES(expiry_date),
+                                                       status      = VALUES(status)
+                               """, (watermark,))
+                touched += cursor.rowcount
+
+            cursor.execute("UPDATE job_state SET watermark = CURDATE() WHERE job_name = %s", (JOB_NAME,))
+            conn.commit()
+            return touched
+        except Error as e:
+            conn.rollback()
+            st.error(f"Error updating license expiry status: {e}")
+            return 0
+        finally:
+            conn.close()
+    return 0
+
+
+def ensure_current():
+    """Advance the watermark at most once per day per process"""
+    global _current_day
+    today = date.today()
+    if _current_day != today:
+        advance_watermark()
+        _current_day = today
+
+
+def refresh_license_status(*license_ids):
+    """Re-derive the status rows of licenses that were just written or deleted"""
+    license_ids = [license_id for license_id in license_ids if license_id]
+    if not license_ids:
+        return False
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor()
+            placeholders = ", ".join(["%s"] * len(license_ids))
+            cursor.execute(f"DELETE FROM license_expiry_status WHERE license_id IN ({placeholders})", license_ids)
+            cursor.execute(f"""
+                           INSERT INTO license_expiry_status (license_id, expiry_date, status)
+                           {_STATUS_SELECT}
+                             AND license_id IN ({placeholders})
+                           """, license_ids)
+            conn.commit()
+            return True
+        except Error as e:
+            conn.rollback()
+            st.error(f"Error updating license expiry status: {e}")
+            return False
+        finally:
+            conn.close()
+    return False
+
+
+def get_tracked_licenses(days_threshold=21):
+    """Expired licenses and those expiring within days_threshold (at most TRACK_WINDOW_DAYS)"""
+    ensure_current()
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("""
+                           SELECT s.license_id,
+                                  c.customer_name,
+                                  c.email,
+                                  p.product_name,
+                                  l.quantity,
+                                  s.expiry_date,
+                                  CAST(DATEDIFF(s.expiry_date, CURDATE()) AS SIGNED) as days_remaining
+                           FROM license_expiry_status s
+                                    JOIN licenses l ON s.license_id = l.license_id
+                                    JOIN customers c ON l.customer_id = c.customer_id
+                                    JOIN products p ON l.product_id = p.product_id
+                           WHERE s.expiry_date <= DATE_ADD(CURDATE(), INTERVAL %s DAY)
+                           ORDER BY s.expiry_date ASC
+                           """, (min(days_threshold, TRACK_WINDOW_DAYS),))
+            rows = cursor.fetchall()
+            return {
+                'expired': [row for row in rows if row['days_remaining'] < 0],
+                'expiring_soon': [row for row in rows if row['days_remaining'] >= 0]
+            }
+        except Error as e:
+            st.error(f"Database error: {e}")
+            return {'expired': [], 'expiring_soon': []}
+        finally:
+            conn.close()
+    return {'expired': [], 'expiring_soon': []}
+
+
+if __name__ == "__main__":
+    # Catch up now, e.g. from a nightly cron job
+    print(f"{advance_watermark()} license status rows updated")
@@ -1,327 +1,255 @@
 import streamlit as st
-import mysql.connector
 from mysql.connector import Error
+from Database import db_connection, invalidate_tables
+from LicenseStats import get_customer_count, get_license_stats, apply_license_summary_delta, count_license_buckets
+from ExpiryTracker import refresh_license_status
+from LicenseEvents import record_license_event, get_license_history
+from LicenseService import calculate_expiry_date, license_buckets, upgrade_license, renew_license
+from LicenseImport import REQUIRED_COLUMNS, OPTIONAL_COLUMNS, import_licenses
+from QueryCache import cached_query
+from Search import index_document, show_search
+from collections import Counter
 from datetime import datetime
 import pandas as pd
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
 
 
-def get_db_connection():
-    try:
-        return mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="root",
-            database="Corporate IT Solutions"
-        )
-    except Error as e:
-        st.error(f"Database error: {e}")
-        return None
-
 
+@cached_query('customers')
 def get_customers_for_dropdown():
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                           SELECT customer_id, customer_name
-                           FROM customers
-                           ORDER BY customer_name
-                           """)
-            return cursor.fetchall()
-        except Error as e:
-            st.error(f"Database error: {e}")
-        finally:
-            if conn.is_connected():
-                conn.close()
+    with db_connection() as conn:
+        if conn:
+            try:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute("""
+                               SELECT customer_id, customer_name
+                               FROM customers
+                               ORDER BY customer_name
+                               """)
+                return cursor.fetchall()
+            except Error as e:
+                st.error(f"Database error: {e}")
     return []
 
 
+@cached_query('products')
 def get_products_for_dropdown():
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                           SELECT product_id, product_name, default_validity_months
-                           FROM products
-                           ORDER BY product_name
-                           """)
-            return cursor.fetchall()
-        except Error as e:
-            st.error(f"Database error: {e}")
-        finally:
-            if conn.is_connected():
-                conn.close()
+    with db_connection() as conn:
+        if conn:
+            try:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute("""
+                               SELECT product_id, product_name, default_validity_months
+                               FROM products
+                               ORDER BY product_name
+                               """)
+                return cursor.fetchall()
+            except Error as e:
+                st.error(f"Database error: {e}")
     return []
 
 
 def get_licenses_by_customer(customer_id):
     """Get all licenses for a specific customer"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                           SELECT l.license_id,
-                                  l.product_id,
-                                  p.product_name,
-                                  l.quantity,
-                                  l.issue_date,
-                                  l.installation_date,
-                                  l.expiry_date,
-                                  l.remarks,
-                                  l.validity_period_months,
-                                  l.kwacha_amount,
-                                  l.USD_amount
-                           FROM licenses l
-                                    JOIN products p ON l.product_id = p.product_id
-                           WHERE l.customer_id = %s
-                           ORDER BY l.issue_date DESC
-                           """, (customer_id,))
-            return cursor.fetchall()
-        except Error as e:
-            st.error(f"Database error: {e}")
-        finally:
-            if conn.is_connected():
-                conn.close()
+    with db_connection() as conn:
+        if conn:
+            try:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute("""
+                               SELECT l.license_id,
+                                      l.product_id,
+                                      p.product_name,
+                                      l.quantity,
+                                      l.issue_date,
+                                      l.installation_date,
+                                      l.expiry_date,
+                                      l.remarks,
+                                      l.validity_period_months,
+                                      l.kwacha_amount,
+                                      l.USD_amount
+                               FROM licenses l
+                                        JOIN products p ON l.product_id = p.product_id
+                               WHERE l.customer_id = %s
+                               ORDER BY l.issue_date DESC
+                               """, (customer_id,))
+                return cursor.fetchall()
+            except Error as e:
+                st.error(f"Database error: {e}")
     return []
 
 
-def save_license(license_data, license_id=None):
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor()
-
-            # Check for existing license
-            customer_id = license_data[0]
-            product_id = license_data[1]
-
-            if not license_id:
-                cursor.execute("""
-                               SELECT license_id
-                               FROM licenses
-                               WHERE customer_id = %s
-                                 AND product_id = %s
-                               """, (customer_id, product_id))
-                existing_license = cursor.fetchone()
-                if existing_license:
-                    return False, "This customer already has a license for this product."
-
-            if license_id:  # Update existing
-                cursor.execute("""
-                               UPDATE licenses
-                               SET customer_id = %s,
-                                   product_id = %s,
-                                   quantity = %s,
-                                   issue_date = %s,
-                                   installation_date = %s,
-                                   validity_period_months = %s,
-                                   remarks = %s,
-                                   kwacha_amount = %s,
-                                   USD_amount = %s
-                               WHERE license_id = %s
-                               """, (*license_data, license_id))
-            else:  # Insert new
-                cursor.execute("""
-                               INSERT INTO licenses
-                               (customer_id, product_id, quantity, issue_date, installation_date,
-                                validity_period_months, remarks, kwacha_amount, USD_amount)
-                               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                               """, license_data)
-            conn.commit()
-            return True, "License record saved successfully!"
-        except Error as e:
-            return False, f"Database error: {e}"
-        finally:
-            if conn.is_connected():
-                conn.close()
+def save_license(license_data, license_id=None, event=None):
+    """Insert or update a license. event, if given, is a dict of license_events
+    fields (event_type, old_quantity, ...) recorded in the same transaction."""
+    with db_connection() as conn:
+        if conn:
+            try:
+                cursor = conn.cursor()
+
+                # Check for existing license
+                customer_id = license_data[0]
+                product_id = license_data[1]
+
+                if not license_id:
+                    cursor.execute("""
+                                   SELECT license_id
+                                   FROM licenses
+                                   WHERE customer_id = %s
+                                     AND product_id = %s
+                                   """, (customer_id, product_id))
+                    existing_license = cursor.fetchone()
+                    if existing_license:
+                        return False, "This customer already has a license for this product."
+
+                # expiry_date is stored so the expiry indexes stay usable
+                issue_date, validity_months = license_data[3], license_data[5]
+                expiry_date = calculate_expiry_date(issue_date, validity_months) \
+                    if issue_date and validity_months is not None else None
+
+                # license_summary moves with the license, in this transaction
+                buckets_before = count_license_buckets(cursor, "l.license_id = %s", (license_id,), lock=True) \
+                    if license_id else Counter()
+
+                if license_id:  # Update existing
+                    cursor.execute("""
+                                   UPDATE licenses
+                                   SET customer_id = %s,
+                                       product_id = %s,
+                                       quantity = %s,
+                                       issue_date = %s,
+                                       installation_date = %s,
+                                       validity_period_months = %s,
+                                       remarks = %s,
+                                       kwacha_amount = %s,
+                                       USD_amount = %s,
+                                       expiry_date = %s
+                                   WHERE license_id = %s
+                                   """, (*license_data, expiry_date, license_id))
+                else:  # Insert new
+                    cursor.execute("""
+                                   INSERT INTO licenses
+                                   (customer_id, product_id, quantity, issue_date, installation_date,
+                                    validity_period_months, remarks, kwacha_amount, USD_amount, expiry_date)
+                                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                                   """, (*license_data, expiry_date))
+                    license_id = cursor.lastrowid
+                if event:
+                    record_license_event(cursor, license_id, **event)
+                apply_license_summary_delta(cursor, buckets_before, license_buckets(cursor, license_id))
+                conn.commit()
+                invalidate_tables('licenses')
+                index_document('licenses', license_id, license_data[6])
+                refresh_license_status(license_id)
+                return True, "License record saved successfully!"
+            except Error as e:
+                conn.rollback()
+                return False, f"Database error: {e}"
     return False, "Could not connect to database"
 
 
 def delete_license(license_id):
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor()
-            # First delete associated renewals
-            cursor.execute("DELETE FROM renewals WHERE license_id = %s", (license_id,))
-            # Then delete the license
-            cursor.execute("DELETE FROM licenses WHERE license_id = %s", (license_id,))
-            conn.commit()
-            return cursor.rowcount > 0
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return False
-        finally:
-            if conn.is_connected():
-                conn.close()
+    with db_connection() as conn:
+        if conn:
+            try:
+                cursor = conn.cursor()
+                buckets_before = count_license_buckets(cursor, "l.license_id = %s", (license_id,), lock=True)
+                # First delete associated renewals and history
+                cursor.execute("DELETE FROM renewals WHERE license_id = %s", (license_id,))
+                cursor.execute("DELETE FROM license_events WHERE license_id = %s", (license_id,))
+                # Then delete the license
+                cursor.execute("DELETE FROM licenses WHERE license_id = %s", (license_id,))
+                deleted = cursor.rowcount > 0
+                apply_license_summary_delta(cursor, buckets_before, Counter())
+                conn.commit()
+                invalidate_tables('licenses', 'renewals')
+                index_document('licenses', license_id, None)
+                refresh_license_status(license_id)
+                return deleted
+            except Error as e:
+                st.error(f"Database error: {e}")
+                return False
     return False
 
 
 def get_all_licenses():
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                           SELECT l.license_id,
-                                  c.customer_name,
-                                  p.product_name,
-                                  l.quantity,
-                                  l.issue_date,
-                                  l.installation_date,
-                                  l.expiry_date,
-                                  l.remarks,
-                                  l.customer_id,
-                                  l.product_id,
-                                  l.validity_period_months,
-                                  l.kwacha_amount,
-                                  l.USD_amount
-                           FROM licenses l
-                                    JOIN customers c ON l.customer_id = c.customer_id
-                                    JOIN products p ON l.product_id = p.product_id
-                           ORDER BY l.issue_date DESC
-                           """)
-            return cursor.fetchall()
-        except Error as e:
-            st.error(f"Database error: {e}")
-        finally:
-            if conn.is_connected():
-                conn.close()
+    with db_connection() as conn:
+        if conn:
+            try:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute("""
+                               SELECT l.license_id,
+                                      c.customer_name,
+                                      p.product_name,
+                                      l.quantity,
+                                      l.issue_date,
+                                      l.installation_date,
+                                      l.expiry_date,
+                                      l.remarks,
+                                      l.customer_id,
+                                      l.product_id,
+                                      l.validity_period_months,
+                                      l.kwacha_amount,
+                                      l.USD_amount
+                               FROM licenses l
+                                        JOIN customers c ON l.customer_id = c.customer_id
+                                        JOIN products p ON l.product_id = p.product_id
+                               ORDER BY l.issue_date DESC
+                               """)
+                return cursor.fetchall()
+            except Error as e:
+                st.error(f"Database error: {e}")
     return []
 
 
 def get_customer_products(customer_id):
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                           SELECT DISTINCT p.product_id, p.product_name, p.default_validity_months
-                           FROM licenses l
-                                    JOIN products p ON l.product_id = p.product_id
-                           WHERE l.customer_id = %s
-                           ORDER BY p.product_name
-                           """, (customer_id,))
-            return cursor.fetchall()
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return []
-        finally:
-            if conn.is_connected():
-                conn.close()
+    with db_connection() as conn:
+        if conn:
+            try:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute("""
+                               SELECT DISTINCT p.product_id, p.product_name, p.default_validity_months
+                               FROM licenses l
+                                        JOIN products p ON l.product_id = p.product_id
+                               WHERE l.customer_id = %s
+                               ORDER BY p.product_name
+                               """, (customer_id,))
+                return cursor.fetchall()
+            except Error as e:
+                st.error(f"Database error: {e}")
+                return []
     return []
 
-def get_customer_count():
-    """Get total number of customers"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM customers")
-            return cursor.fetchone()[0]
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return 0
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return 0
-
-
-def get_license_stats():
-    """Get active and expired license counts"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            query = """
-                    SELECT 
-                        COALESCE(SUM(CASE WHEN expiry_date >= CURDATE() THEN 1 ELSE 0 END), 0) as active, 
-                        COALESCE(SUM(CASE WHEN expiry_date < CURDATE() THEN 1 ELSE 0 END), 0) as expired
-                    FROM licenses 
-                    """
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute(query)
-            result = cursor.fetchone()
-            return {
-                'active': int(result['active']) if result['active'] is not None else 0,
-                'expired': int(result['expired']) if result['expired'] is not None else 0
-            }
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return {'active': 0, 'expired': 0}
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return {'active': 0, 'expired': 0}
-
-
-def calculate_expiry_date(issue_date, validity_months):
-    """Calculate expiry date based on issue date and validity period"""
-    from dateutil.relativedelta import relativedelta
-    return issue_date + relativedelta(months=+validity_months)
-
-
-def insert_renewal(renewal_data):
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor()
-            query = """
-                INSERT INTO renewals 
-                (license_id, customer_id, product_id, total_quantity, renewal_due_date, 
-                 renewal_amount_kwatcha, renewal_amount_USD, status, invoice_no, 
-                 client_confirmation_status, remarks, created_at, updated_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
-            """
-            cursor.execute(query, renewal_data)
-            conn.commit()
-            return True, "Renewal record created successfully!"
-        except Error as e:
-            return False, f"Database error: {e}"
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return False, "Could not connect to database"
 
 def get_renewals_by_license(license_id):
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT 
-                    renewal_id,
-                    license_id,
-                    total_quantity,
-                    renewal_due_date,
-                    renewal_amount_kwatcha,
-                    renewal_amount_USD,
-                    status,
-                    invoice_no,
-                    client_confirmation_status,
-                    remarks,
-                    created_at
-                FROM renewals 
-                WHERE license_id = %s
-                ORDER BY renewal_due_date DESC
-            """, (license_id,))
-            return cursor.fetchall()
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return []
-        finally:
-            if conn.is_connected():
-                conn.close()
+    with db_connection() as conn:
+        if conn:
+            try:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute("""
+                    SELECT 
+                        renewal_id,
+                        license_id,
+                        total_quantity,
+                        renewal_due_date,
+                        renewal_amount_kwatcha,
+                        renewal_amount_USD,
+                        status,
+                        invoice_no,
+                        client_confirmation_status,
+                        remarks,
+                        created_at
+                    FROM renewals 
+                    WHERE license_id = %s
+                    ORDER BY renewal_due_date DESC
+                """, (license_id,))
+                return cursor.fetchall()
+            except Error as e:
+                st.error(f"Database error: {e}")
+                return []
     return []
 
 
 def show_license_entry():
-    conn = get_db_connection()
-    cursor = conn.cursor()
     st.set_page_config(page_title="License Entry", layout="wide")
 
     if 'logged_in' not in st.session_state or not st.session_state.logged_in:
@@ -457,6 +385,40 @@ def show_license_entry():
                         else:
                             st.error(message)
 
+        with st.expander("Bulk Import Licenses"):
+            st.caption(f"CSV or Excel file with columns {', '.join(REQUIRED_COLUMNS)} and optionally "
+                       f"{', '.join(OPTIONAL_COLUMNS)}. Customers and products are matched by name; "
+                       f"an existing license for the same customer and product is updated.")
+            st.download_button(
+                "Download Template",
+                data=",".join(REQUIRED_COLUMNS + OPTIONAL_COLUMNS) + "\n",
+                file_name="license_import_template.csv",
+                mime="text/csv"
+            )
+            uploaded_file = st.file_uploader("License File", type=["csv", "xlsx"], key="license_import_file")
+            dry_run = st.checkbox("Validate only (dry run)", value=True, key="license_import_dry_run")
+
+            if uploaded_file is not None and st.button("Run Import", key="license_import_run"):
+                progress = st.empty()
+                result = import_licenses(
+                    uploaded_file,
+                    uploaded_file.name,
+                    dry_run=dry_run,
+                    on_progress=lambda rows: progress.caption(f"{rows} rows processed...")
+                )
+                progress.empty()
+
+                action = "are valid" if dry_run else "imported"
+                if result['imported']:
+                    st.success(f"{result['imported']} of {result['rows']} licenses {action}")
+                if result['errors']:
+                    st.error(f"{len(result['errors'])} rows have errors")
+                    st.dataframe(
+                        pd.DataFrame(result['errors'], columns=["Row", "Error"]),
+                        hide_index=True,
+                        use_container_width=True
+                    )
+
         with st.expander("Upgrade License"):
             customer_options = {c['customer_name']: c['customer_id'] for c in customers}
             selected_customer = st.selectbox(
@@ -515,7 +477,6 @@ def show_license_entry():
                                     value=0,
                                     key="additional_quantity"
                                 )
-                                new_quantity = st.session_state.original_quantity + additional_quantity
 
 
 
@@ -541,58 +502,24 @@ def show_license_entry():
                                     format="%.2f",
                                     key="additional_amount"
                                 )
-                                if currency == "ZMW":
-                                    new_kwacha_amount = original_amount + additional_amount
-                                    new_usd_amount = None
-                                else:
-                                    new_usd_amount = original_amount + additional_amount
-                                    new_kwacha_amount = None
                             else:
                                 additional_amount = 0.0
-                                new_kwacha_amount = None if currency == "USD" else 0.0
-                                new_usd_amount = None if currency == "ZMW" else 0.0
 
                             remarks = st.text_area("Remarks", value="", max_chars=500,
                                                    placeholder="Enter upgrade reason or notes")
 
                             submitted = st.form_submit_button("Submit Upgrade")
                             if submitted:
-                                license_data = (
-                                    st.session_state.selected_customer_id,
-                                    st.session_state.selected_license['product_id'],
-                                    new_quantity,
-                                    issue_date,
-                                    st.session_state.selected_license['installation_date'],
-                                    current_validity,
-                                    remarks,
-                                    new_kwacha_amount,
-                                    new_usd_amount
-                                )
-
-                                success, message = save_license(
-                                    license_data,
-                                    st.session_state.selected_license['license_id']
+                                success, message = upgrade_license(
+                                    st.session_state.selected_license['license_id'],
+                                    additional_quantity,
+                                    additional_amount,
+                                    remarks=remarks,
+                                    actor=st.session_state.get('username')
                                 )
 
                                 if success:
-                                    st.success("License upgraded successfully!")
-                                    history_entry = f"\n\nUpgraded on {datetime.now().date()}:\n" \
-                                                    f"- Quantity changed from {st.session_state.original_quantity} to {new_quantity}\n" \
-                                                    f"- {currency} Amount changed from {original_amount:.2f} to {(original_amount + additional_amount):.2f}\n" \
-                                                    f"- Remarks: {remarks}"
-
-                                    updated_remarks = (st.session_state.selected_license[
-                                                           'remarks'] or "") + history_entry
-
-                                    cursor = conn.cursor()
-                                    cursor.execute("""
-                                                   UPDATE licenses
-                                                   SET remarks = %s
-                                                   WHERE license_id = %s
-                                                   """,
-                                                   (updated_remarks, st.session_state.selected_license['license_id']))
-                                    conn.commit()
-
+                                    st.success(message)
                                     st.session_state.selected_license = None
                                     st.session_state.original_quantity = None
                                     st.rerun()
@@ -600,25 +527,22 @@ def show_license_entry():
                                     st.error(message)
 
                         with st.expander("Upgrade History"):
-                            if st.session_state.selected_license and st.session_state.selected_license['remarks']:
-                                # Parse the remarks to show history
-                                history_entries = []
-                                remarks = st.session_state.selected_license['remarks']
-
-                                # Split remarks by "Upgraded on" to get each upgrade entry
-                                upgrades = remarks.split("Upgraded on")[1:]  # Skip first empty part
-                                for upgrade in upgrades:
-                                    date_part = upgrade.split(":")[0].strip()
-                                    details = ":".join(upgrade.split(":")[1:])
-                                    history_entries.append({
-                                        "Date": date_part,
-                                        "Details": details.strip()
-                                    })
-
-                                if history_entries:
-                                    st.dataframe(pd.DataFrame(history_entries))
-                                else:
-                                    st.info("No upgrade history found")
+                            upgrades = get_license_history(selected_license_data['license_id'], 'upgrade')
+                            if upgrades:
+                                history_df = pd.DataFrame(upgrades)
+                                st.dataframe(
+                                    pd.DataFrame({
+                                        "Date": pd.to_datetime(history_df['created_at']).dt.strftime('%Y-%m-%d'),
+                                        "Quantity": history_df['old_quantity'].astype(str) + " → " +
+                                                    history_df['new_quantity'].astype(str),
+                                        "Amount": history_df['old_amount'].astype(str) + " → " +
+                                                  history_df['new_amount'].astype(str) + " " +
+                                                  history_df['currency'].fillna(""),
+                                        "By": history_df['actor'],
+                                        "Remarks": history_df['remarks']
+                                    }),
+                                    hide_index=True
+                                )
                             else:
                                 st.info("No upgrade history available")
                 else:
@@ -711,64 +635,24 @@ def show_license_entry():
 
                             submitted = st.form_submit_button("Submit Renewal")
                             if submitted:
-                                # Calculate currency amounts
-                                kwacha_amount = new_amount if currency == "ZMW" else None
-                                usd_amount = new_amount if currency == "USD" else None
-
-                                # Create renewal history
-                                renewal_history = f"""
-                                Renewed on {current_date}:
-                                - Quantity: {selected_license_data['quantity']} → {new_quantity}
-                                - Validity: {selected_license_data['validity_period_months']} → {new_validity} months
-                                - Amount: {original_amount:.2f} → {new_amount:.2f} {currency}
-                                - Remarks: {remarks}
-                                """
-
-                                # Update license record
-                                license_update_data = (
-                                    customer_id,
-                                    selected_license_data['product_id'],
+                                success, message = renew_license(
+                                    selected_license_data['license_id'],
                                     new_quantity,
-                                    current_date,
-                                    selected_license_data['installation_date'],
                                     new_validity,
-                                    (selected_license_data['remarks'] or "") + renewal_history,
-                                    kwacha_amount,
-                                    usd_amount,
-                                    selected_license_data['license_id']
+                                    new_amount,
+                                    status=status,
+                                    invoice_no=invoice_no,
+                                    client_confirmation_status=client_confirmation_status,
+                                    remarks=remarks,
+                                    actor=st.session_state.get('username'),
+                                    renewal_date=current_date
                                 )
 
-                                # Save license update
-                                update_success, update_message = save_license(
-                                    license_data=license_update_data[:-1],
-                                    license_id=license_update_data[-1]
-                                )
-
-                                if update_success:
-                                    # Create renewal record
-                                    renewal_data = (
-                                        selected_license_data['license_id'],
-                                        customer_id,
-                                        selected_license_data['product_id'],
-                                        new_quantity,
-                                        renewal_due_date,
-                                        kwacha_amount,
-                                        usd_amount,
-                                        status,
-                                        invoice_no,
-                                        client_confirmation_status,
-                                        remarks
-                                    )
-
-                                    renew_success, renew_message = insert_renewal(renewal_data)
-
-                                    if renew_success:
-                                        st.success("License renewed successfully!")
-                                        st.rerun()
-                                    else:
-                                        st.error(f"Renewal record failed: {renew_message}")
+                                if success:
+                                    st.success(message)
+                                    st.rerun()
                                 else:
-                                    st.error(f"License update failed: {update_message}")
+                                    st.error(message)
 
                         # Show previous renewals for this license
                         st.subheader("Renewal History")
@@ -823,6 +707,14 @@ def show_license_entry():
                 st.error("Error updating license")
         st.rerun()
 
+    with st.expander("🔍 Search License Remarks"):
+        show_search('licenses', "Words from the remarks", {
+            "customer_name": "Customer",
+            "product_name": "Product",
+            "expiry_date": st.column_config.DateColumn("Expiry Date"),
+            "remarks": "Remarks",
+        }, key="license_search")
+
     # Get all licenses
     licenses = get_all_licenses()
 
@@ -0,0 +1,110 @@
+# LicenseEvents.py
+#
+# One row per upgrade or renewal in license_events. Writers pass their own
+# cursor so the event commits or rolls back with the license update itself.
+import re
+
+import streamlit as st
+from mysql.connector import Error
+from Database import get_db_connection
+
+
+EVENT_COLUMNS = ('old_quantity', 'new_quantity', 'old_validity_months', 'new_validity_months',
+                 'old_amount', 'new_amount', 'currency', 'actor', 'remarks', 'created_at')
+
+
+def record_license_event(cursor, license_id, event_type, **fields):
+    """Insert an event on the caller's cursor; the caller commits.
+    fields are any of EVENT_COLUMNS; created_at defaults to now."""
+    columns = [column for column in EVENT_COLUMNS if fields.get(column) is not None]
+    placeholders = ", ".join(["%s"] * (len(columns) + 2))
+    cursor.execute(
+        f"INSERT INTO license_events (license_id, event_type{''.join(', ' + c for c in columns)}) "
+        f"VALUES ({placeholders})",
+        (license_id, event_type, *(fields[column] for column in columns))
+    )
+
+
+def get_license_history(license_id, event_type=None):
+    """Events for a license, newest first"""
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor(dictionary=True)
+            query = """
+                    SELECT event_id, event_type, old_quantity, new_quantity, old_validity_months,
+                           new_validity_months, old_amount, new_amount, currency, actor, remarks, created_at
+                    FROM license_events
+                    WHERE license_id = %s
+                    """
+            params = [license_id]
+            if event_type:
+                query += " AND event_type = %s"
+                params.append(event_type)
+            cursor.execute(query + " ORDER BY created_at DESC, event_id DESC", params)
+            return cursor.fetchall()
+        except Error as e:
+            st.error(f"Database error: {e}")
+            return []
+        finally:
+            conn.close()
+    return []
+
+
+# --- Parsing legacy remarks ---
+# Before license_events existed, the upgrade and renewal forms appended
+# history blocks like these to licenses.remarks:
+#
+#   Upgraded on 2024-05-01:
+#   - Quantity changed from 5 to 10
+#   - ZMW Amount changed from 100.00 to 200.00
+#   - Remarks: ...
+#
+#   Renewed on 2024-05-01:
+#   - Quantity: 5 → 10
+#   - Validity: 12 → 24 months
+#   - Amount: 100.00 → 200.00 USD
+#   - Remarks: ...
+HISTORY_BLOCK = re.compile(r"(Upgraded|Renewed) on (\d{4}-\d{2}-\d{2}):")
+UPGRADE_QUANTITY = re.compile(r"Quantity changed from (\d+) to (\d+)")
+UPGRADE_AMOUNT = re.compile(r"(\w+) Amount changed from ([\d.]+) to ([\d.]+)")
+RENEWAL_QUANTITY = re.compile(r"Quantity: (\d+) → (\d+)")
+RENEWAL_VALIDITY = re.compile(r"Validity: (\d+) → (\d+) months")
+RENEWAL_AMOUNT = re.compile(r"Amount: ([\d.]+) → ([\d.]+) (\w+)")
+BLOCK_REMARKS = re.compile(r"- Remarks:(.*)", re.DOTALL)
+
+
+def parse_remarks_history(remarks):
+    """Split legacy remarks into (plain remarks, [event dicts])"""
+    matches = list(HISTORY_BLOCK.finditer(remarks or ""))
+    if not matches:
+        return remarks, []
+
+    events = []
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(remarks)
+        block = remarks[match.end():end]
+        event = {'event_type': 'upgrade' if match.group(1) == "Upgraded" else 'renewal',
+                 'created_at': match.group(2)}
+        if event['event_type'] == 'upgrade':
+            quantity = UPGRADE_QUANTITY.search(block)
+            amount = UPGRADE_AMOUNT.search(block)
+            if amount:
+                event.update(currency=amount.group(1), old_amount=amount.group(2), new_amount=amount.group(3))
+        else:
+            quantity = RENEWAL_QUANTITY.search(block)
+            validity = RENEWAL_VALIDITY.search(block)
+            amount = RENEWAL_AMOUNT.search(block)
+            if validity:
+                event.update(old_validity_months=int(validity.group(1)), new_validity_months=int(validity.group(2)))
+            if amount:
+                event.update(old_amount=amount.group(1), new_amount=amount.group(2), currency=amount.group(3))
+        if quantity:
+            event.update(old_quantity=int(quantity.group(1)), new_quantity=int(quantity.group(2)))
+        block_remarks = BLOCK_REMARKS.search(block)
+        if block_remarks and block_remarks.group(1).strip():
+            event['remarks'] = block_remarks.group(1).strip()
+        events.append(event)
+
+    plain = remarks[:matches[0].start()].strip()
+    return plain or None, events
@@ -0,0 +1,247 @@
+# LicenseImport.py
+#
+# Bulk license import from CSV or Excel. The file is read a chunk at a time;
+# customer and product names are resolved to ids from lookups loaded once,
+# each row is validated, and valid rows are upserted per chunk with
+# INSERT ... ON DUPLICATE KEY UPDATE on (customer_id, product_id).
+#
+#   python LicenseImport.py licenses.csv [--chunk-size N] [--dry-run]
+import argparse
+import os
+import sys
+
+import pandas as pd
+from mysql.connector import Error
+from Database import db_connection, invalidate_tables
+from ExpiryTracker import advance_watermark
+from LicenseStats import apply_license_summary_delta, count_license_buckets
+from LicenseStatus import add_months
+from QueryCache import cached_query
+from Search import invalidate_index
+
+
+DEFAULT_CHUNK_SIZE = 500
+REQUIRED_COLUMNS = ['customer_name', 'product_name', 'quantity', 'issue_date']
+OPTIONAL_COLUMNS = ['installation_date', 'validity_period_months', 'remarks', 'kwacha_amount', 'USD_amount']
+LICENSE_COLUMNS = ['customer_id', 'product_id', 'quantity', 'issue_date', 'installation_date',
+                   'validity_period_months', 'remarks', 'kwacha_amount', 'USD_amount', 'expiry_date']
+
+
+def normalise_name(name):
+    """Lookup key for customer and product names: trimmed, single-spaced, case-insensitive"""
+    return " ".join(str(name).split()).casefold()
+
+
+@cached_query('customers')
+def get_customer_lookup():
+    """{normalised customer name: customer_id}"""
+    with db_connection() as conn:
+        if conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT customer_id, customer_name FROM customers")
+            return {normalise_name(name): customer_id for customer_id, name in cursor.fetchall() if name}
+    return {}
+
+
+@cached_query('products')
+def get_product_lookup():
+    """{normalised product name: (product_id, default_validity_months)}"""
+    with db_connection() as conn:
+        if conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT product_id, product_name, default_validity_months FROM products")
+            return {normalise_name(name): (product_id, validity)
+                    for product_id, name, validity in cursor.fetchall() if name}
+    return {}
+
+
+# --- Reading ---
+def read_chunks(source, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most chunk_size rows from a CSV or XLSX file (path or file object)"""
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        yield from _read_excel_chunks(source, chunk_size)
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+
+def _read_excel_chunks(source, chunk_size):
+    # openpyxl's read-only mode streams rows instead of loading the whole sheet
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else "" for value in next(rows, [])]
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk_size:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+# --- Validation ---
+def prepare_chunk(chunk, customers, products):
+    """Validate a chunk and resolve names. Returns (DataFrame of license rows
+    with the file's row numbers as index, [(row number, error)])."""
+    chunk = chunk.rename(columns=lambda column: str(column).strip())
+    for column in OPTIONAL_COLUMNS:
+        if column not in chunk.columns:
+            chunk[column] = None
+    chunk = chunk.replace({"": None})
+
+    errors = {}
+
+    def fail(mask, message):
+        for row_number in chunk.index[mask & ~chunk.index.isin(list(errors))]:
+            errors[row_number] = message
+
+    customer_keys = chunk['customer_name'].map(lambda name: normalise_name(name) if name is not None else None)
+    product_keys = chunk['product_name'].map(lambda name: normalise_name(name) if name is not None else None)
+    customer_ids = customer_keys.map(customers)
+    product_info = product_keys.map(products)
+    fail(customer_ids.isna(), "Unknown customer")
+    fail(product_info.isna(), "Unknown product")
+
+    quantity = pd.to_numeric(chunk['quantity'], errors='coerce')
+    fail(quantity.isna() | (quantity < 1) | (quantity % 1 != 0), "Quantity must be a whole number of at least 1")
+
+    issue_date = pd.to_datetime(chunk['issue_date'], errors='coerce')
+    fail(issue_date.isna(), "Invalid issue date")
+    installation_date = pd.to_datetime(chunk['installation_date'], errors='coerce')
+    fail(chunk['installation_date'].notna() & installation_date.isna(), "Invalid installation date")
+
+    default_validity = product_info.map(lambda info: info[1] if isinstance(info, tuple) else None)
+    validity = pd.to_numeric(chunk['validity_period_months'], errors='coerce').fillna(
+        pd.to_numeric(default_validity, errors='coerce'))
+    fail(validity.isna() | (validity < 1) | (validity % 1 != 0), "Validity must be a whole number of months")
+
+    kwacha = pd.to_numeric(chunk['kwacha_amount'], errors='coerce')
+    usd = pd.to_numeric(chunk['USD_amount'], errors='coerce')
+    fail((chunk['kwacha_amount'].notna() & (kwacha.isna() | (kwacha < 0))) |
+         (chunk['USD_amount'].notna() & (usd.isna() | (usd < 0))), "Amounts must be non-negative numbers")
+    fail(kwacha.notna() & usd.notna(), "Give either a ZMW or a USD amount, not both")
+
+    valid = ~chunk.index.isin(list(errors))
+    licenses = pd.DataFrame({
+        'customer_id': customer_ids,
+        'product_id': product_info.map(lambda info: info[0] if isinstance(info, tuple) else None),
+        'quantity': quantity,
+        'issue_date': issue_date,
+        'installation_date': installation_date,
+        'validity_period_months': validity,
+        'remarks': chunk['remarks'],
+        'kwacha_amount': kwacha,
+        'USD_amount': usd,
+    })[valid]
+    licenses['expiry_date'] = add_months(licenses['issue_date'], licenses['validity_period_months'])
+    return licenses, sorted(errors.items())
+
+
+def license_rows(licenses):
+    """DataFrame -> parameter tuples with Python types (None for missing values)"""
+    rows = []
+    for record in licenses[LICENSE_COLUMNS].itertuples(index=False):
+        (customer_id, product_id, quantity, issue_date, installation_date,
+         validity, remarks, kwacha, usd, expiry_date) = record
+        rows.append((
+            int(customer_id), int(product_id), int(quantity), issue_date.date(),
+            None if pd.isna(installation_date) else installation_date.date(),
+            int(validity), remarks,
+            None if pd.isna(kwacha) else float(kwacha),
+            None if pd.isna(usd) else float(usd),
+            expiry_date.date()
+        ))
+    return rows
+
+
+# --- Import ---
+UPSERT_LICENSES = """
+    INSERT INTO licenses
+    (customer_id, product_id, quantity, issue_date, installation_date,
+     validity_period_months, remarks, kwacha_amount, USD_amount, expiry_date)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE quantity               = VALUES(quantity),
+                            issue_date             = VALUES(issue_date),
+                            installation_date      = VALUES(installation_date),
+                            validity_period_months = VALUES(validity_period_months),
+                            remarks                = VALUES(remarks),
+                            kwacha_amount          = VALUES(kwacha_amount),
+                            USD_amount             = VALUES(USD_amount),
+                            expiry_date            = VALUES(expiry_date)
+"""
+
+
+def import_licenses(source, filename, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False, on_progress=None):
+    """Import a license file. Returns {'rows', 'imported', 'errors': [(row number, error)]};
+    row numbers count the header as row 1, as spreadsheets do. on_progress(rows read) is
+    called after each chunk."""
+    customers = get_customer_lookup()
+    products = get_product_lookup()
+    result = {'rows': 0, 'imported': 0, 'errors': []}
+    first_row = 2
+
+    with db_connection() as conn:
+        if not conn:
+            result['errors'].append((0, "Could not connect to database"))
+            return result
+        cursor = conn.cursor()
+        for chunk in read_chunks(source, filename, chunk_size):
+            chunk.index = range(first_row, first_row + len(chunk))
+            first_row += len(chunk)
+            result['rows'] += len(chunk)
+
+            missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+            if missing:
+                result['errors'].append((1, f"Missing columns: {', '.join(missing)}"))
+                break
+
+            licenses, errors = prepare_chunk(chunk, customers, products)
+            result['errors'].extend(errors)
+            if not licenses.empty and not dry_run:
+                try:
+                    rows = license_rows(licenses)
+                    # license_summary follows the chunk's licenses in the same transaction
+                    pairs = [value for row in rows for value in row[:2]]
+                    condition = "(l.customer_id, l.product_id) IN ({})".format(", ".join(["(%s, %s)"] * len(rows)))
+                    buckets_before = count_license_buckets(cursor, condition, pairs, lock=True)
+                    cursor.executemany(UPSERT_LICENSES, rows)
+                    apply_license_summary_delta(cursor, buckets_before,
+                                                count_license_buckets(cursor, condition, pairs))
+                    conn.commit()
+                except Error as e:
+                    conn.rollback()
+                    result['errors'].extend((row_number, f"Database error: {e}") for row_number in licenses.index)
+                    continue
+            result['imported'] += len(licenses)
+            if on_progress:
+                on_progress(result['rows'])
+
+    if result['imported'] and not dry_run:
+        invalidate_tables('licenses')
+        invalidate_index('licenses')
+        advance_watermark(rebuild=True)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import licenses from a CSV or XLSX file")
+    parser.add_argument("path")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="validate without writing")
+    args = parser.parse_args(argv)
+
+    result = import_licenses(args.path, os.path.basename(args.path), args.chunk_size, args.dry_run)
+    for row_number, error in result['errors']:
+        print(f"row {row_number}: {error}", file=sys.stderr)
+    print(f"{result['rows']} rows read, {result['imported']} licenses "
+          f"{'valid' if args.dry_run else 'imported'}, {len(result['errors'])} errors")
+    return 1 if result['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
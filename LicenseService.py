@@ -0,0 +1,158 @@
+# LicenseService.py
+#
+# License upgrades and renewals as single transactions. Each one locks the
+# license row with SELECT ... FOR UPDATE, derives the new values from what is
+# actually stored (not from what the form showed), then writes the license,
+# its history event and any renewal record before one commit.
+from datetime import date
+
+from mysql.connector import Error
+from Database import get_db_connection, invalidate_tables
+from LicenseEvents import record_license_event
+from LicenseStats import apply_license_summary_delta, count_license_buckets
+from ExpiryTracker import refresh_license_status
+
+
+def calculate_expiry_date(issue_date, validity_months):
+    """Calculate expiry date based on issue date and validity period"""
+    from dateutil.relativedelta import relativedelta
+    return issue_date + relativedelta(months=+validity_months)
+
+
+def lock_license(cursor, license_id):
+    """Fetch a license and hold its row lock until the transaction ends"""
+    cursor.execute("""
+                   SELECT license_id, customer_id, product_id, quantity, issue_date,
+                          validity_period_months, kwacha_amount, USD_amount
+                   FROM licenses
+                   WHERE license_id = %s
+                       FOR UPDATE
+                   """, (license_id,))
+    return cursor.fetchone()
+
+
+def license_currency(license_row):
+    """(currency, amount) for a license; amounts are kept in kwacha or USD, not both"""
+    if license_row['kwacha_amount'] is not None:
+        return "ZMW", float(license_row['kwacha_amount'])
+    return "USD", float(license_row['USD_amount'] or 0)
+
+
+def license_buckets(cursor, license_id):
+    """The license's license_summary bucket, as a Counter"""
+    return count_license_buckets(cursor, "l.license_id = %s", (license_id,))
+
+
+def _after_license_write(license_id, *tables):
+    invalidate_tables('licenses', *tables)
+    refresh_license_status(license_id)
+
+
+def upgrade_license(license_id, additional_quantity, additional_amount=0.0, remarks=None, actor=None):
+    """Add quantity (and amount) to a license. Returns (success, message)."""
+    conn = get_db_connection()
+    if not conn:
+        return False, "Could not connect to database"
+    try:
+        cursor = conn.cursor(dictionary=True)
+        current = lock_license(cursor, license_id)
+        if current is None:
+            conn.rollback()
+            return False, "License not found"
+        buckets_before = license_buckets(cursor, license_id)
+
+        currency, old_amount = license_currency(current)
+        new_amount = old_amount + additional_amount
+        new_quantity = current['quantity'] + additional_quantity
+        # The term is unchanged; expiry_date is rewritten so it can never drift
+        expiry_date = calculate_expiry_date(current['issue_date'], current['validity_period_months']) \
+            if current['issue_date'] and current['validity_period_months'] is not None else None
+        cursor.execute("""
+                       UPDATE licenses
+                       SET quantity = %s,
+                           kwacha_amount = %s,
+                           USD_amount = %s,
+                           expiry_date = %s
+                       WHERE license_id = %s
+                       """, (new_quantity,
+                             new_amount if currency == "ZMW" else None,
+                             new_amount if currency == "USD" else None,
+                             expiry_date,
+                             license_id))
+        record_license_event(
+            cursor, license_id, 'upgrade',
+            old_quantity=current['quantity'], new_quantity=new_quantity,
+            old_amount=old_amount, new_amount=new_amount, currency=currency,
+            actor=actor, remarks=remarks or None
+        )
+        apply_license_summary_delta(cursor, buckets_before, license_buckets(cursor, license_id))
+        conn.commit()
+    except Error as e:
+        conn.rollback()
+        return False, f"Database error: {e}"
+    finally:
+        conn.close()
+
+    _after_license_write(license_id, 'license_events')
+    return True, "License upgraded successfully!"
+
+
+def renew_license(license_id, new_quantity, new_validity, new_amount, status="Pending",
+                  invoice_no=None, client_confirmation_status="Pending", remarks=None, actor=None,
+                  renewal_date=None):
+    """Renew a license from renewal_date (default today) and record the renewal.
+    Returns (success, message)."""
+    renewal_date = renewal_date or date.today()
+    conn = get_db_connection()
+    if not conn:
+        return False, "Could not connect to database"
+    try:
+        cursor = conn.cursor(dictionary=True)
+        current = lock_license(cursor, license_id)
+        if current is None:
+            conn.rollback()
+            return False, "License not found"
+        buckets_before = license_buckets(cursor, license_id)
+
+        currency, old_amount = license_currency(current)
+        kwacha_amount = new_amount if currency == "ZMW" else None
+        usd_amount = new_amount if currency == "USD" else None
+        renewal_due_date = calculate_expiry_date(renewal_date, current['validity_period_months'])
+
+        cursor.execute("""
+                       UPDATE licenses
+                       SET quantity = %s,
+                           issue_date = %s,
+                           validity_period_months = %s,
+                           kwacha_amount = %s,
+                           USD_amount = %s,
+                           expiry_date = %s
+                       WHERE license_id = %s
+                       """, (new_quantity, renewal_date, new_validity, kwacha_amount, usd_amount,
+                             calculate_expiry_date(renewal_date, new_validity), license_id))
+        cursor.execute("""
+                       INSERT INTO renewals
+                       (license_id, customer_id, product_id, total_quantity, renewal_due_date,
+                        renewal_amount_kwatcha, renewal_amount_USD, status, invoice_no,
+                        client_confirmation_status, remarks, created_at, updated_at)
+                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
+                       """, (license_id, current['customer_id'], current['product_id'], new_quantity,
+                             renewal_due_date, kwacha_amount, usd_amount, status, invoice_no,
+                             client_confirmation_status, remarks))
+        record_license_event(
+            cursor, license_id, 'renewal',
+            old_quantity=current['quantity'], new_quantity=new_quantity,
+            old_validity_months=current['validity_period_months'], new_validity_months=new_validity,
+            old_amount=old_amount, new_amount=new_amount, currency=currency,
+            actor=actor, remarks=remarks or None
+        )
+        apply_license_summary_delta(cursor, buckets_before, license_buckets(cursor, license_id))
+        conn.commit()
+    except Error as e:
+        conn.rollback()
+        return False, f"Database error: {e}"
+    finally:
+        conn.close()
+
+    _after_license_write(license_id, 'renewals', 'license_events')
+    return True, "License renewed successfully!"
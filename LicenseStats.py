@@ -0,0 +1,154 @@
+# LicenseStats.py
+from collections import Counter
+
+import streamlit as st
+from mysql.connector import Error
+from Database import get_db_connection
+
+
+# license_summary holds one row per (expiry_date, product_type) with the number
+# of licenses in that bucket, so reads aggregate a handful of buckets instead of
+# the licenses table. Writers move their licenses between buckets inside their
+# own transaction: count the affected licenses' buckets before and after the
+# write and apply the difference. A full rebuild is only for bulk repairs.
+def count_license_buckets(cursor, condition, params=(), lock=False):
+    """Counter of (expiry_date, product_type) over the licenses matching condition.
+    With lock, the license rows stay locked until the caller's transaction ends."""
+    cursor.execute(f"""
+                   SELECT l.expiry_date AS expiry_date, p.product_type AS product_type
+                   FROM licenses l
+                            JOIN products p ON l.product_id = p.product_id
+                   WHERE {condition}
+                   {"FOR UPDATE OF l" if lock else ""}
+                   """, params)
+    return Counter(
+        (row['expiry_date'], row['product_type']) if isinstance(row, dict) else tuple(row)
+        for row in cursor.fetchall()
+    )
+
+
+def apply_license_summary_delta(cursor, before, after):
+    """Adjust license_summary by after - before in the caller's transaction"""
+    delta = Counter(after)
+    delta.subtract(before)
+    changes = [(expiry_date, product_type, count)
+               for (expiry_date, product_type), count in delta.items() if count]
+    if changes:
+        cursor.executemany("""
+                           INSERT INTO license_summary (expiry_date, product_type, license_count)
+                           VALUES (%s, %s, %s)
+                           ON DUPLICATE KEY UPDATE license_count = license_count + VALUES(license_count)
+                           """, changes)
+
+
+def refresh_license_summary():
+    """Rebuild the license_summary table from licenses and products (backfills
+    and `python LicenseStats.py`; normal writes keep it current incrementally)"""
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM license_summary")
+            cursor.execute("""
+                           INSERT INTO license_summary (expiry_date, product_type, license_count)
+                           SELECT l.expiry_date, p.product_type, COUNT(*)
+                           FROM licenses l
+                                    JOIN products p ON l.product_id = p.product_id
+                           GROUP BY l.expiry_date, p.product_type
+                           """)
+            conn.commit()
+            return True
+        except Error as e:
+            conn.rollback()
+            st.error(f"Error refreshing license summary: {e}")
+            return False
+        finally:
+            conn.close()
+    return False
+
+
+def get_table_counts():
+    """Get row counts for customers, products and licenses"""
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("""
+                           SELECT (SELECT COUNT(*) FROM customers) as customers,
+                                  (SELECT COUNT(*) FROM products) as products,
+                                  (SELECT COALESCE(SUM(license_count), 0) FROM license_summary) as licenses
+                           """)
+            result = cursor.fetchone()
+            return {table: int(count or 0) for table, count in result.items()}
+        except Error as e:
+            st.error(f"Database error: {e}")
+            return {'customers': 0, 'products': 0, 'licenses': 0}
+        finally:
+            conn.close()
+    return {'customers': 0, 'products': 0, 'licenses': 0}
+
+
+def get_customer_count():
+    """Get total number of customers"""
+    return get_table_counts()['customers']
+
+
+def get_license_stats():
+    """Get active and expired license counts"""
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("""
+                           SELECT COALESCE(SUM(CASE WHEN expiry_date >= CURDATE() THEN license_count ELSE 0 END), 0) as active,
+                                  COALESCE(SUM(CASE WHEN expiry_date < CURDATE() THEN license_count ELSE 0 END), 0) as expired
+                           FROM license_summary
+                           """)
+            result = cursor.fetchone()
+            return {
+                'active': int(result['active']) if result['active'] is not None else 0,
+                'expired': int(result['expired']) if result['expired'] is not None else 0
+            }
+        except Error as e:
+            st.error(f"Database error: {e}")
+            return {'active': 0, 'expired': 0}
+        finally:
+            conn.close()
+    return {'active': 0, 'expired': 0}
+
+
+def get_product_type_counts():
+    """Get license counts per product type, split into active and expired"""
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("""
+                           SELECT product_type,
+                                  COALESCE(SUM(license_count), 0) as total,
+                                  COALESCE(SUM(CASE WHEN expiry_date >= CURDATE() THEN license_count ELSE 0 END), 0) as active,
+                                  COALESCE(SUM(CASE WHEN expiry_date < CURDATE() THEN license_count ELSE 0 END), 0) as expired
+                           FROM license_summary
+                           GROUP BY product_type
+                           ORDER BY product_type
+                           """)
+            return {
+                row['product_type']: {
+                    'total': int(row['total']),
+                    'active': int(row['active']),
+                    'expired': int(row['expired'])
+                }
+                for row in cursor.fetchall()
+            }
+        except Error as e:
+            st.error(f"Database error: {e}")
+            return {}
+        finally:
+            conn.close()
+    return {}
+
+
+if __name__ == "__main__":
+    # One-off rebuild, e.g. after loading data directly into MySQL
+    if refresh_license_summary():
+        print("license_summary rebuilt")
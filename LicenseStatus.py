@@ -0,0 +1,74 @@
+# LicenseStatus.py
+#
+# Vectorised status text for license tables. Formatting works on whole
+# columns: each distinct days_remaining value is formatted once and the
+# labels are spread back over the rows as a categorical.
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+
+LICENSE_STATUS_DTYPE = pd.CategoricalDtype(["Active", "Expired"])
+
+
+def _days_label(days):
+    if days < 0:
+        return f"Expired {abs(days)} days ago"
+    if days > 0:
+        return f"Expires in {days} days"
+    return "Expires today"
+
+
+def format_days_remaining(days_remaining):
+    """'Expired N days ago' / 'Expires in N days' / 'Expires today' for a column of day counts"""
+    days = pd.Series(days_remaining)
+    values = pd.to_numeric(days, errors='coerce').to_numpy(dtype=float)
+    known = ~np.isnan(values)
+
+    codes = np.full(len(values), -1, dtype=np.int64)  # -1 = missing
+    if known.any():
+        unique_days, inverse = np.unique(values[known].astype(np.int64), return_inverse=True)
+        codes[known] = inverse
+        categories = [_days_label(int(d)) for d in unique_days]
+    else:
+        categories = []
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=days.index)
+
+
+def days_until(expiry_dates, today=None):
+    """Whole days from today to each expiry date (negative once expired, NaN when missing)"""
+    expiry = pd.to_datetime(pd.Series(expiry_dates), errors='coerce')
+    today = np.datetime64(today or date.today(), 'D')
+    days = (expiry.to_numpy(dtype='datetime64[D]') - today).astype('timedelta64[D]').astype(float)
+    days[expiry.isna().to_numpy()] = np.nan
+    return pd.Series(days, index=expiry.index)
+
+
+def add_months(dates, months):
+    """dates + months per row, clipped to the end of shorter months like
+    relativedelta (Jan 31 + 1 month = Feb 28/29). NaT where either is missing."""
+    dates = pd.to_datetime(pd.Series(dates), errors='coerce')
+    months = pd.to_numeric(pd.Series(months, index=dates.index), errors='coerce')
+    missing = (dates.isna() | months.isna()).to_numpy()
+
+    days = dates.to_numpy(dtype='datetime64[D]')
+    start_of_month = days.astype('datetime64[M]')
+    day_offset = days - start_of_month.astype('datetime64[D]')
+    target_month = start_of_month + np.where(missing, 0, months.to_numpy()).astype('timedelta64[M]')
+    month_length = (target_month + 1).astype('datetime64[D]') - target_month.astype('datetime64[D]')
+    result = target_month.astype('datetime64[D]') + np.minimum(day_offset, month_length - 1)
+
+    result = pd.Series(result, index=dates.index)
+    result[missing] = pd.NaT
+    return result
+
+
+def license_status(expiry_dates, today=None):
+    """'Active' / 'Expired' for a column of expiry dates, as a categorical"""
+    days = days_until(expiry_dates, today).to_numpy()
+    codes = np.select([days >= 0, days < 0], [0, 1], default=-1)
+    return pd.Series(
+        pd.Categorical.from_codes(codes, dtype=LICENSE_STATUS_DTYPE),
+        index=pd.Series(expiry_dates).index
+    )
@@ -0,0 +1,237 @@
+# Migrations.py
+#
+# Versioned schema migrations. Each file in migrations/ is named
+# <version>_<description>.sql (or .py, for data migrations that need Python;
+# these define upgrade(conn)) and is applied once, in version order;
+# applied versions are recorded in the schema_migrations table.
+#
+#   python Migrations.py status    # list applied / pending migrations
+#   python Migrations.py migrate   # apply pending migrations
+#   python Migrations.py verify    # EXPLAIN the hot queries and check their indexes
+import argparse
+import importlib.util
+import os
+import re
+import sys
+
+from mysql.connector import Error
+from Database import get_pool
+
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.(sql|py)$")
+
+# (description, query, params, table alias, index the query should use)
+HOT_QUERIES = [
+    (
+        "Expired / expiring licenses",
+        """
+        SELECT l.license_id, c.customer_name, p.product_name, l.quantity, l.expiry_date
+        FROM licenses l
+                 JOIN customers c ON l.customer_id = c.customer_id
+                 JOIN products p ON l.product_id = p.product_id
+        WHERE l.expiry_date <= DATE_ADD(CURDATE(), INTERVAL %s DAY)
+        ORDER BY l.expiry_date ASC
+        """,
+        (21,), "l", "idx_licenses_expiry"
+    ),
+    (
+        "Duplicate license check",
+        "SELECT license_id FROM licenses WHERE customer_id = %s AND product_id = %s",
+        (1, 1), "licenses", "uq_licenses_customer_product"
+    ),
+    (
+        "Pending requests",
+        "SELECT request_id FROM requests WHERE status = 'Pending' "
+        "ORDER BY created_at DESC, request_id DESC LIMIT 26",
+        (), "requests", "idx_requests_status_created"
+    ),
+    (
+        "Processed requests",
+        "SELECT request_id FROM requests WHERE status != 'Pending' "
+        "ORDER BY processed_at DESC, request_id DESC LIMIT 26",
+        (), "requests", "idx_requests_processed_id"
+    ),
+    (
+        "Licenses in queued reminders",
+        "SELECT outbox_id FROM email_outbox_licenses WHERE license_id IN (%s) AND notification_type = %s",
+        (1, "expired"), "email_outbox_licenses", "idx_outbox_licenses_license"
+    ),
+    (
+        "Requests awaiting a digest",
+        "SELECT request_id FROM requests WHERE notified_at IS NULL ORDER BY request_id LIMIT 100",
+        (), "requests", "idx_requests_notified"
+    ),
+    (
+        "Request search",
+        "SELECT request_id FROM requests "
+        "WHERE MATCH(topic, description) AGAINST (%s IN NATURAL LANGUAGE MODE)",
+        ("renewal",), "requests", "ft_requests_text"
+    ),
+    (
+        "License remarks search",
+        "SELECT license_id FROM licenses WHERE MATCH(remarks) AGAINST (%s IN NATURAL LANGUAGE MODE)",
+        ("renewal",), "licenses", "ft_licenses_remarks"
+    ),
+    (
+        "Customer name lookup",
+        "SELECT COUNT(*) FROM customers WHERE customer_name = %s",
+        ("x",), "customers", "idx_customers_name"
+    ),
+    (
+        "Admin emails",
+        "SELECT email FROM USERS WHERE role = 'admin'",
+        (), "USERS", "idx_users_role"
+    ),
+    (
+        "License history",
+        "SELECT event_id FROM license_events WHERE license_id = %s ORDER BY created_at DESC",
+        (1,), "license_events", "idx_license_events_license"
+    ),
+    (
+        "Renewals by license",
+        "SELECT renewal_id FROM renewals WHERE license_id = %s ORDER BY renewal_due_date DESC",
+        (1,), "renewals", "idx_renewals_license_due"
+    ),
+]
+
+
+def discover_migrations():
+    """Return [(version, name, path)] for every migration file, in version order"""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(migrations)
+
+
+def split_sql_statements(sql):
+    """Split a migration file into statements, dropping -- comment lines"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+                   CREATE TABLE IF NOT EXISTS schema_migrations (
+                       version INT PRIMARY KEY,
+                       name VARCHAR(255) NOT NULL,
+                       applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                   )
+                   """)
+
+
+def get_applied_versions(cursor):
+    ensure_migrations_table(cursor)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def get_pending_migrations(cursor):
+    applied = get_applied_versions(cursor)
+    return [migration for migration in discover_migrations() if migration[0] not in applied]
+
+
+def load_python_migration(version, path):
+    spec = importlib.util.spec_from_file_location(f"migration_{version:03d}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def apply_migration(conn, version, name, path):
+    """Run one migration file and record it. MySQL commits DDL implicitly, so a
+    failure part-way through a .sql file leaves earlier statements applied; a
+    .py migration's data changes commit together with its schema_migrations row."""
+    cursor = conn.cursor()
+    if path.endswith(".py"):
+        try:
+            load_python_migration(version, path).upgrade(conn)
+        except Exception:
+            conn.rollback()
+            raise
+    else:
+        with open(path, encoding="utf-8") as f:
+            statements = split_sql_statements(f.read())
+        for statement in statements:
+            cursor.execute(statement)
+    cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+    conn.commit()
+
+
+def migrate():
+    """Apply every pending migration; returns the list of applied (version, name)"""
+    conn = get_pool().checkout()
+    try:
+        applied = []
+        for version, name, path in get_pending_migrations(conn.cursor()):
+            apply_migration(conn, version, name, path)
+            applied.append((version, name))
+        return applied
+    finally:
+        conn.close()
+
+
+def verify_indexes():
+    """EXPLAIN each hot query and report whether it uses its intended index"""
+    conn = get_pool().checkout()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        results = []
+        for description, query, params, table, expected_index in HOT_QUERIES:
+            cursor.execute("EXPLAIN " + query, params)
+            plan = [row for row in cursor.fetchall() if row['table'] == table]
+            used = plan[0]['key'] if plan else None
+            results.append({
+                'query': description,
+                'table': table,
+                'expected_index': expected_index,
+                'used_index': used,
+                'ok': used == expected_index
+            })
+        return results
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the database schema")
+    parser.add_argument("command", choices=["status", "migrate", "verify"])
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "status":
+            conn = get_pool().checkout()
+            try:
+                applied = get_applied_versions(conn.cursor())
+            finally:
+                conn.close()
+            for version, name, _ in discover_migrations():
+                print(f"{version:03d} {name:<40} {'applied' if version in applied else 'pending'}")
+
+        elif args.command == "migrate":
+            applied = migrate()
+            for version, name in applied:
+                print(f"Applied {version:03d} {name}")
+            if not applied:
+                print("Schema is up to date")
+
+        elif args.command == "verify":
+            results = verify_indexes()
+            for result in results:
+                status = "OK  " if result['ok'] else "MISS"
+                print(f"{status} {result['query']:<30} expected {result['expected_index']}, "
+                      f"used {result['used_index'] or 'no index'}")
+            if not all(result['ok'] for result in results):
+                # Small tables are often scanned in full by the optimiser, so
+                # run this against production-sized data.
+                return 1
+    except Error as e:
+        print(f"Database error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
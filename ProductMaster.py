@@ -1,24 +1,15 @@
 # ProductMaster.py
 import streamlit as st
-import mysql.connector
 from mysql.connector import Error
+from Database import get_db_connection, invalidate_tables
+from LicenseStats import get_customer_count, get_license_stats, apply_license_summary_delta, count_license_buckets
+from QueryCache import cached_query
 import pandas as pd
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
 
 
-def get_db_connection():
-    try:
-        return mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="root",
-            database="Corporate IT Solutions"
-        )
-    except Error as e:
-        st.error(f"Database error: {e}")
-        return None
-
 
+@cached_query('products')
 def get_all_products():
     conn = get_db_connection()
     if conn:
@@ -40,8 +31,7 @@ def get_all_products():
         except Error as e:
             st.error(f"Database error: {e}")
         finally:
-            if conn.is_connected():
-                conn.close()
+            conn.close()
     return []
 
 
@@ -51,6 +41,8 @@ def save_product(product_data, product_id=None):
         try:
             cursor = conn.cursor()
             if product_id:  # Update existing
+                # A new product_type moves the product's licenses to other license_summary buckets
+                buckets_before = count_license_buckets(cursor, "l.product_id = %s", (product_id,), lock=True)
                 cursor.execute("""
                                UPDATE products
                                SET product_name            = %s,
@@ -59,19 +51,22 @@ def save_product(product_data, product_id=None):
                                    default_validity_months = %s
                                WHERE product_id = %s
                                """, (*product_data, product_id))
+                apply_license_summary_delta(
+                    cursor, buckets_before, count_license_buckets(cursor, "l.product_id = %s", (product_id,))
+                )
             else:  # Insert new
                 cursor.execute("""
                                INSERT INTO products (product_name, product_type, license_unit, default_validity_months)
                                VALUES (%s, %s, %s, %s)
                                """, product_data)
             conn.commit()
+            invalidate_tables('products')
             return True
         except Error as e:
             st.error(f"Database error: {e}")
             return False
         finally:
-            if conn.is_connected():
-                conn.close()
+            conn.close()
     return False
 
 
@@ -82,58 +77,17 @@ def delete_product(product_id):
             cursor = conn.cursor()
             cursor.execute("DELETE FROM products WHERE product_id = %s", (product_id,))
             conn.commit()
+            # Licenses reference their product, so a deleted product had none and
+            # license_summary is unaffected
+            invalidate_tables('products')
             return cursor.rowcount > 0
         except Error as e:
             st.error(f"Database error: {e}")
             return False
         finally:
-            if conn.is_connected():
-                conn.close()
+            conn.close()
     return False
 
-def get_customer_count():
-    """Get total number of customers"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM customers")
-            return cursor.fetchone()[0]
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return 0
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return 0
-
-
-def get_license_stats():
-    """Get active and expired license counts"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            query = """
-                    SELECT 
-                        COALESCE(SUM(CASE WHEN expiry_date >= CURDATE() THEN 1 ELSE 0 END), 0) as active, 
-                        COALESCE(SUM(CASE WHEN expiry_date < CURDATE() THEN 1 ELSE 0 END), 0) as expired
-                    FROM licenses 
-                    """
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute(query)
-            result = cursor.fetchone()
-            return {
-                'active': int(result['active']) if result['active'] is not None else 0,
-                'expired': int(result['expired']) if result['expired'] is not None else 0
-            }
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return {'active': 0, 'expired': 0}
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return {'active': 0, 'expired': 0}
-
 
 def show_product_master():
     st.set_page_config(page_title="Product Master", layout="wide")
@@ -0,0 +1,132 @@
+# QueryCache.py
+#
+# Process-wide cache for read queries. Entries are keyed by function and
+# arguments, expire after a TTL, are evicted least-recently-used beyond a size
+# bound, and are dropped as soon as a table they read is written (see
+# invalidate_tables in Database.py).
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+from Database import get_table_versions
+
+
+# --- CACHE SETTINGS ---
+# Defaults can be overridden with a [cache] section in .streamlit/secrets.toml
+DEFAULT_CACHE_SETTINGS = {
+    'ttl_seconds': 300,   # upper bound on staleness for writes made outside this process
+    'max_entries': 256,
+}
+
+
+def load_cache_settings():
+    """Merge the [cache] secrets section over the defaults"""
+    settings = dict(DEFAULT_CACHE_SETTINGS)
+    try:
+        settings.update(st.secrets["cache"])
+    except Exception:
+        pass
+    return settings
+
+
+class QueryCache:
+    """TTL + LRU cache whose entries are tied to table versions"""
+
+    def __init__(self, ttl_seconds=300, max_entries=256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (table versions, expires_at, value)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+
+    def get(self, key, versions):
+        """Return (True, value) for a fresh entry, else (False, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_versions, expires_at, value = entry
+                if entry_versions == versions and time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return True, value
+                del self._entries[key]
+                if entry_versions != versions:
+                    self._stats['invalidations'] += 1
+            self._stats['misses'] += 1
+            return False, None
+
+    def put(self, key, versions, value, ttl_seconds=None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (versions, time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache():
+    """Return the process-wide query cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = load_cache_settings()
+                _cache = QueryCache(
+                    ttl_seconds=float(settings['ttl_seconds']),
+                    max_entries=int(settings['max_entries']),
+                )
+    return _cache
+
+
+def _copy_rows(value):
+    # Pages sometimes edit the row dicts they get back; hand out copies so
+    # the cached rows stay as they were read.
+    if isinstance(value, list):
+        return [dict(row) if isinstance(row, dict) else row for row in value]
+    return value
+
+
+def cached_query(*tables, ttl_seconds=None):
+    """Cache a read function's result until one of tables is written or the TTL passes.
+
+    Empty results are not cached: the getters return [] when the query fails,
+    and that should not stick for a whole TTL.
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_query_cache()
+            key = (name, args, tuple(sorted(kwargs.items())))
+            versions = get_table_versions(*tables)
+            found, value = cache.get(key, versions)
+            if not found:
+                value = func(*args, **kwargs)
+                if value:
+                    cache.put(key, versions, value, ttl_seconds)
+            return _copy_rows(value)
+
+        return wrapper
+    return decorator
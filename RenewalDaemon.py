@@ -0,0 +1,293 @@
+# RenewalDaemon.py
+#
+# Sends renewal reminders without anyone opening the Renewal Updates page.
+# Each run finds licenses that reached a reminder stage (21, 7 and 1 days
+# before expiry, then once expired) since the previous run, skips those
+# already notified for that stage and queues the rest in the email outbox in
+# one batch. A date watermark in job_state marks how far runs have got.
+#
+#   python -m RenewalDaemon           # run every interval until stopped
+#   python -m RenewalDaemon --once    # one run, waiting for delivery
+#   python -m RenewalDaemon --dry-run # show what would be sent
+import argparse
+import sys
+import time
+
+import streamlit as st
+from mysql.connector import Error
+from Database import get_db_connection
+from EmailOutbox import enqueue_emails, ensure_worker, get_batch_progress
+from EmailTemplates import build_renewal_messages
+from RequestNotifier import ensure_dispatcher
+
+
+JOB_NAME = "renewal_reminders"
+
+# --- DAEMON SETTINGS ---
+# Defaults can be overridden with a [renewals] section in .streamlit/secrets.toml
+DEFAULT_RENEWAL_SETTINGS = {
+    'thresholds': [21, 7, 1],   # days before expiry that each trigger one reminder
+    'interval_seconds': 3600,   # time between runs
+}
+
+
+def load_renewal_settings():
+    """Merge the [renewals] secrets section over the defaults"""
+    settings = dict(DEFAULT_RENEWAL_SETTINGS)
+    try:
+        settings.update(st.secrets["renewals"])
+    except Exception:
+        pass
+    return settings
+
+
+def reminder_stage(days_remaining, thresholds):
+    """Notification type for the tightest threshold a license has reached, or None"""
+    if days_remaining < 0:
+        return "expired"
+    reached = [t for t in thresholds if days_remaining <= t]
+    return f"expiring_{min(reached)}d" if reached else None
+
+
+def stage_age(days_remaining, stage):
+    """Whole days since a license entered stage (0 on the day it did)"""
+    if stage == "expired":
+        return -days_remaining - 1  # the first day after the expiry date
+    return int(stage[len("expiring_"):-1]) - days_remaining
+
+
+def get_reminder_candidates(elapsed_days, max_threshold):
+    """Licenses that can have entered a reminder stage in the last elapsed_days:
+    expired at most elapsed_days ago, or expiring within max_threshold days"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+                       SELECT l.license_id,
+                              c.customer_name,
+                              c.email,
+                              p.product_name,
+                              l.quantity,
+                              l.expiry_date,
+                              CAST(DATEDIFF(l.expiry_date, CURDATE()) AS SIGNED) as days_remaining
+                       FROM licenses l
+                                JOIN customers c ON l.customer_id = c.customer_id
+                                JOIN products p ON l.product_id = p.product_id
+                       WHERE l.expiry_date >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
+                         AND l.expiry_date <= DATE_ADD(CURDATE(), INTERVAL %s DAY)
+                       ORDER BY l.expiry_date ASC
+                       """, (elapsed_days, max_threshold))
+        return cursor.fetchall()
+    except Error as e:
+        print(f"Database error: {e}", file=sys.stderr)
+        return None
+    finally:
+        conn.close()
+
+
+def find_due_reminders(thresholds, elapsed_days):
+    """Licenses whose current reminder stage began in the last elapsed_days days
+    (today counts as the first), as (license_data, notification_type) pairs"""
+    candidates = get_reminder_candidates(elapsed_days, max(thresholds))
+    if candidates is None:
+        return None
+    due = []
+    for license_data in candidates:
+        days_remaining = int(license_data['days_remaining'])
+        stage = reminder_stage(days_remaining, thresholds)
+        if stage and stage_age(days_remaining, stage) < elapsed_days:
+            due.append((license_data, stage))
+    return due
+
+
+def get_already_notified(license_ids, window_days):
+    """(license_id, notification_type) pairs already sent for the current expiry
+    date, or still waiting in the outbox. Failed deliveries do not count, so they
+    are tried again."""
+    if not license_ids:
+        return set()
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        placeholders = ", ".join(["%s"] * len(license_ids))
+        cursor.execute(f"""
+                       SELECT rn.license_id, rn.notification_type
+                       FROM renewal_notifications rn
+                                JOIN licenses l ON rn.license_id = l.license_id
+                       WHERE rn.license_id IN ({placeholders})
+                         AND rn.status = 'sent'
+                         AND rn.notification_date >= DATE_SUB(l.expiry_date, INTERVAL %s DAY)
+                       UNION
+                       SELECT ol.license_id, ol.notification_type
+                       FROM email_outbox_licenses ol
+                                JOIN email_outbox o ON ol.outbox_id = o.outbox_id
+                       WHERE ol.license_id IN ({placeholders})
+                         AND o.status IN ('queued', 'sending')
+                       """, (*license_ids, window_days, *license_ids))
+        return {(row[0], row[1]) for row in cursor.fetchall()}
+    except Error as e:
+        print(f"Database error: {e}", file=sys.stderr)
+        return None
+    finally:
+        conn.close()
+
+
+def run_once(settings, elapsed_days, dry_run=False):
+    """Queue every reminder that became due in the last elapsed_days days.
+    Returns (batch_id, number queued); the count is None when the run failed."""
+    thresholds = sorted(int(t) for t in settings['thresholds'])
+    due = find_due_reminders(thresholds, elapsed_days)
+    if due is None:
+        return None, None
+    notified = get_already_notified(sorted({data['license_id'] for data, _ in due}), max(thresholds))
+    if notified is None:
+        return None, None
+
+    reminders = [(data, stage) for data, stage in due if (data['license_id'], stage) not in notified]
+    if dry_run:
+        for data, stage in reminders:
+            print(f"{stage:<12} license {data['license_id']:<6} {data['email']}")
+        return None, len(reminders)
+    if not reminders:
+        return None, 0
+    # Licenses of the same customer address share one message
+    batch_id = enqueue_emails(build_renewal_messages(reminders))
+    return batch_id, len(reminders) if batch_id else None
+
+
+# --- Scheduling ---
+def claim_run(interval_seconds):
+    """Start a run if the last one is at least interval_seconds old, moving the
+    watermark to today under the job_state row lock so concurrent daemons (or a
+    manual --once) never cover the same days twice.
+    Returns (days since the previous watermark, previous watermark), or None
+    when another run was started recently."""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("INSERT IGNORE INTO job_state (job_name) VALUES (%s)", (JOB_NAME,))
+        cursor.execute("""
+                       SELECT last_run_at IS NULL OR last_run_at <= NOW() - INTERVAL %s SECOND,
+                              watermark,
+                              DATEDIFF(CURDATE(), watermark)
+                       FROM job_state
+                       WHERE job_name = %s
+                           FOR UPDATE
+                       """, (interval_seconds, JOB_NAME))
+        due, watermark, elapsed_days = cursor.fetchone()
+        if not due:
+            conn.commit()
+            return None
+        cursor.execute("""
+                       UPDATE job_state
+                       SET last_run_at = NOW(),
+                           watermark   = CURDATE()
+                       WHERE job_name = %s
+                       """, (JOB_NAME,))
+        conn.commit()
+        # The first run only covers today, rather than every license that ever expired
+        return (1 if elapsed_days is None else int(elapsed_days)), watermark
+    finally:
+        conn.close()
+
+
+def get_elapsed_days():
+    """Days a run starting now would cover, without claiming it (for --dry-run)"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT DATEDIFF(CURDATE(), watermark) FROM job_state WHERE job_name = %s", (JOB_NAME,))
+        row = cursor.fetchone()
+        return 1 if row is None or row[0] is None else int(row[0])
+    finally:
+        conn.close()
+
+
+def record_run(result, restore_watermark=False, watermark=None):
+    """Store the run's result; a failed run puts the watermark back so the
+    next run covers its days again"""
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor()
+            if restore_watermark:
+                cursor.execute("UPDATE job_state SET last_result = %s, watermark = %s WHERE job_name = %s",
+                               (result[:255], watermark, JOB_NAME))
+            else:
+                cursor.execute("UPDATE job_state SET last_result = %s WHERE job_name = %s", (result[:255], JOB_NAME))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def run_job(settings, interval_seconds):
+    """Claim and perform one run; returns the batch id of the reminders it
+    queued, or None if it queued none or another run was started recently"""
+    claim = claim_run(interval_seconds)
+    if claim is None:
+        return None
+    elapsed_days, watermark = claim
+    batch_id, queued = run_once(settings, elapsed_days)
+    if queued is None:
+        result = "failed; will retry these days on the next run"
+        record_run(result, restore_watermark=True, watermark=watermark)
+    else:
+        result = f"queued {queued} reminders" + (f" (batch {batch_id})" if batch_id else "")
+        record_run(result)
+    print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {result}")
+    return batch_id
+
+
+def wait_for_batch(batch_id, poll_seconds=2):
+    """Block until the outbox worker has a final outcome for every message in
+    the batch. The process must not exit while the worker thread is sending:
+    half-sent rows would be requeued and delivered twice."""
+    while True:
+        progress = get_batch_progress(batch_id)
+        if progress['queued'] + progress['sending'] == 0:
+            return progress
+        ensure_worker().wake()
+        time.sleep(poll_seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Send scheduled license renewal reminders")
+    parser.add_argument("--once", action="store_true", help="run once and wait for delivery")
+    parser.add_argument("--dry-run", action="store_true", help="list due reminders without sending")
+    args = parser.parse_args(argv)
+    settings = load_renewal_settings()
+
+    try:
+        if args.dry_run:
+            elapsed_days = get_elapsed_days()
+            _, count = run_once(settings, elapsed_days, dry_run=True) if elapsed_days else (None, 0)
+            print(f"{count or 0} reminders due")
+        elif args.once:
+            # Same lock and watermark as the resident daemon, just without the interval
+            batch_id = run_job(settings, 0)
+            if batch_id:
+                progress = wait_for_batch(batch_id)
+                print(f"sent {progress['sent']}, failed {progress['failed']}")
+        else:
+            ensure_worker()  # deliveries continue between runs
+            ensure_dispatcher()  # and request digests saved while no page process was up
+            while True:
+                run_job(settings, int(settings['interval_seconds']))
+                time.sleep(min(60, int(settings['interval_seconds'])))
+    except Error as e:
+        print(f"Database error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,148 +1,17 @@
 # RenewalUpdates.py (modified version with hardcoded email config)
 import streamlit as st
-import mysql.connector
-from mysql.connector import Error
+from ExpiryTracker import get_tracked_licenses
 import pandas as pd
+from LicenseStatus import format_days_remaining
 from datetime import datetime
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from EmailOutbox import enqueue_emails, get_batch_progress
+from EmailTemplates import build_renewal_messages
 
 
-def get_db_connection():
-    try:
-        return mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="root",
-            database="Corporate IT Solutions"
-        )
-    except Error as e:
-        st.error(f"Database error: {e}")
-        return None
-
 
 def get_expiring_licenses(days_threshold=21):
     """Get licenses that are expired or expiring soon"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-
-            # Get already expired licenses
-            cursor.execute("""
-                           SELECT l.license_id,
-                                  c.customer_name,
-                                  c.email,
-                                  p.product_name,
-                                  l.quantity,
-                                  l.expiry_date,
-                                  CAST(DATEDIFF(l.expiry_date, CURDATE()) AS SIGNED) as days_remaining
-                           FROM licenses l
-                                    JOIN customers c ON l.customer_id = c.customer_id
-                                    JOIN products p ON l.product_id = p.product_id
-                           WHERE l.expiry_date < CURDATE()
-                           ORDER BY l.expiry_date ASC
-                           """)
-            expired = cursor.fetchall()
-
-            # Get licenses expiring within specified days
-            cursor.execute("""
-                           SELECT l.license_id,
-                                  c.customer_name,
-                                  c.email,
-                                  p.product_name,
-                                  l.quantity,
-                                  l.expiry_date,
-                                  CAST(DATEDIFF(l.expiry_date, CURDATE()) AS SIGNED) as days_remaining
-                           FROM licenses l
-                                    JOIN customers c ON l.customer_id = c.customer_id
-                                    JOIN products p ON l.product_id = p.product_id
-                           WHERE l.expiry_date >= CURDATE()
-                             AND l.expiry_date <= DATE_ADD(CURDATE(), INTERVAL %s DAY)
-                           ORDER BY l.expiry_date ASC
-                           """, (days_threshold,))
-            expiring_soon = cursor.fetchall()
-
-            return {
-                'expired': expired,
-                'expiring_soon': expiring_soon
-            }
-
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return {'expired': [], 'expiring_soon': []}
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return {'expired': [], 'expiring_soon': []}
-
-
-def send_email_notification(recipient_email, subject, message):
-    """Send email notification using SMTP with configuration from secrets"""
-    try:
-        # Get SMTP configuration from Streamlit secrets
-        smtp_config = {
-            'sender_email': st.secrets.smtp.sender_email,
-            'smtp_server': st.secrets.smtp.server,
-            'smtp_port': st.secrets.smtp.port,
-            'smtp_username': st.secrets.smtp.username,
-            'smtp_password': st.secrets.smtp.password,
-            'use_tls': st.secrets.smtp.use_tls
-        }
-
-        # Create message with explicit UTF-8 encoding
-        msg = MIMEMultipart()
-        msg['From'] = smtp_config['sender_email']
-        msg['To'] = recipient_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(message, 'html', 'utf-8'))
-
-        # Connect to SMTP server
-        with smtplib.SMTP(smtp_config['smtp_server'], smtp_config['smtp_port']) as server:
-            server.ehlo()
-            if smtp_config['use_tls']:
-                server.starttls()
-                server.ehlo()
-            server.login(smtp_config['smtp_username'], smtp_config['smtp_password'])
-            server.send_message(msg)
-        return True
-    except Exception as e:
-        st.error(f"Error sending email: {e}")
-        return False
-
-def get_email_template(license_data, notification_type):
-    """Generate HTML email template based on license data and notification type"""
-    if notification_type == "expired":
-        subject = f"URGENT: License Renewal Required for {license_data['product_name']}"
-        days_text = f"expired {abs(license_data['days_remaining'])} days ago"
-        urgency = "immediate attention"
-        action = "renew immediately"
-    else:
-        subject = f"Upcoming License Renewal for {license_data['product_name']}"
-        days_text = f"expiring in {license_data['days_remaining']} days"
-        urgency = "attention"
-        action = "renew"
-
-    html = f"""
-    <html>
-    <body>
-        <p>Dear {license_data['customer_name']},</p>
-
-        <p>This is a reminder that your license for <strong>{license_data['product_name']}</strong> 
-        (Quantity: {license_data['quantity']}) is {days_text} (Expiry Date: {license_data['expiry_date'].strftime('%Y-%m-%d')}).</p>
-
-        <p>Please {action} to avoid any disruption to your service. This requires your {urgency}.</p>
-
-        <p>To proceed with the renewal, please contact our support team or reply to this email.</p>
-
-        <p>Best regards,<br>
-        Corporate IT Solutions Team</p>
-    </body>
-    </html>
-    """
-
-    return subject, html
+    return get_tracked_licenses(days_threshold)
 
 
 def show_renewal_updates():
@@ -170,7 +39,7 @@ def show_renewal_updates():
         if licenses['expired']:
             st.subheader("Expired Licenses (Needs Immediate Attention)")
             expired_df = pd.DataFrame(licenses['expired'])
-            expired_df['status_display'] = expired_df['days_remaining'].apply(lambda x: f"Expired {abs(x)} days ago")
+            expired_df['status_display'] = format_days_remaining(expired_df['days_remaining']).astype(str)
             expired_df['Select'] = False
             edited_expired_df = st.data_editor(
                 expired_df,
@@ -195,9 +64,7 @@ def show_renewal_updates():
         if licenses['expiring_soon']:
             st.subheader(f"Licenses Expiring Soon (Within {days_threshold} Days)")
             expiring_df = pd.DataFrame(licenses['expiring_soon'])
-            expiring_df['status_display'] = expiring_df['days_remaining'].apply(
-                lambda x: f"Expires in {x} days" if x > 0 else "Expires today"
-            )
+            expiring_df['status_display'] = format_days_remaining(expiring_df['days_remaining']).astype(str)
             expiring_df['Select'] = False
             edited_expiring_df = st.data_editor(
                 expiring_df,
@@ -251,58 +118,42 @@ def show_renewal_updates():
                 placeholder="Add any additional message to include in the notifications"
             )
             if st.button("Send All Notifications", type="primary"):
-                progress_bar = st.progress(0)
-                success_count = 0
-                total = len(selected_licenses)
-
-                for i, license_data in enumerate(selected_licenses):
-                    notification_type = "expired" if int(license_data['days_remaining']) < 0 else "expiring"
-                    subject, html_content = get_email_template(license_data, notification_type)
-
-                    if custom_message:
-                        html_content = html_content.replace(
-                            "</body>",
-                            f"<p><strong>Additional Note:</strong> {custom_message}</p></body>"
-                        )
-
-                    if send_email_notification(
-                            license_data['email'],
-                            subject,
-                            html_content
-                    ):
-                        success_count += 1
-
-                    progress_bar.progress((i + 1) / total)
-
-                st.success(f"Successfully sent {success_count} out of {total} notifications")
-
-                # Log the notification in the database
-                conn = get_db_connection()
-                if conn:
-                    try:
-                        cursor = conn.cursor()
-                        for license_data in selected_licenses:
-                            cursor.execute("""
-                                           INSERT INTO renewal_notifications
-                                           (license_id, customer_id, product_id, notification_date,
-                                            notification_type)
-                                           SELECT l.license_id,
-                                                  l.customer_id,
-                                                  l.product_id,
-                                                  NOW(),
-                                                  %s
-                                           FROM licenses l
-                                           WHERE l.license_id = %s
-                                           """, (
-                                               "expired" if license_data['days_remaining'] < 0 else "expiring",
-                                               license_data['license_id']
-                                           ))
-                        conn.commit()
-                    except Error as e:
-                        st.error(f"Error logging notifications: {e}")
-                    finally:
-                        if conn.is_connected():
-                            conn.close()
+                # One message per customer address, listing all of its selected licenses
+                messages = build_renewal_messages(
+                    [(license_data, "expired" if int(license_data['days_remaining']) < 0 else "expiring")
+                     for license_data in selected_licenses],
+                    custom_message
+                )
+
+                # Delivery happens in the background outbox worker, which also
+                # logs each outcome to renewal_notifications
+                batch_id = enqueue_emails(messages)
+                if batch_id:
+                    st.session_state.renewal_batch_id = batch_id
+                else:
+                    st.error("Could not queue notifications")
+
+        if st.session_state.get('renewal_batch_id'):
+            show_send_progress(st.session_state.renewal_batch_id)
+
+
+@st.fragment(run_every=2)
+def show_send_progress(batch_id):
+    """Poll the outbox and show how far the last batch of notifications has got"""
+    progress = get_batch_progress(batch_id)
+    total = progress['total']
+    if not total:
+        return
+    done = progress['sent'] + progress['failed']
+    st.progress(done / total)
+    if done < total:
+        st.caption(f"Sending notifications... {progress['sent']} sent, {progress['failed']} failed, "
+                   f"{total - done} waiting")
+    else:
+        st.success(f"Successfully sent {progress['sent']} out of {total} notifications")
+        if st.button("Dismiss", key="dismiss_send_progress"):
+            st.session_state.renewal_batch_id = None
+            st.rerun()
 
 
 if __name__ == "__main__":
@@ -1,132 +1,15 @@
 import streamlit as st
-import mysql.connector
 from mysql.connector import Error
+from Database import get_db_connection, invalidate_tables
+from RequestNotifier import notify_new_request
+from Search import index_document
 from datetime import datetime
 import pandas as pd
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 
 
-def get_db_connection():
-    """Establish connection to the database"""
-    try:
-        return mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="root",
-            database="Corporate IT Solutions"
-        )
-    except Error as e:
-        st.error(f"Database error: {e}")
-        return None
-
-
-def get_admin_emails():
-    """Retrieve email addresses of all admin users"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT email FROM USERS WHERE role = 'admin'")
-            return [row['email'] for row in cursor.fetchall()]
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return []
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return []
-
-
-def send_email_notification(recipients, subject, message):
-    """Send email notification using SMTP"""
-    try:
-        # SMTP configuration (should be in your Streamlit secrets)
-        smtp_config = {
-            'sender_email': st.secrets.smtp.sender_email,
-            'smtp_server': st.secrets.smtp.server,
-            'smtp_port': st.secrets.smtp.port,
-            'smtp_username': st.secrets.smtp.username,
-            'smtp_password': st.secrets.smtp.password,
-            'use_tls': st.secrets.smtp.use_tls
-        }
-
-        # Create email message
-        msg = MIMEMultipart()
-        msg['From'] = smtp_config['sender_email']
-        msg['To'] = ", ".join(recipients)
-        msg['Subject'] = subject
-        msg.attach(MIMEText(message, 'html', 'utf-8'))
-
-        # Connect to SMTP server and send
-        with smtplib.SMTP(smtp_config['smtp_server'], smtp_config['smtp_port']) as server:
-            server.ehlo()
-            if smtp_config['use_tls']:
-                server.starttls()
-                server.ehlo()
-            server.login(smtp_config['smtp_username'], smtp_config['smtp_password'])
-            server.send_message(msg)
-        return True
-    except Exception as e:
-        st.error(f"Error sending email: {e}")
-        return False
-
-
-def send_request_notification(request_data):
-    """Send notification to admins about new request"""
-    admin_emails = get_admin_emails()
-    if not admin_emails:
-        st.error("No admin emails found for notification")
-        return False
-
-    subject = f"New Request Submitted: {request_data[2]}"
-    message = f"""
-    <html>
-    <body>
-        <h3>New Request Notification</h3>
-        <p>A new request has been submitted by {request_data[0]}:</p>
-
-        <table style="border-collapse: collapse; width: 100%;">
-            <tr style="background-color: #f2f2f2;">
-                <th style="border: 1px solid #ddd; padding: 8px; text-align: left;">Field</th>
-                <th style="border: 1px solid #ddd; padding: 8px; text-align: left;">Value</th>
-            </tr>
-            <tr>
-                <td style="border: 1px solid #ddd; padding: 8px;"><strong>Requester</strong></td>
-                <td style="border: 1px solid #ddd; padding: 8px;">{request_data[0]}</td>
-            </tr>
-            <tr>
-                <td style="border: 1px solid #ddd; padding: 8px;"><strong>Date</strong></td>
-                <td style="border: 1px solid #ddd; padding: 8px;">{request_data[1]}</td>
-            </tr>
-            <tr>
-                <td style="border: 1px solid #ddd; padding: 8px;"><strong>Topic</strong></td>
-                <td style="border: 1px solid #ddd; padding: 8px;">{request_data[2]}</td>
-            </tr>
-            <tr>
-                <td style="border: 1px solid #ddd; padding: 8px;"><strong>Description</strong></td>
-                <td style="border: 1px solid #ddd; padding: 8px;">{request_data[3]}</td>
-            </tr>
-            <tr>
-                <td style="border: 1px solid #ddd; padding: 8px;"><strong>Amount</strong></td>
-                <td style="border: 1px solid #ddd; padding: 8px;">{request_data[5]} {request_data[4]}</td>
-            </tr>
-        </table>
-
-        <p style="margin-top: 20px;">Please review this request in the admin panel.</p>
-
-        <p>Best regards,<br>
-        Corporate IT Solutions System</p>
-    </body>
-    </html>
-    """
-
-    return send_email_notification(admin_emails, subject, message)
-
 
 def save_request(request_data):
-    """Save new request to database and notify admins"""
+    """Save new request to database and queue the admin notification"""
     conn = get_db_connection()
     if conn:
         try:
@@ -137,17 +20,18 @@ def save_request(request_data):
                            VALUES (%s, %s, %s, %s, %s, %s, 'Pending', NOW())
                            """, request_data)
             conn.commit()
+            invalidate_tables('requests')
+            index_document('requests', cursor.lastrowid, f"{request_data[2]} {request_data[3]}")
 
-            # Send notification after successful save
-            send_request_notification(request_data)
+            # Admins hear about it in the next digest; nothing here waits on mail
+            notify_new_request()
 
             return True
         except Error as e:
             st.error(f"Database error: {e}")
             return False
         finally:
-            if conn.is_connected():
-                conn.close()
+            conn.close()
     return False
 
 
@@ -167,8 +51,7 @@ def get_all_requests():
             st.error(f"Database error: {e}")
             return []
         finally:
-            if conn.is_connected():
-                conn.close()
+            conn.close()
     return []
 
 
@@ -198,8 +81,7 @@ def update_request_status(request_id, new_status, processed_by=None):
             st.error(f"Database error: {e}")
             return False
         finally:
-            if conn.is_connected():
-                conn.close()
+            conn.close()
     return False
 
 
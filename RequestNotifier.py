@@ -0,0 +1,144 @@
+# RequestNotifier.py
+#
+# Admin notifications for new requests. save_request only inserts the request
+# and wakes the dispatcher. The dispatcher waits out a short window so that
+# requests submitted close together share one digest, then queues one email
+# per admin in the outbox and marks the requests notified in the same
+# transaction. A periodic poll picks up requests saved while no dispatcher
+# was running.
+import sys
+import threading
+import time
+import traceback
+
+import streamlit as st
+from mysql.connector import Error
+from Database import get_db_connection
+from EmailOutbox import ensure_worker, insert_messages
+from EmailTemplates import render_request_digest
+
+
+NOTIFICATION_TYPE = "request_digest"
+
+# --- NOTIFICATION SETTINGS ---
+# Defaults can be overridden with a [request_notifications] section in .streamlit/secrets.toml
+DEFAULT_REQUEST_NOTIFICATION_SETTINGS = {
+    'digest_window_seconds': 60,  # wait after a new request for others to join its digest
+    'poll_interval': 300,         # seconds between checks for requests nobody announced
+    'max_per_digest': 100,        # requests listed in one digest; the rest follow in the next
+}
+
+
+def load_request_notification_settings():
+    """Merge the [request_notifications] secrets section over the defaults"""
+    settings = dict(DEFAULT_REQUEST_NOTIFICATION_SETTINGS)
+    try:
+        settings.update(st.secrets["request_notifications"])
+    except Exception:
+        pass
+    return settings
+
+
+def get_admin_emails(cursor):
+    cursor.execute("SELECT email FROM USERS WHERE role = 'admin' AND email IS NOT NULL AND email != ''")
+    return [row['email'] for row in cursor.fetchall()]
+
+
+def dispatch_digest(max_per_digest=100):
+    """Queue one digest per admin for requests not yet announced and mark them
+    notified, in one transaction. Returns the number of requests announced."""
+    conn = get_db_connection()
+    if not conn:
+        return 0
+    try:
+        cursor = conn.cursor(dictionary=True)
+        # SKIP LOCKED lets a second dispatcher (another process) take the
+        # next requests instead of announcing the same ones twice
+        cursor.execute("""
+                       SELECT request_id, name, date, topic, description, currency, amount
+                       FROM requests
+                       WHERE notified_at IS NULL
+                       ORDER BY request_id
+                       LIMIT %s
+                       FOR UPDATE SKIP LOCKED
+                       """, (max_per_digest,))
+        requests = cursor.fetchall()
+        if not requests:
+            conn.rollback()
+            return 0
+
+        admin_emails = get_admin_emails(cursor)
+        if not admin_emails:
+            # Leave the requests unannounced so the next poll tries again
+            # once an admin has an email address
+            conn.rollback()
+            print(f"{len(requests)} new request(s) not announced: no admin has an email address",
+                  file=sys.stderr)
+            return 0
+        subject, body = render_request_digest(requests)
+        insert_messages(cursor, [
+            {'recipient': email, 'subject': subject, 'body': body, 'notification_type': NOTIFICATION_TYPE}
+            for email in admin_emails
+        ])
+
+        ids = [r['request_id'] for r in requests]
+        placeholders = ", ".join(["%s"] * len(ids))
+        cursor.execute(f"UPDATE requests SET notified_at = NOW() WHERE request_id IN ({placeholders})", ids)
+        conn.commit()
+    except Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    ensure_worker().wake()
+    return len(requests)
+
+
+class RequestDigestDispatcher:
+    """Background thread that batches new-request notifications into digests"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or load_request_notification_settings()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-digest", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            if self._wake.wait(self.settings['poll_interval']):
+                # Let requests submitted during the window join this digest
+                time.sleep(self.settings['digest_window_seconds'])
+                self._wake.clear()
+            try:
+                while dispatch_digest(int(self.settings['max_per_digest'])) >= int(self.settings['max_per_digest']):
+                    pass  # more may be waiting
+            except Exception:
+                # Database or configuration trouble; try again on the next wake or poll
+                print("Request digest dispatch failed:", file=sys.stderr)
+                traceback.print_exc()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def ensure_dispatcher():
+    """Start the process-wide digest dispatcher if it is not running yet"""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = RequestDigestDispatcher().start()
+    return _dispatcher
+
+
+def notify_new_request():
+    """Announce a newly saved request to the admins in the next digest"""
+    ensure_dispatcher().wake()
@@ -0,0 +1,328 @@
+# Search.py
+#
+# Ranked full-text search over requests (topic and description) and license
+# remarks. MySQL answers from the FULLTEXT indexes added by migration 012.
+# Where those indexes are missing (the migration has not been applied, or the
+# server cannot build them) an in-process inverted index is built from one
+# scan of the table instead. Writers in this process update that index one
+# document at a time; a background rebuild picks up writes made elsewhere
+# while searches keep using the current index.
+import heapq
+import math
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import streamlit as st
+from mysql.connector import Error
+from Database import get_db_connection
+
+
+SEARCH_PAGE_SIZE = 20
+ER_FT_MATCHING_KEY_NOT_FOUND = 1191  # MySQL: no FULLTEXT index for the MATCH columns
+
+# --- SEARCH SETTINGS ---
+# Defaults can be overridden with a [search] section in .streamlit/secrets.toml
+DEFAULT_SEARCH_SETTINGS = {
+    'backend': "auto",        # "fulltext", "memory", or "auto" (fulltext, falling back to memory)
+    'index_ttl_seconds': 3600,  # age at which a fallback index is rebuilt in the background
+    'fulltext_retry_seconds': 300,  # how long to use the fallback before checking for FULLTEXT again
+}
+
+# name -> the table to search, its MATCH columns and the columns returned per hit
+SEARCH_TARGETS = {
+    'requests': {
+        'id': "r.request_id",
+        'match': "r.topic, r.description",
+        'text': "CONCAT_WS(' ', r.topic, r.description)",
+        'columns': "r.request_id, r.name, r.topic, r.status, r.created_at, LEFT(r.description, 200) AS snippet",
+        'table': "requests r",
+        'from': "requests r",
+    },
+    'licenses': {
+        'id': "l.license_id",
+        'match': "l.remarks",
+        'text': "l.remarks",
+        'columns': "l.license_id, c.customer_name, p.product_name, l.expiry_date, l.remarks",
+        'table': "licenses l",
+        'from': """licenses l
+                           JOIN customers c ON l.customer_id = c.customer_id
+                           JOIN products p ON l.product_id = p.product_id""",
+    },
+}
+
+TOKEN = re.compile(r"\w+")
+
+_fulltext_missing = {}  # target -> when its FULLTEXT index was found missing (monotonic)
+
+
+def load_search_settings():
+    """Merge the [search] secrets section over the defaults"""
+    settings = dict(DEFAULT_SEARCH_SETTINGS)
+    try:
+        settings.update(st.secrets["search"])
+    except Exception:
+        pass
+    return settings
+
+
+def tokenize(text):
+    """Lower-cased word tokens; single characters are dropped like MySQL's minimum token size"""
+    return [token for token in TOKEN.findall(str(text or "").casefold()) if len(token) > 1]
+
+
+# --- Fallback index ---
+class InvertedIndex:
+    """token -> {doc_id: term frequency}, ranked by TF-IDF"""
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.doc_tokens = {}  # doc_id -> its distinct tokens, so the document can be taken out again
+
+    @property
+    def doc_count(self):
+        return len(self.doc_tokens)
+
+    def add(self, doc_id, text):
+        """Index a document, replacing whatever was indexed under doc_id before"""
+        if doc_id in self.doc_tokens:
+            self.remove(doc_id)
+        tokens = tokenize(text)
+        if not tokens:
+            return
+        for token in tokens:
+            docs = self.postings[token]
+            docs[doc_id] = docs.get(doc_id, 0) + 1
+        self.doc_tokens[doc_id] = tuple(set(tokens))
+
+    def remove(self, doc_id):
+        for token in self.doc_tokens.pop(doc_id, ()):
+            docs = self.postings[token]
+            del docs[doc_id]
+            if not docs:
+                del self.postings[token]
+
+    def __len__(self):
+        return self.doc_count
+
+    def search(self, query, limit):
+        """The best `limit` (doc_id, score) pairs, highest score first, newest id first on ties"""
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            docs = self.postings.get(token)
+            if not docs:
+                continue
+            idf = math.log(1 + self.doc_count / len(docs))
+            for doc_id, frequency in docs.items():
+                scores[doc_id] += (1 + math.log(frequency)) * idf
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+
+def build_index(name):
+    """Scan a target's text once into an InvertedIndex; None if the database is unreachable"""
+    target = SEARCH_TARGETS[name]
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        index = InvertedIndex()
+        cursor = conn.cursor(buffered=False)
+        cursor.execute(f"SELECT {target['id']}, {target['text']} FROM {target['table']}")
+        for doc_id, text in cursor:
+            index.add(doc_id, text)
+        return index
+    finally:
+        conn.close()
+
+
+class FallbackIndex:
+    """One target's InvertedIndex. Writers in this process keep it current
+    with update(); after index_ttl_seconds, or after invalidate(), it is
+    rebuilt on a background thread and searches use the old one meanwhile."""
+
+    def __init__(self, name):
+        self.name = name
+        self._index = None
+        self._built_at = 0.0
+        self._stale = False
+        self._rebuild = None   # the thread scanning the table, while one runs
+        self._pending = []     # (doc_id, text) updates made during that scan
+        self._lock = threading.Lock()
+
+    def search(self, query, limit):
+        ttl = float(load_search_settings()['index_ttl_seconds'])
+        with self._lock:
+            expired = time.monotonic() - self._built_at > ttl
+            if (self._index is None or self._stale or expired) and self._rebuild is None:
+                self._stale = False
+                self._pending = []
+                self._rebuild = threading.Thread(target=self._build, name=f"search-index-{self.name}", daemon=True)
+                self._rebuild.start()
+            rebuild = self._rebuild
+            first_build = self._index is None
+        if first_build:
+            rebuild.join()  # nothing to serve until the first scan finishes
+        with self._lock:
+            return self._index.search(query, limit) if self._index is not None else []
+
+    def update(self, doc_id, text):
+        """Index a document's new text; None (or no words) takes it out"""
+        with self._lock:
+            if self._rebuild is not None:
+                self._pending.append((doc_id, text))
+            if self._index is not None:
+                self._index.add(doc_id, text)
+
+    def invalidate(self):
+        """Rebuild on the next search, e.g. after a bulk write"""
+        with self._lock:
+            self._stale = True
+
+    def _build(self):
+        started = time.monotonic()
+        try:
+            index = build_index(self.name)
+        except Error as e:
+            print(f"Search index for {self.name} not rebuilt: {e}", file=sys.stderr)
+            index = None
+        with self._lock:
+            if index is not None:
+                # The scan may have missed writes committed while it ran
+                for doc_id, text in self._pending:
+                    index.add(doc_id, text)
+                self._index = index
+                self._built_at = started
+            self._pending = []
+            self._rebuild = None
+
+
+_indexes = {name: FallbackIndex(name) for name in SEARCH_TARGETS}
+
+
+def index_document(name, doc_id, text):
+    """Update a target's fallback index after a committed write to one document
+    (text None after a delete). Does nothing until the index is first used."""
+    _indexes[name].update(doc_id, text)
+
+
+def invalidate_index(name):
+    """Rebuild a target's fallback index in the background after a bulk write"""
+    _indexes[name].invalidate()
+
+
+# --- Search ---
+def fulltext_search(cursor, name, query, page, page_size):
+    """One page of hits ranked by MySQL's FULLTEXT relevance"""
+    target = SEARCH_TARGETS[name]
+    match = f"MATCH({target['match']}) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+    cursor.execute(f"""
+                   SELECT {target['columns']}, {match} AS score
+                   FROM {target['from']}
+                   WHERE {match}
+                   ORDER BY score DESC, {target['id']} DESC
+                   LIMIT %s OFFSET %s
+                   """, (query, query, page_size + 1, page * page_size))
+    return cursor.fetchall()
+
+
+def index_search(cursor, name, query, page, page_size):
+    """One page of hits ranked by the in-process index; rows are read by id"""
+    target = SEARCH_TARGETS[name]
+    ranked = _indexes[name].search(query, (page + 1) * page_size + 1)[page * page_size:]
+    if not ranked:
+        return []
+    scores = dict(ranked)
+    placeholders = ", ".join(["%s"] * len(scores))
+    cursor.execute(f"""
+                   SELECT {target['columns']}
+                   FROM {target['from']}
+                   WHERE {target['id']} IN ({placeholders})
+                   """, list(scores))
+    rows = cursor.fetchall()
+    id_column = target['id'].split(".")[1]
+    for row in rows:
+        row['score'] = scores[row[id_column]]
+    return sorted(rows, key=lambda row: (row['score'], row[id_column]), reverse=True)
+
+
+def search(name, query, page=0, page_size=SEARCH_PAGE_SIZE):
+    """Ranked hits for query in a search target ('requests' or 'licenses').
+    Returns (rows, has_next); each row carries its relevance score."""
+    if not tokenize(query):
+        return [], False
+    settings = load_search_settings()
+    backend = settings['backend']
+    if backend == "auto" and name in _fulltext_missing:
+        # Check again now and then: migration 012 may have been applied since
+        if time.monotonic() - _fulltext_missing[name] > float(settings['fulltext_retry_seconds']):
+            _fulltext_missing.pop(name, None)
+    use_fulltext = backend == "fulltext" or (backend == "auto" and name not in _fulltext_missing)
+
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor(dictionary=True)
+            if use_fulltext:
+                try:
+                    rows = fulltext_search(cursor, name, query, page, page_size)
+                except Error as e:
+                    if e.errno != ER_FT_MATCHING_KEY_NOT_FOUND or backend == "fulltext":
+                        raise
+                    _fulltext_missing[name] = time.monotonic()
+                    rows = index_search(cursor, name, query, page, page_size)
+            else:
+                rows = index_search(cursor, name, query, page, page_size)
+            return rows[:page_size], len(rows) > page_size
+        except Error as e:
+            st.error(f"Database error: {e}")
+            return [], False
+        finally:
+            conn.close()
+    return [], False
+
+
+def search_requests(query, page=0, page_size=SEARCH_PAGE_SIZE):
+    return search('requests', query, page, page_size)
+
+
+def search_licenses(query, page=0, page_size=SEARCH_PAGE_SIZE):
+    return search('licenses', query, page, page_size)
+
+
+# --- Streamlit helper ---
+def show_search(name, placeholder, column_config, key):
+    """Search box with a ranked, paged results table for one search target"""
+    query = st.text_input("Search", placeholder=placeholder, key=f"{key}_query")
+    if not query.strip():
+        return
+    # A new query starts again from the first page
+    if st.session_state.get(f"{key}_last_query") != query:
+        st.session_state[f"{key}_last_query"] = query
+        st.session_state[f"{key}_page"] = 0
+    page = st.session_state.get(f"{key}_page", 0)
+
+    rows, has_next = search(name, query, page)
+    if not rows:
+        st.info("No matches found")
+        return
+    st.dataframe(
+        rows,
+        column_order=list(column_config),
+        column_config=column_config,
+        hide_index=True,
+        use_container_width=True
+    )
+    col1, col2, col3 = st.columns([1, 4, 1])
+    with col1:
+        if st.button("⬅ Previous", disabled=page == 0, key=f"{key}_prev"):
+            st.session_state[f"{key}_page"] = page - 1
+            st.rerun()
+    with col2:
+        first_row = page * SEARCH_PAGE_SIZE + 1
+        st.caption(f"Matches {first_row}-{first_row + len(rows) - 1}, best first")
+    with col3:
+        if st.button("Next ➡", disabled=not has_next, key=f"{key}_next"):
+            st.session_state[f"{key}_page"] = page + 1
+            st.rerun()
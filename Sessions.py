@@ -0,0 +1,336 @@
+# Sessions.py
+import hashlib
+import hmac
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+
+# --- SESSION SETTINGS ---
+# Defaults can be overridden with a [session] section in .streamlit/secrets.toml
+DEFAULT_SESSION_SETTINGS = {
+    'secret_key': "",       # signs session tokens; generated when empty
+    'ttl_seconds': 8 * 3600,
+    'max_sessions': 1000,   # in-memory LRU bound
+    'sqlite_path': "",      # e.g. "sessions.db" to keep sessions across restarts
+    'restore_ttl_seconds': 15 * 60,  # how long the restore link in the URL stays valid
+}
+
+# The URL only ever carries a single-use restore token, never the session token
+RESTORE_QUERY_PARAM = "restore"
+
+
+def load_session_settings():
+    """Merge the [session] secrets section over the defaults"""
+    settings = dict(DEFAULT_SESSION_SETTINGS)
+    try:
+        settings.update(st.secrets["session"])
+    except Exception:
+        pass
+    return settings
+
+
+class SessionStore:
+    """Signed server-side sessions: an in-memory LRU, optionally backed by SQLite"""
+
+    def __init__(self, secret_key="", ttl_seconds=8 * 3600, max_sessions=1000, sqlite_path=""):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # session_id -> {'user': ..., 'expires_at': ...}
+        self._restores = {}  # restore_id -> (session_id, expires_at)
+        self._lock = threading.Lock()
+        self._db = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute("""
+                             CREATE TABLE IF NOT EXISTS sessions (
+                                 session_id TEXT PRIMARY KEY,
+                                 user_json  TEXT NOT NULL,
+                                 expires_at REAL NOT NULL
+                             )
+                             """)
+            self._db.execute("""
+                             CREATE TABLE IF NOT EXISTS session_restores (
+                                 restore_id TEXT PRIMARY KEY,
+                                 session_id TEXT NOT NULL,
+                                 expires_at REAL NOT NULL
+                             )
+                             """)
+            self._db.execute("CREATE TABLE IF NOT EXISTS session_meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._db.commit()
+        self._secret = (secret_key or self._stored_secret() or secrets.token_hex(32)).encode('utf-8')
+
+    def _stored_secret(self):
+        # Without a configured key, a persistent store keeps its own so tokens
+        # issued before a restart still verify afterwards.
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT value FROM session_meta WHERE key = 'secret_key'").fetchone()
+        if row:
+            return row[0]
+        secret = secrets.token_hex(32)
+        self._db.execute("INSERT INTO session_meta (key, value) VALUES ('secret_key', ?)", (secret,))
+        self._db.commit()
+        return secret
+
+    def _sign(self, value):
+        return hmac.new(self._secret, value.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def _unsign(self, token, prefix=""):
+        """Return the id in a signed token if its signature is valid"""
+        if not token or "." not in token:
+            return None
+        value, signature = token.rsplit(".", 1)
+        if not hmac.compare_digest(signature, self._sign(prefix + value)):
+            return None
+        return value
+
+    def _session_id(self, token):
+        return self._unsign(token)
+
+    def _token(self, session_id):
+        return f"{session_id}.{self._sign(session_id)}"
+
+    def create(self, user):
+        """Start a session for a user record and return its signed token"""
+        session_id = secrets.token_urlsafe(24)
+        entry = {'user': dict(user), 'expires_at': time.time() + self.ttl_seconds}
+        with self._lock:
+            self._remember(session_id, entry)
+            self._persist(session_id, entry)
+        return self._token(session_id)
+
+    def get(self, token):
+        """Return the user record for a valid, unexpired token, else None"""
+        session_id = self._session_id(token)
+        if session_id is None:
+            return None
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = self._load(session_id)
+                if entry is None:
+                    return None
+                self._remember(session_id, entry)
+            if entry['expires_at'] < time.time():
+                self._forget(session_id)
+                return None
+            self._sessions.move_to_end(session_id)
+            return entry['user']
+
+    def update(self, token, **fields):
+        """Update fields of the session's user record (e.g. after a username change)"""
+        session_id = self._session_id(token)
+        if session_id is None:
+            return False
+        with self._lock:
+            entry = self._sessions.get(session_id) or self._load(session_id)
+            if entry is None:
+                return False
+            self._remember(session_id, entry)
+            entry['user'].update(fields)
+            self._persist(session_id, entry)
+            return True
+
+    def revoke(self, token):
+        session_id = self._session_id(token)
+        if session_id:
+            with self._lock:
+                self._forget(session_id)
+
+    def issue_restore(self, token, ttl_seconds):
+        """A single-use restore token for the session, valid for ttl_seconds.
+        It grants nothing by itself; redeem_restore() trades it for a new session token."""
+        session_id = self._session_id(token)
+        if session_id is None:
+            return None
+        restore_id = secrets.token_urlsafe(24)
+        now = time.time()
+        with self._lock:
+            self._restores = {rid: r for rid, r in self._restores.items() if r[1] >= now}
+            self._restores[restore_id] = (session_id, now + ttl_seconds)
+            if self._db is not None:
+                self._db.execute("DELETE FROM session_restores WHERE expires_at < ?", (now,))
+                self._db.execute(
+                    "INSERT INTO session_restores (restore_id, session_id, expires_at) VALUES (?, ?, ?)",
+                    (restore_id, session_id, now + ttl_seconds)
+                )
+                self._db.commit()
+        return f"{restore_id}.{self._sign('restore:' + restore_id)}"
+
+    def redeem_restore(self, restore_token):
+        """Use a restore token up and return (new session token, user record), or None
+        if it is forged, used or expired. The session moves to a new id, so the token
+        it had before stops working."""
+        restore_id = self._unsign(restore_token, prefix="restore:")
+        if restore_id is None:
+            return None
+        with self._lock:
+            restore = self._take_restore(restore_id)
+            if restore is None or restore[1] < time.time():
+                return None
+            session_id = restore[0]
+            entry = self._sessions.get(session_id) or self._load(session_id)
+            if entry is None or entry['expires_at'] < time.time():
+                return None
+            self._forget(session_id)
+            new_id = secrets.token_urlsafe(24)
+            self._remember(new_id, entry)
+            self._persist(new_id, entry)
+        return self._token(new_id), entry['user']
+
+    def discard_restore(self, restore_token):
+        """Withdraw an unused restore token, e.g. once a newer one is in the URL"""
+        restore_id = self._unsign(restore_token, prefix="restore:")
+        if restore_id:
+            with self._lock:
+                self._take_restore(restore_id)
+
+    def _take_restore(self, restore_id):
+        # Removing the row is what makes the token single-use, also across
+        # processes sharing the SQLite file: only one DELETE can hit it.
+        restore = self._restores.pop(restore_id, None)
+        if self._db is None:
+            return restore
+        row = self._db.execute(
+            "SELECT session_id, expires_at FROM session_restores WHERE restore_id = ?", (restore_id,)
+        ).fetchone()
+        deleted = self._db.execute("DELETE FROM session_restores WHERE restore_id = ?", (restore_id,)).rowcount
+        self._db.commit()
+        return tuple(row) if row and deleted else None
+
+    def _remember(self, session_id, entry):
+        self._sessions[session_id] = entry
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            # Evicted sessions stay in SQLite (when enabled) and reload on demand
+            self._sessions.popitem(last=False)
+
+    def _forget(self, session_id):
+        self._sessions.pop(session_id, None)
+        self._restores = {rid: r for rid, r in self._restores.items() if r[0] != session_id}
+        if self._db is not None:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._db.execute("DELETE FROM session_restores WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+    def _persist(self, session_id, entry):
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, user_json, expires_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(entry['user'], default=str), entry['expires_at'])
+            )
+            self._db.commit()
+
+    def _load(self, session_id):
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT user_json, expires_at FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'user': json.loads(row[0]), 'expires_at': row[1]}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """Return the process-wide session store, creating it on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                settings = load_session_settings()
+                _store = SessionStore(
+                    secret_key=settings['secret_key'],
+                    ttl_seconds=float(settings['ttl_seconds']),
+                    max_sessions=int(settings['max_sessions']),
+                    sqlite_path=settings['sqlite_path'],
+                )
+    return _store
+
+
+# --- Streamlit helpers ---
+def start_session(user):
+    """Create a session for a logged-in user. The session token stays in the
+    server-side session state; the URL gets a single-use restore token."""
+    token = get_session_store().create(user)
+    st.session_state.session_token = token
+    set_restore_link(token)
+    apply_session_state(user)
+    return token
+
+
+def set_restore_link(token):
+    """Put a fresh restore token in the URL and withdraw the one it replaces"""
+    store = get_session_store()
+    ttl = float(load_session_settings()['restore_ttl_seconds'])
+    previous = st.session_state.get('restore_token')
+    if previous:
+        store.discard_restore(previous)
+    restore_token = store.issue_restore(token, ttl)
+    st.session_state.restore_token = restore_token
+    st.session_state.restore_refresh_at = time.time() + ttl / 2
+    st.query_params[RESTORE_QUERY_PARAM] = restore_token
+
+
+def refresh_restore_link():
+    """Renew the restore token once it is half way to expiry, so a reload or a
+    worker restart restores the login for as long as the session itself lasts"""
+    token = st.session_state.get('session_token')
+    if token and time.time() >= st.session_state.get('restore_refresh_at', 0):
+        set_restore_link(token)
+
+
+def restore_session():
+    """Log the browser back in from the restore token in the URL, e.g. after a
+    reload or server restart. The token is used up and the session rotated."""
+    restore_token = st.query_params.get(RESTORE_QUERY_PARAM)
+    restored = get_session_store().redeem_restore(restore_token) if restore_token else None
+    if restored is None:
+        st.query_params.pop(RESTORE_QUERY_PARAM, None)
+        return False
+    token, user = restored
+    st.session_state.session_token = token
+    st.session_state.restore_token = None  # used up already
+    set_restore_link(token)
+    apply_session_state(user)
+    return True
+
+
+def apply_session_state(user):
+    st.session_state.logged_in = True
+    st.session_state.username = user['username']
+    st.session_state.role = user.get('role', 'user')
+
+
+def get_current_user():
+    """The logged-in user's record, from the session store without touching the database"""
+    token = st.session_state.get('session_token')
+    return get_session_store().get(token) if token else None
+
+
+def update_current_user(**fields):
+    token = st.session_state.get('session_token')
+    if token:
+        get_session_store().update(token, **fields)
+
+
+def end_session():
+    token = st.session_state.get('session_token')
+    if token:
+        get_session_store().revoke(token)
+    st.query_params.pop(RESTORE_QUERY_PARAM, None)
+    st.session_state.session_token = None
+    st.session_state.restore_token = None
+    st.session_state.logged_in = False
+    st.session_state.username = None
+    st.session_state.role = None
@@ -1,42 +1,24 @@
 # Settings.py
 
 import streamlit as st
-import mysql.connector
 from mysql.connector import Error
-import hashlib
-import secrets
+from Database import get_db_connection, get_pool
+from QueryCache import get_query_cache
+from Sessions import get_current_user, update_current_user, end_session
+from Auth import AuthBusyError, create_password_hash, verify_password, retry_after, record_attempt, clear_attempts
 
 
-# --- Password Hashing Functions ---
-def generate_salt():
-    return secrets.token_hex(16)
-
-
-def hash_password(password, salt):
-    return hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode('utf-8'),
-        salt.encode('utf-8'),
-        100000
-    ).hex()
-
-
-def verify_password(stored_password, stored_salt, provided_password):
-    return stored_password == hash_password(provided_password, stored_salt)
-
-
-# --- DB CONNECTION ---
-def get_db_connection():
-    try:
-        return mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="root",
-            database="Corporate IT Solutions"
-        )
-    except Error as e:
-        st.error(f"Database error: {e}")
-        return None
+# --- Password Verification ---
+def check_credentials(username, user_data, password):
+    """Rate-limited password check; returns an error message or None"""
+    wait = retry_after(username)
+    if wait:
+        return f"Too many attempts. Please try again in {wait} seconds"
+    record_attempt(username)
+    if not verify_password(user_data['password'], user_data['salt'], password, user_data['hash_iterations']):
+        return "Incorrect current password"
+    clear_attempts(username)
+    return None
 
 
 # --- Update password ---
@@ -47,7 +29,7 @@ def update_password(username, current_password, new_password):
             cursor = conn.cursor(dictionary=True)
             # First get the user's current salt and hashed password
             cursor.execute(
-                "SELECT password, salt FROM USERS WHERE username = %s",
+                "SELECT password, salt, hash_iterations FROM USERS WHERE username = %s",
                 (username,)
             )
             user_data = cursor.fetchone()
@@ -56,20 +38,22 @@ def update_password(username, current_password, new_password):
                 return False, "User not found"
 
             # Verify current password
-            if not verify_password(user_data['password'], user_data['salt'], current_password):
-                return False, "Incorrect current password"
+            error = check_credentials(username, user_data, current_password)
+            if error:
+                return False, error
 
             # Generate new salt and hash for the new password
-            new_salt = generate_salt()
-            new_hashed_password = hash_password(new_password, new_salt)
+            new_hashed_password, new_salt, iterations = create_password_hash(new_password)
 
-            # Update both password and salt in database
+            # Update password, salt and hash cost in database
             cursor.execute(
-                "UPDATE USERS SET password = %s, salt = %s WHERE username = %s",
-                (new_hashed_password, new_salt, username)
+                "UPDATE USERS SET password = %s, salt = %s, hash_iterations = %s WHERE username = %s",
+                (new_hashed_password, new_salt, iterations, username)
             )
             conn.commit()
             return True, "Password updated successfully"
+        except AuthBusyError as e:
+            return False, str(e)
         except Error as e:
             return False, f"Error updating password: {e}"
         finally:
@@ -102,7 +86,7 @@ def update_username(current_username, new_username, password):
             cursor = conn.cursor(dictionary=True)
             # First verify current credentials by getting user data
             cursor.execute(
-                "SELECT password, salt FROM USERS WHERE username = %s",
+                "SELECT password, salt, hash_iterations FROM USERS WHERE username = %s",
                 (current_username,)
             )
             user_data = cursor.fetchone()
@@ -111,8 +95,9 @@ def update_username(current_username, new_username, password):
                 return False, "User not found"
 
             # Verify password
-            if not verify_password(user_data['password'], user_data['salt'], password):
-                return False, "Incorrect current password"
+            error = check_credentials(current_username, user_data, password)
+            if error:
+                return False, error
 
             # Check if new username already exists
             if username_exists(new_username):
@@ -125,6 +110,8 @@ def update_username(current_username, new_username, password):
             )
             conn.commit()
             return True, "Username updated successfully"
+        except AuthBusyError as e:
+            return False, str(e)
         except Error as e:
             return False, f"Database error: {e}"
         finally:
@@ -140,7 +127,7 @@ def delete_account(username, password):
             cursor = conn.cursor(dictionary=True)
             # First verify credentials
             cursor.execute(
-                "SELECT password, salt FROM USERS WHERE username = %s",
+                "SELECT password, salt, hash_iterations FROM USERS WHERE username = %s",
                 (username,)
             )
             user_data = cursor.fetchone()
@@ -148,8 +135,9 @@ def delete_account(username, password):
             if not user_data:
                 return False, "User not found"
 
-            if not verify_password(user_data['password'], user_data['salt'], password):
-                return False, "Incorrect password"
+            error = check_credentials(username, user_data, password)
+            if error:
+                return False, error
 
             # Delete the account
             cursor.execute(
@@ -158,6 +146,8 @@ def delete_account(username, password):
             )
             conn.commit()
             return True, "Account deleted successfully"
+        except AuthBusyError as e:
+            return False, str(e)
         except Error as e:
             return False, f"Error deleting account: {e}"
         finally:
@@ -169,12 +159,13 @@ def delete_account(username, password):
 def show_settings():
     st.set_page_config(page_title="Settings", layout="wide")
 
-    if 'logged_in' not in st.session_state or not st.session_state.logged_in:
+    current_user = get_current_user()
+    if current_user is None:
         st.warning("⚠️ Please log in to access settings.")
         st.markdown("[Back to Login](../app.py)")
         return
 
-    username = st.session_state.username
+    username = current_user['username']
     st.title("⚙️ Settings")
 
     # --- Change Username ---
@@ -193,6 +184,7 @@ def show_settings():
                 success, message = update_username(username, new_username, current_pass)
                 if success:
                     st.success(message)
+                    update_current_user(username=new_username)
                     st.session_state.username = new_username
                     # Add a slight delay to make sure the message is visible
                     st.session_state.show_username_update_message = True
@@ -231,12 +223,38 @@ def show_settings():
             success, message = delete_account(username, del_pass)
             if success:
                 st.success(message)
-                st.session_state.logged_in = False
-                st.session_state.username = None
+                end_session()
                 st.rerun()
             else:
                 st.error(message)
 
+    # --- Diagnostics (admins only) ---
+    if current_user.get('role') == 'admin':
+        with st.expander("📊 Diagnostics"):
+            cache_stats = get_query_cache().stats()
+            st.subheader("Query Cache")
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Hits", cache_stats['hits'])
+            col2.metric("Misses", cache_stats['misses'])
+            col3.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+            col4.metric("Entries", f"{cache_stats['entries']} / {cache_stats['max_entries']}")
+            st.caption(f"{cache_stats['invalidations']} entries invalidated by writes, "
+                       f"{cache_stats['evictions']} evicted")
+            if st.button("Clear Query Cache"):
+                get_query_cache().clear()
+                st.rerun()
+
+            pool_stats = get_pool().stats()
+            st.subheader("Connection Pool")
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Open Connections", f"{pool_stats['open']} / {pool_stats['pool_size']}")
+            col2.metric("In Use", pool_stats['in_use'])
+            col3.metric("Idle", pool_stats['idle'])
+            col4.metric("Leaked", pool_stats['leaked'],
+                        help="Connections garbage-collected without close(); set debug_leaks "
+                             "under [database] to see where they were checked out")
+            st.caption(f"{pool_stats['checkouts']} checkouts since start")
+
 
 if __name__ == "__main__":
     show_settings()
\ No newline at end of file
@@ -1,42 +1,13 @@
 # app.py
 
-import streamlit as st
-
+import importlib
 
-from Dashboard import show_dashboard
-import mysql.connector
+import streamlit as st
 from mysql.connector import Error
-import pandas as pd
-import hashlib
-import secrets
-
-def generate_salt():
-    return secrets.token_hex(16)
-
-def hash_password(password, salt):
-    return hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode('utf-8'),
-        salt.encode('utf-8'),
-        100000
-    ).hex()
-
-def verify_password(stored_password, stored_salt, provided_password):
-    return stored_password == hash_password(provided_password, stored_salt)
-
-
-# --- DB CONNECTION ---
-def get_db_connection():
-    try:
-        return mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="root",
-            database="Corporate IT Solutions"
-        )
-    except Error as e:
-        st.error(f"Database error: {e}")
-        return None
+from Database import get_db_connection, leak_check
+from Auth import (AuthBusyError, create_password_hash, verify_password, needs_rehash,
+                  schedule_rehash, retry_after, record_attempt, clear_attempts)
+from Sessions import start_session, restore_session, get_current_user, end_session, refresh_restore_link
 
 
 # --- LOGIN & REGISTER ---
@@ -62,156 +33,99 @@ def register_user(username, email, password, role='user'):
                 return False, "Username or email already exists"
 
             # Generate salt and hash password
-            salt = generate_salt()
-            hashed_password = hash_password(password, salt)
+            hashed_password, salt, iterations = create_password_hash(password)
 
             cursor.execute(
-                "INSERT INTO USERS (username, email, password, salt, role) VALUES (%s, %s, %s, %s, %s)",
-                (username, email, hashed_password, salt, role)
+                "INSERT INTO USERS (username, email, password, salt, hash_iterations, role) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                (username, email, hashed_password, salt, iterations, role)
             )
             conn.commit()
             return True, "Registration successful! Please login."
+        except AuthBusyError as e:
+            return False, str(e)
         except Error as e:
             return False, f"Error: {e}"
         finally:
-            if conn.is_connected():
-                conn.close()
+            conn.close()
     return False, "Could not connect to database"
 
 
+def update_password_hash(username, hashed_password, salt, iterations):
+    """Store a re-hashed password (called from the hashing pool once it finishes)"""
+    conn = get_db_connection()
+    if conn:
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE USERS SET password = %s, salt = %s, hash_iterations = %s WHERE username = %s",
+                (hashed_password, salt, iterations, username)
+            )
+            conn.commit()
+        except Error:
+            pass  # the old hash stays valid; the upgrade is retried on the next login
+        finally:
+            conn.close()
+
+
 def login_user(username, password):
     conn = get_db_connection()
     if conn:
         try:
+            record_attempt(username)
             cursor = conn.cursor(dictionary=True)
             cursor.execute(
-                "SELECT username, password, salt, role FROM USERS WHERE username = %s",
+                "SELECT user_id, username, email, password, salt, hash_iterations, role FROM USERS WHERE username = %s",
                 (username,)
             )
             user = cursor.fetchone()
-            if user and 'salt' in user and verify_password(user['password'], user['salt'], password):
-                return user
+            if user and 'salt' in user and verify_password(user['password'], user['salt'], password,
+                                                           user['hash_iterations']):
+                clear_attempts(username)
+                if needs_rehash(user['hash_iterations']):
+                    schedule_rehash(password, lambda hashed, salt, iterations:
+                                    update_password_hash(username, hashed, salt, iterations))
+                # Only the public part of the record goes into the session
+                return {
+                    'user_id': user['user_id'],
+                    'username': user['username'],
+                    'email': user['email'],
+                    'role': user.get('role') or 'user'  # Default to 'user' if role not found
+                }
+            return None
+        except AuthBusyError as e:
+            st.error(str(e))
             return None
         except Error as e:
             st.error(f"Database error: {e}")
             return None
         finally:
-            if conn.is_connected():
-                conn.close()
+            conn.close()
     return None
 
 
-
-# Add this to Dashboard.py after the existing metrics section
-
-def get_expiring_licenses():
-    """Get licenses that are expired or expiring soon"""
-    conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor(dictionary=True)
-
-            # Get already expired licenses
-            cursor.execute("""
-                           SELECT l.license_id,
-                                  c.customer_name,
-                                  p.product_name,
-                                  l.quantity,
-                                  l.expiry_date,
-                                  DATEDIFF(l.expiry_date, CURDATE()) as days_remaining
-                           FROM licenses l
-                                    JOIN customers c ON l.customer_id = c.customer_id
-                                    JOIN products p ON l.product_id = p.product_id
-                           WHERE l.expiry_date < CURDATE()
-                           ORDER BY l.expiry_date ASC
-                           """)
-            expired = cursor.fetchall()
-
-            # Get licenses expiring within 21 days (3 weeks)
-            cursor.execute("""
-                           SELECT l.license_id,
-                                  c.customer_name,
-                                  p.product_name,
-                                  l.quantity,
-                                  l.expiry_date,
-                                  DATEDIFF(l.expiry_date, CURDATE()) as days_remaining
-                           FROM licenses l
-                                    JOIN customers c ON l.customer_id = c.customer_id
-                                    JOIN products p ON l.product_id = p.product_id
-                           WHERE l.expiry_date >= CURDATE()
-                             AND l.expiry_date <= DATE_ADD(CURDATE(), INTERVAL 21 DAY)
-                           ORDER BY l.expiry_date ASC
-                           """)
-            expiring_soon = cursor.fetchall()
-
-            return {
-                'expired': expired,
-                'expiring_soon': expiring_soon
-            }
-
-        except Error as e:
-            st.error(f"Database error: {e}")
-            return {'expired': [], 'expiring_soon': []}
-        finally:
-            if conn.is_connected():
-                conn.close()
-    return {'expired': [], 'expiring_soon': []}
+# --- PAGE REGISTRY ---
+# Page modules (and the plotly / st_aggrid / pandas imports they carry) are
+# imported on first navigation, so the login form renders without them.
+PAGES = {
+    "Dashboard": ("Dashboard", "show_dashboard"),
+    "Customer Master": ("CustomerMaster", "show_customer_master"),
+    "Product Master": ("ProductMaster", "show_product_master"),
+    "License Master": ("LicenseEntry", "show_license_entry"),
+    "Customer Product View": ("CustomerProductView", "show_customer_product_view"),
+    "Renewal Updates": ("RenewalUpdates", "show_renewal_updates"),
+    "Request Form": ("RequestForm", "show_request_form"),
+    "Admin Requests": ("AdminRequests", "show_admin_requests"),
+    "Settings": ("Settings", "show_settings"),
+}
 
 
-def show_license_renewal_section():
-    """Display tables for expired and soon-to-expire licenses"""
-    st.markdown("---")
-    st.subheader("License Renewal Status")
-
-    licenses = get_expiring_licenses()
-
-    # Expired licenses table
-    with st.expander("⚠️ Expired Licenses (Needs Immediate Attention)", expanded=True):
-        if licenses['expired']:
-            expired_df = pd.DataFrame(licenses['expired'])
-            expired_df['days_remaining'] = expired_df['days_remaining'].apply(lambda x: f"Expired {abs(x)} days ago")
-
-            st.dataframe(
-                expired_df,
-                column_config={
-                    "license_id": "License ID",
-                    "customer_name": "Customer",
-                    "product_name": "Product",
-                    "quantity": st.column_config.NumberColumn("Quantity", format="%d"),
-                    "expiry_date": st.column_config.DateColumn("Expiry Date"),
-                    "days_remaining": "Status"
-                },
-                use_container_width=True,
-                hide_index=True
-            )
-        else:
-            st.success("No expired licenses found!")
-
-    # Expiring soon table
-    with st.expander("🔔 Licenses Expiring Soon (Within 3 Weeks)", expanded=True):
-        if licenses['expiring_soon']:
-            expiring_df = pd.DataFrame(licenses['expiring_soon'])
-            expiring_df['days_remaining'] = expiring_df['days_remaining'].apply(
-                lambda x: f"Expires in {x} days" if x > 0 else "Expires today"
-            )
+def load_page(page):
+    """Import a page's module on first use and return its show function"""
+    module_name, function_name = PAGES[page]
+    return getattr(importlib.import_module(module_name), function_name)
 
-            st.dataframe(
-                expiring_df,
-                column_config={
-                    "license_id": "License ID",
-                    "customer_name": "Customer",
-                    "product_name": "Product",
-                    "quantity": st.column_config.NumberColumn("Quantity", format="%d"),
-                    "expiry_date": st.column_config.DateColumn("Expiry Date"),
-                    "days_remaining": "Status"
-                },
-                use_container_width=True,
-                hide_index=True
-            )
-        else:
-            st.success("No licenses expiring in the next 3 weeks!")
 
-# --- MAIN APP ROUTER ---
 # --- MAIN APP ROUTER ---
 def main():
     st.set_page_config(layout="wide")
@@ -221,11 +135,19 @@ def main():
         st.session_state.logged_in = False
         st.session_state.username = None
 
-    # If not logged in, show login/signup
-    if not st.session_state.logged_in:
+    # If not logged in, try the restore token in the URL, else show login/signup
+    if not st.session_state.logged_in and not restore_session():
         show_login()
         return
 
+    # Role and identity come from the server-side session, not the browser state
+    current_user = get_current_user()
+    if current_user is None:  # expired or revoked
+        end_session()
+        show_login()
+        return
+    refresh_restore_link()
+
     # Navigation for logged-in users
     logo = "images/logo.png"
     st.logo(logo)
@@ -245,7 +167,7 @@ def main():
     ]
 
     # Add admin-only option if user is admin
-    if st.session_state.get('role') == 'admin':
+    if current_user['role'] == 'admin':
         nav_options.insert(7, "Admin Requests")  # Insert at position 7
 
     page = st.sidebar.radio("Go to", nav_options)
@@ -253,36 +175,11 @@ def main():
     st.sidebar.divider()
     st.sidebar.markdown(f"### Welcome, {st.session_state.username}!")
     if st.sidebar.button("Logout"):
-        st.session_state.logged_in = False
-        st.session_state.username = None
+        end_session()
         st.rerun()
 
-    if page == "Dashboard":
-        show_dashboard()
-    elif page == "Customer Master":
-        from CustomerMaster import show_customer_master
-        show_customer_master()
-    elif page == "Product Master":
-        from ProductMaster import show_product_master
-        show_product_master()
-    elif page == "License Master":
-        from LicenseEntry import show_license_entry
-        show_license_entry()
-    elif page == "Customer Product View":
-        from CustomerProductView import show_customer_product_view
-        show_customer_product_view()
-    elif page == "Renewal Updates":
-        from RenewalUpdates import show_renewal_updates
-        show_renewal_updates()
-    elif page == "Request Form":
-        from RequestForm import show_request_form
-        show_request_form()
-    elif page == "Admin Requests":
-        from AdminRequests import show_admin_requests
-        show_admin_requests()
-    elif page == "Settings":
-        from Settings import show_settings
-        show_settings()
+    with leak_check():
+        load_page(page)()
 
 
 def show_login():
@@ -297,14 +194,16 @@ def show_login():
             username = st.text_input("Username")
             password = st.text_input("Password", type="password")
             if st.form_submit_button("Login"):
-                user = login_user(username, password)
-                if user:
-                    st.session_state.logged_in = True
-                    st.session_state.username = user['username']
-                    st.session_state.role = user.get('role', 'user')  # Default to 'user' if role not found
-                    st.rerun()
+                wait = retry_after(username)
+                if wait:
+                    st.error(f"Too many login attempts. Please try again in {wait} seconds.")
                 else:
-                    st.error("Invalid credentials")
+                    user = login_user(username, password)
+                    if user:
+                        start_session(user)
+                        st.rerun()
+                    else:
+                        st.error("Invalid credentials")
 
     with tab2:
         with st.form("Signup Form"):
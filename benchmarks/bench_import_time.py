@@ -0,0 +1,81 @@
+# benchmarks/bench_import_time.py
+#
+# Import-time profile of the login page. Runs `python -X importtime -c
+# "import app"` in fresh interpreters and reports the cumulative cost of
+# importing app (everything loaded before the login form can render), the
+# heaviest imports, and whether any page-only dependency leaked in.
+#
+#   python benchmarks/bench_import_time.py [--runs N] [--top N] [--budget-ms MS]
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported directly by page modules; none of these should load for the login page
+PAGE_ONLY_MODULES = ["plotly.express", "st_aggrid", "dateutil.relativedelta", "email.mime.multipart"]
+
+PAGE_MODULES = ["Dashboard", "CustomerMaster", "ProductMaster", "LicenseEntry", "CustomerProductView",
+                "RenewalUpdates", "RequestForm", "AdminRequests", "Settings"]
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def profile_imports(statement):
+    """Return {module: (self_us, cumulative_us, depth)} for one fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            modules[module] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return modules
+
+
+def best_profile(statement, runs, target):
+    """Profile with the lowest cumulative time for the target module"""
+    profiles = [profile_imports(statement) for _ in range(runs)]
+    return min(profiles, key=lambda modules: modules.get(target, (0, 0, 0))[1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile login-page import time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, help="exit non-zero if importing app takes longer")
+    args = parser.parse_args(argv)
+
+    modules = best_profile("import app", args.runs, "app")
+    total_ms = modules["app"][1] / 1000
+    print(f"import app: {total_ms:.1f} ms cumulative (best of {args.runs})")
+
+    top_level = sorted(
+        ((module, cumulative) for module, (_, cumulative, depth) in modules.items() if depth == 1),
+        key=lambda item: item[1], reverse=True
+    )
+    print("\nHeaviest top-level imports:")
+    for module, cumulative in top_level[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+    leaked = [module for module in PAGE_ONLY_MODULES if module in modules]
+    print("\nPage-only dependencies loaded at login: " + (", ".join(leaked) if leaked else "none"))
+
+    pages = best_profile("import app, " + ", ".join(PAGE_MODULES), args.runs, PAGE_MODULES[0])
+    deferred_ms = sum(
+        cumulative for module, (_, cumulative, depth) in pages.items() if depth == 0 and module not in modules
+    ) / 1000
+    print(f"Deferred until first navigation (all pages): {deferred_ms:.1f} ms")
+
+    if leaked or (args.budget_ms and total_ms > args.budget_ms):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
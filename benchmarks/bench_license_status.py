@@ -0,0 +1,56 @@
+# benchmarks/bench_license_status.py
+#
+# Compares the old per-row Series.apply(lambda ...) formatting with the
+# vectorised helpers in LicenseStatus.py.
+#
+#   python benchmarks/bench_license_status.py [rows]
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from LicenseStatus import format_days_remaining, license_status  # noqa: E402
+
+
+def apply_days_remaining(days):
+    return days.apply(
+        lambda x: f"Expired {abs(x)} days ago" if x < 0 else (f"Expires in {x} days" if x > 0 else "Expires today")
+    )
+
+
+def apply_status(expiry_dates, today):
+    # As the pages did it: normalise to date objects, then compare row by row
+    expiry_dates = pd.to_datetime(expiry_dates).dt.date
+    return expiry_dates.apply(lambda x: "Active" if x >= today else "Expired")
+
+
+def best_of(func, repeat=5):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main(rows=100_000):
+    rng = np.random.default_rng(42)
+    today = date.today()
+    days = pd.Series(rng.integers(-730, 730, size=rows))
+    expiry_dates = pd.Series([today + timedelta(days=int(d)) for d in days])
+
+    assert apply_days_remaining(days).tolist() == format_days_remaining(days).astype(str).tolist()
+    assert apply_status(expiry_dates, today).tolist() == license_status(expiry_dates, today).astype(str).tolist()
+
+    print(f"{rows:,} rows (best of 5)")
+    for name, old, new in [
+        ("days_remaining text", lambda: apply_days_remaining(days), lambda: format_days_remaining(days)),
+        ("Active/Expired status", lambda: apply_status(expiry_dates, today), lambda: license_status(expiry_dates, today)),
+    ]:
+        old_time = best_of(old)
+        new_time = best_of(new)
+        print(f"{name:<24} apply {old_time * 1000:8.1f} ms   vectorised {new_time * 1000:8.1f} ms   "
+              f"speedup {old_time / new_time:5.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
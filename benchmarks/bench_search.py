@@ -0,0 +1,42 @@
+# benchmarks/bench_search.py
+#
+# Build and query times of the in-process inverted index Search.py falls back
+# to when the FULLTEXT indexes are missing, on a synthetic corpus of
+# request-like texts. (The FULLTEXT path is measured on the server with
+# `python Migrations.py verify` and the slow query log.)
+#
+#   python benchmarks/bench_search.py [documents]
+import itertools
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Search import InvertedIndex, SEARCH_PAGE_SIZE  # noqa: E402
+
+COMMON_WORDS = ["license", "renewal", "invoice", "payment", "request", "support", "upgrade", "server",
+                "users", "annual", "quote", "approval", "urgent", "customer", "training", "install"]
+
+QUERIES = ["renewal invoice", "urgent server upgrade", "w1234", "training quote for customer"]
+
+
+def main(documents=1_000_000):
+    rng = random.Random(42)
+    vocabulary = COMMON_WORDS + [f"w{i}" for i in range(50_000)]
+    cum_weights = list(itertools.accumulate([50] * len(COMMON_WORDS) + [1] * 50_000))
+
+    index = InvertedIndex()
+    started = time.perf_counter()
+    for doc_id in range(documents):
+        index.add(doc_id, " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=12)))
+    print(f"{documents:,} documents indexed in {time.perf_counter() - started:.1f} s")
+
+    for query in QUERIES:
+        best = min(timeit.repeat(lambda: index.search(query, SEARCH_PAGE_SIZE + 1), number=1, repeat=5))
+        print(f"{query!r:<32} first page {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,94 @@
+-- Base schema for the License Management System.
+-- Every statement is idempotent so this can be applied to an existing database.
+
+CREATE TABLE IF NOT EXISTS USERS (
+    user_id INT AUTO_INCREMENT PRIMARY KEY,
+    username VARCHAR(50) UNIQUE,
+    email VARCHAR(100) UNIQUE,
+    password TEXT,
+    salt TEXT,
+    role ENUM('user','admin') DEFAULT 'user'
+);
+
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id INT AUTO_INCREMENT PRIMARY KEY,
+    customer_name VARCHAR(255),
+    contact_person VARCHAR(255),
+    email VARCHAR(255),
+    phone VARCHAR(50),
+    location VARCHAR(255)
+);
+
+CREATE TABLE IF NOT EXISTS products (
+    product_id INT AUTO_INCREMENT PRIMARY KEY,
+    product_name VARCHAR(255),
+    product_type VARCHAR(255),
+    license_unit VARCHAR(50),
+    default_validity_months INT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS licenses (
+    license_id INT AUTO_INCREMENT PRIMARY KEY,
+    customer_id INT,
+    product_id INT,
+    quantity INT,
+    issue_date DATE,
+    installation_date DATE,
+    expiry_date DATE,
+    validity_period_months INT,
+    remarks TEXT,
+    kwacha_amount DECIMAL(10,2),
+    USD_amount DECIMAL(10,2),
+    FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
+    FOREIGN KEY (product_id) REFERENCES products(product_id)
+);
+
+CREATE TABLE IF NOT EXISTS renewals (
+    renewal_id INT AUTO_INCREMENT PRIMARY KEY,
+    license_id INT,
+    customer_id INT,
+    product_id INT,
+    total_quantity INT,
+    renewal_due_date DATE,
+    renewal_amount_kwatcha DECIMAL(10,2),
+    renewal_amount_USD DECIMAL(10,2),
+    status VARCHAR(20),
+    invoice_no VARCHAR(100),
+    client_confirmation_status VARCHAR(20),
+    remarks TEXT,
+    created_at DATETIME,
+    updated_at DATETIME,
+    FOREIGN KEY (license_id) REFERENCES licenses(license_id)
+);
+
+CREATE TABLE IF NOT EXISTS renewal_notifications (
+    notification_id INT AUTO_INCREMENT PRIMARY KEY,
+    license_id INT,
+    customer_id INT,
+    product_id INT,
+    notification_date DATETIME,
+    notification_type VARCHAR(20)
+);
+
+CREATE TABLE IF NOT EXISTS requests (
+    request_id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(255),
+    date DATE,
+    topic VARCHAR(255),
+    description TEXT,
+    currency VARCHAR(10),
+    amount DECIMAL(10,2),
+    status ENUM('Pending','Approved','Rejected') DEFAULT 'Pending',
+    processed_by VARCHAR(50),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    processed_at DATETIME NULL
+);
+
+CREATE TABLE IF NOT EXISTS license_summary (
+    summary_id INT AUTO_INCREMENT PRIMARY KEY,
+    expiry_date DATE,
+    product_type VARCHAR(255),
+    license_count INT NOT NULL,
+    INDEX idx_license_summary_expiry (expiry_date)
+);
@@ -0,0 +1,29 @@
+-- Indexes for the filters and sorts used on every page.
+-- Verify with: python Migrations.py verify
+
+-- Expiry range scans (dashboard summary, get_expiring_licenses); the trailing
+-- join keys let MySQL resolve the customer/product joins from the index.
+CREATE INDEX idx_licenses_expiry ON licenses (expiry_date, customer_id, product_id);
+
+-- One license per customer/product (save_license duplicate check).
+-- Remove any existing duplicates before applying.
+CREATE UNIQUE INDEX uq_licenses_customer_product ON licenses (customer_id, product_id);
+
+-- get_pending_requests / get_processed_requests
+CREATE INDEX idx_requests_status_created ON requests (status, created_at);
+CREATE INDEX idx_requests_status_processed ON requests (status, processed_at);
+
+-- get_all_requests history ordering
+CREATE INDEX idx_requests_created ON requests (created_at);
+
+-- is_customer_exists and customer dropdown ordering
+CREATE INDEX idx_customers_name ON customers (customer_name);
+
+-- Product dropdown ordering
+CREATE INDEX idx_products_name ON products (product_name);
+
+-- get_admin_emails
+CREATE INDEX idx_users_role ON USERS (role);
+
+-- get_renewals_by_license
+CREATE INDEX idx_renewals_license_due ON renewals (license_id, renewal_due_date);
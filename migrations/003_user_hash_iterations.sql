@@ -0,0 +1,3 @@
+-- Store the PBKDF2 cost per user so it can be raised without invalidating
+-- existing passwords; users are re-hashed at the new cost on their next login.
+ALTER TABLE USERS ADD COLUMN hash_iterations INT NOT NULL DEFAULT 100000;
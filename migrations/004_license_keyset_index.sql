@@ -0,0 +1,3 @@
+-- Customer Product View pages through licenses ordered by (expiry_date, license_id);
+-- this index returns that order directly so each page reads only PAGE_SIZE + 1 rows.
+CREATE INDEX idx_licenses_expiry_id ON licenses (expiry_date, license_id);
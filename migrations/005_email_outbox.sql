@@ -0,0 +1,19 @@
+-- Outgoing mail is queued here and delivered by the EmailOutbox worker.
+CREATE TABLE IF NOT EXISTS email_outbox (
+    outbox_id INT AUTO_INCREMENT PRIMARY KEY,
+    batch_id VARCHAR(36) NOT NULL,
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    body MEDIUMTEXT NOT NULL,
+    license_id INT NULL,
+    notification_type VARCHAR(20) NULL,
+    status ENUM('queued','sending','sent','failed') NOT NULL DEFAULT 'queued',
+    attempts INT NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    claimed_at DATETIME NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at DATETIME NULL,
+    INDEX idx_outbox_status_next (status, next_attempt_at),
+    INDEX idx_outbox_batch (batch_id)
+);
@@ -0,0 +1,5 @@
+-- Record the delivery outcome of each renewal notification.
+ALTER TABLE renewal_notifications
+    ADD COLUMN status ENUM('sent','failed') NOT NULL DEFAULT 'sent',
+    ADD COLUMN error_message TEXT NULL,
+    ADD COLUMN outbox_id INT NULL;
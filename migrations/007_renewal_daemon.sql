@@ -0,0 +1,10 @@
+-- Last-run bookkeeping for background jobs such as RenewalDaemon.
+CREATE TABLE IF NOT EXISTS job_state (
+    job_name VARCHAR(64) PRIMARY KEY,
+    last_run_at DATETIME NULL,
+    last_result VARCHAR(255) NULL
+);
+
+-- Duplicate-reminder checks look notifications up by license and type.
+CREATE INDEX idx_notifications_license_type ON renewal_notifications (license_id, notification_type, notification_date);
+CREATE INDEX idx_outbox_license_type ON email_outbox (license_id, notification_type, status);
@@ -0,0 +1,13 @@
+-- Licenses that are expired or fall due within the tracking window, maintained
+-- incrementally by ExpiryTracker so pages do not rescan the licenses table.
+CREATE TABLE IF NOT EXISTS license_expiry_status (
+    license_id INT PRIMARY KEY,
+    expiry_date DATE NOT NULL,
+    status ENUM('expiring','expired') NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_expiry_status_date (status, expiry_date),
+    INDEX idx_expiry_status_expiry (expiry_date)
+);
+
+-- The tracker's watermark: the last day it brought the status table up to date.
+ALTER TABLE job_state ADD COLUMN watermark DATE NULL;
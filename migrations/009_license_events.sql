@@ -0,0 +1,18 @@
+-- Structured license history, replacing "Upgraded on ..." / "Renewed on ..."
+-- text appended to licenses.remarks.
+CREATE TABLE IF NOT EXISTS license_events (
+    event_id INT AUTO_INCREMENT PRIMARY KEY,
+    license_id INT NOT NULL,
+    event_type VARCHAR(20) NOT NULL,
+    old_quantity INT NULL,
+    new_quantity INT NULL,
+    old_validity_months INT NULL,
+    new_validity_months INT NULL,
+    old_amount DECIMAL(15,2) NULL,
+    new_amount DECIMAL(15,2) NULL,
+    currency VARCHAR(3) NULL,
+    actor VARCHAR(255) NULL,
+    remarks TEXT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_license_events_license (license_id, created_at)
+);
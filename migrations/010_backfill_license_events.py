@@ -0,0 +1,23 @@
+# Move the upgrade / renewal history appended to licenses.remarks into
+# license_events, leaving only the free-text remarks behind.
+from LicenseEvents import parse_remarks_history, record_license_event
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+                   SELECT license_id, remarks
+                   FROM licenses
+                   WHERE remarks LIKE '%Upgraded on %'
+                      OR remarks LIKE '%Renewed on %'
+                   """)
+    updates = []
+    for license_id, remarks in cursor.fetchall():
+        plain, events = parse_remarks_history(remarks)
+        if not events:
+            continue
+        for event in events:
+            record_license_event(cursor, license_id, event.pop('event_type'), **event)
+        updates.append((plain, license_id))
+    if updates:
+        cursor.executemany("UPDATE licenses SET remarks = %s WHERE license_id = %s", updates)
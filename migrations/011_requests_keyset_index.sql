@@ -0,0 +1,7 @@
+-- The processed-requests history pages through rows ordered by
+-- (processed_at DESC, request_id DESC). status != 'Pending' spans two status
+-- values, so idx_requests_status_processed cannot return that order; this
+-- index can, and each page reads only PAGE_SIZE + 1 rows.
+-- The pending queue is served by idx_requests_status_created, whose entries
+-- already end with the primary key (request_id).
+CREATE INDEX idx_requests_processed_id ON requests (processed_at, request_id);
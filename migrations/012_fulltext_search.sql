@@ -0,0 +1,5 @@
+-- Full-text search over request text and license remarks (Search.py).
+-- The first FULLTEXT index on an InnoDB table adds a hidden FTS_DOC_ID column
+-- and rebuilds the table, so apply this outside working hours on large tables.
+CREATE FULLTEXT INDEX ft_requests_text ON requests (topic, description);
+CREATE FULLTEXT INDEX ft_licenses_remarks ON licenses (remarks);
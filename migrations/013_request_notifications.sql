@@ -0,0 +1,8 @@
+-- New requests are announced to admins in digests by RequestNotifier; a NULL
+-- notified_at marks a request that has not been included in one yet.
+ALTER TABLE requests ADD COLUMN notified_at DATETIME NULL;
+
+-- Requests saved before this migration were already emailed one by one.
+UPDATE requests SET notified_at = COALESCE(created_at, NOW());
+
+CREATE INDEX idx_requests_notified ON requests (notified_at, request_id);
@@ -0,0 +1,15 @@
+-- A renewal email can now cover several licenses of one customer; this table
+-- links each outbox message to the licenses (and reminder stage) it announces.
+CREATE TABLE IF NOT EXISTS email_outbox_licenses (
+    outbox_id INT NOT NULL,
+    license_id INT NOT NULL,
+    notification_type VARCHAR(20) NULL,
+    PRIMARY KEY (outbox_id, license_id),
+    INDEX idx_outbox_licenses_license (license_id, notification_type)
+);
+
+-- Messages queued before this migration name their single license directly.
+INSERT IGNORE INTO email_outbox_licenses (outbox_id, license_id, notification_type)
+SELECT outbox_id, license_id, notification_type
+FROM email_outbox
+WHERE license_id IS NOT NULL;
@@ -0,0 +1,5 @@
+-- license_summary is now adjusted in place with
+-- INSERT ... ON DUPLICATE KEY UPDATE license_count = license_count + n,
+-- which needs one row per (expiry_date, product_type). Buckets with a NULL key
+-- may still get more than one row; the counts are summed, so totals stay right.
+CREATE UNIQUE INDEX uq_license_summary_bucket ON license_summary (expiry_date, product_type);